@@ -1,7 +1,13 @@
+import sys
+import startup_profile
+if "--profile-startup" in sys.argv:
+    startup_profile.install()  # Before the other imports, so they are timed too
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, Toplevel, Scrollbar, Text
 from PIL import Image, ImageTk
 import os
+import queue
 import shutil
 import subprocess
 import threading
@@ -10,16 +16,19 @@ import time
 from tkinter import filedialog, messagebox, Toplevel
 from console import Console
 from file_manager import FileManager
-from transient_simulation import run_simulation_and_generate_html
-from graphs_generator import run_simulation_and_generate_graphs
-import psutil
 from whiteboard import Whiteboard
 import json
 import tkinter.filedialog as filedialog
 from tkinter import filedialog, messagebox
-import cv2
-import sys
 from dashboard import Dashboard
+from autosave import (AUTOSAVE_INTERVAL, ProjectAutosave, discard as discard_autosave, load_project_file,
+                      recover as recover_autosave)
+# Simulation, graph (matplotlib), comparison and monitoring (psutil) modules are imported on first use
+
+# Time the static splash screen stays up while the dashboard is built behind it [ms]
+SPLASH_TIME = 800
+# Period at which the Tk thread checks for the end of a background save [ms]
+SAVE_POLL_MS = 100
 
 class AiravataSoftware:
     def __init__(self, root):
@@ -86,6 +95,9 @@ class AiravataSoftware:
         self.whiteboard = Whiteboard(self.root)
         self.current_file_name = None
         self.highlighted_element = None
+        self.autosave = None  # Background autosave of the open project
+        self.autosave_state = None
+        self.performance_panel = None  # Live performance monitor, when shown
         self.simulation_properties = {
             "simulation_time": 10.0,
             "time_step": 0.01,
@@ -102,6 +114,13 @@ class AiravataSoftware:
         self.create_simulation_property_labels()
         # Apply dark theme as default
         self.apply_dark_theme(show_message=False)
+        # Queued saves must reach the disk before the window goes away
+        self.root.protocol("WM_DELETE_WINDOW", self.close_window)
+
+    def close_window(self):
+        """Close the application once the pending saves are written."""
+        self.stop_autosave()
+        self.root.destroy()
 
     def create_toolbar(self):
         toolbar = tk.Frame(self.root, bg="#55cee0", pady=5)
@@ -216,9 +235,13 @@ class AiravataSoftware:
         else:
             self.dropdown_menu.add_command(label="Run Simulation", command=self.Run_icon_action)
 
+        self.dropdown_menu.add_command(label="Compare Runs", command=self.compare_runs_action)
+
     def back_to_dashboard(self):
         """Return to the dashboard screen from the main application."""
         try:
+            # The project is no longer open: finish its pending saves and stop autosaving
+            self.stop_autosave()
             # Clear the current application
             for widget in self.root.winfo_children():
                 widget.destroy()
@@ -517,12 +540,18 @@ class AiravataSoftware:
         self.fluid_density_entry.delete(0, tk.END)
         self.fluid_density_entry.insert(0, str(self.simulation_properties['fluid_density']))
 
+        # Column separation model used by the native transient solver
+        tk.Label(frame, text="Cavitation Model:", bg="#f5f5f5", font=("Segoe UI", 12)).pack(pady=(5, 0), anchor="w")
+        self.cavitation_var = tk.StringVar(value=self.simulation_properties.get('cavitation_model') or "None")
+        tk.OptionMenu(frame, self.cavitation_var, "None", "DVCM", "DGCM").pack(pady=5, anchor="w")
+
         # Save and Cancel buttons with improved styling
         button_frame = tk.Frame(property_box, bg="#f5f5f5")
         button_frame.pack(pady=10)
 
         save_button = tk.Button(button_frame, text="Save", command=lambda: self.save_simulation_properties(
-            self.simulation_time_entry.get(), self.time_step_entry.get(), self.gravity_entry.get(), self.fluid_density_entry.get(), property_box),
+            self.simulation_time_entry.get(), self.time_step_entry.get(), self.gravity_entry.get(), self.fluid_density_entry.get(), property_box,
+            self.cavitation_var.get()),
             bg="#4CAF50", fg="white", font=("Segoe UI", 12), relief="raised", padx=10)
         save_button.pack(side=tk.LEFT, padx=5)
 
@@ -530,7 +559,8 @@ class AiravataSoftware:
                                 bg="#f44336", fg="white", font=("Segoe UI", 12), relief="raised", padx=10)
         cancel_button.pack(side=tk.LEFT, padx=5)
 
-    def save_simulation_properties(self, simulation_time, time_step, gravity, fluid_density, property_box):
+    def save_simulation_properties(self, simulation_time, time_step, gravity, fluid_density, property_box,
+                                   cavitation_model="None"):
         """Save simulation properties."""
         try:
             # Convert values to float and store them (or handle validation if needed)
@@ -539,6 +569,7 @@ class AiravataSoftware:
                 "time_step": float(time_step),
                 "gravity": float(gravity),
                 "fluid_density": float(fluid_density),
+                "cavitation_model": "" if cavitation_model == "None" else cavitation_model,
             }
             # Close the property box after saving
             property_box.destroy()
@@ -553,20 +584,53 @@ class AiravataSoftware:
             messagebox.showerror("Error", "No file is currently open. Please open a file first.")
             return
 
-        run_simulation_and_generate_graphs(self.root, self.current_file_name)
+        from graphs_generator import run_simulation_and_generate_graphs
+        run_simulation_and_generate_graphs(self.root, self.current_file_name, self.console.log)
+
+    def compare_runs_action(self):
+        """Pick recorded runs of the current project and open them side by side."""
+        from run_database import RunDatabase
+        database = RunDatabase()
+        runs = [run for run in database.runs(self.current_file_name or None)
+                if run["history_path"] and os.path.exists(run["history_path"])]
+        database.close()
+        if len(runs) < 2:
+            messagebox.showinfo("Compare Runs", "At least two recorded runs with stored histories are needed.")
+            return
+
+        dialog = Toplevel(self.root)
+        dialog.title("Compare Runs")
+        tk.Label(dialog, text="Select the runs to compare (the first one is the reference):").pack(padx=10, pady=5)
+        listbox = tk.Listbox(dialog, selectmode=tk.MULTIPLE, width=90, height=15)
+        listbox.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+        for run in runs:
+            started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started"]))
+            listbox.insert(tk.END, f"run {run['id']}  {started}  {os.path.basename(run['project_path'] or '')}")
+
+        def compare():
+            from run_comparison import RunComparison, show_comparison
+            selected = [runs[i]["id"] for i in listbox.curselection()]
+            if len(selected) < 2:
+                messagebox.showerror("Error", "Select at least two runs.")
+                return
+            try:
+                comparison = RunComparison.from_database(selected)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            dialog.destroy()
+            show_comparison(self.root, comparison)
+
+        tk.Button(dialog, text="Compare", command=compare).pack(pady=10)
 
     def Hide_label_action(self):
         """Hides the labels of all elements on the whiteboard."""
-        for element in self.whiteboard.elements:
-            if hasattr(element, "label_id") and element.label_id is not None:
-                self.whiteboard.canvas.itemconfig(element.label_id, state="hidden")
+        self.whiteboard.set_labels_visible(False)
         self.console.log("Labels hidden successfully.", level="info")
 
     def Show_label_action(self):
         """Shows the labels of all elements on the whiteboard again."""
-        for element in self.whiteboard.elements:
-            if hasattr(element, "label_id") and element.label_id is not None:
-                self.whiteboard.canvas.itemconfig(element.label_id, state="normal")
+        self.whiteboard.set_labels_visible(True)
         self.console.log("Labels shown successfully.", level="info")
 
     def Run_icon_action(self):
@@ -576,7 +640,8 @@ class AiravataSoftware:
             messagebox.showerror("Error", "No file is currently open. Please open a file first.")
             return
 
-        run_simulation_and_generate_html(self.root, self.current_file_name)
+        from transient_simulation import run_simulation_and_generate_html
+        run_simulation_and_generate_html(self.root, self.current_file_name, self.console.log)
 
     def open_property_box(self, title):
         """Open a property box with the specified title """
@@ -619,6 +684,8 @@ class AiravataSoftware:
         for element in self.whiteboard.elements:
             # Reset the icon, label, and port sizes to their default values
             element.reset_size()
+            self.whiteboard.index_element(element)
+        self.whiteboard.cull()
 
     def enable_whiteboard(self):
         """Enable the whiteboard interactions."""
@@ -724,13 +791,14 @@ class AiravataSoftware:
                 self.whiteboard.is_file_open = True  # Enable the whiteboard
                 self.whiteboard.clear()  # Clear the whiteboard
                 self.update_file_label()  # Update the file label
+                self.start_autosave()
                 self.console.log("New file created successfully.",level="success")
 
     def open_file(self):
         """Open a file and load its content onto the canvas."""
         file_path = filedialog.askopenfilename(
             title="Open File",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
+            filetypes=[("JSON Files", "*.json"), ("Binary Projects", "*.apb"), ("All Files", "*.*")]
         )
 
         if not file_path:
@@ -738,18 +806,29 @@ class AiravataSoftware:
             return
 
         try:
-            # Load elements from the selected file
-            with open(file_path, 'r') as file:
-                elements_data = json.load(file)
+            # Load elements from the selected file, JSON or binary
+            elements_data = load_project_file(file_path)
 
             if not isinstance(elements_data, dict) or 'elements' not in elements_data:
                 raise ValueError("Invalid file structure. Expected a dictionary with an 'elements' key.")
 
+            # Changes autosaved after the last save, e.g. before a crash
+            recovered = recover_autosave(file_path)
+            if recovered is not None:
+                if messagebox.askyesno("Recover Changes",
+                                       f"{os.path.basename(file_path)} has unsaved changes from an earlier session.\n"
+                                       "Restore them?"):
+                    elements_data = recovered
+                else:
+                    discard_autosave(file_path)
+
             # Clear existing elements before loading new one
             self.whiteboard.clear()
 
             # Load elements into the canvas
             self.whiteboard.load_elements(elements_data['elements'])
+            for warning in self.whiteboard.project.warnings:
+                self.console.log(warning, level="warning")
 
             # Check and load simulation properties
             if 'simulation_properties' in elements_data['elements']:
@@ -771,6 +850,7 @@ class AiravataSoftware:
             self.whiteboard.is_file_open = True  # Enable the whiteboard
             self.file_manager.file_path = file_path  # Update the file manager
             self.update_file_label()  # Update the file label
+            self.start_autosave()
             self.console.log(f"Successfully loaded file: {os.path.basename(file_path)}", level="success")
 
             messagebox.showinfo("File Loaded", f"Successfully loaded file: {os.path.basename(file_path)}")
@@ -817,42 +897,70 @@ class AiravataSoftware:
                 "fluid_density": self.fluid_density_var.get()
             }
 
-        if self.current_file_name:
-            # Save both elements and simulation properties to the file
-            data_to_save = {
-                "elements": [element.to_data() for element in self.whiteboard.elements],
-                "simulation_properties": self.simulation_properties,  # Save simulation properties
-            }
-            self.file_manager.save_elements(self.current_file_name, data_to_save)
-            self.console.log(
-                f"File saved successfully: {os.path.basename(self.current_file_name)}",
-                level="success",
-            )
-        else:
+        if not self.current_file_name:
             file_path = filedialog.asksaveasfilename(
                 title="Save File",
                 defaultextension=".json",
-                filetypes=[("JSON Files", "*.json")],
+                filetypes=[("JSON Files", "*.json"), ("Binary Projects", "*.apb")],
             )
+            if not file_path:
+                self.console.log("No file selected for saving.", level="error")
+                return
+            self.file_manager.file_path = file_path
+            self.current_file_name = file_path
+            self.start_autosave()
 
-            if file_path:
-                self.file_manager.file_path = file_path
-                self.current_file_name = file_path
-                data_to_save = {
-                    "elements": [element.to_data() for element in self.whiteboard.elements],
-                    "simulation_properties": self.simulation_properties,  # Save simulation properties
-                }
-                self.file_manager.save_elements(file_path, data_to_save)
-                self.console.log(
-                    f"File saved successfully: {os.path.basename(file_path)}",
-                    level="success",
-                )
+        # Written on the autosave thread, so large projects do not block the UI
+        elements = [element.to_data() for element in self.whiteboard.elements]
+        finished = queue.Queue()
+        self.autosave.save(elements, dict(self.simulation_properties), done=finished.put)
+        self.autosave_state = (self.whiteboard.command_log.version, dict(self.simulation_properties))
+        file_name = os.path.basename(self.current_file_name)
+
+        def poll():
+            try:
+                error = finished.get_nowait()
+            except queue.Empty:
+                self.root.after(SAVE_POLL_MS, poll)
+                return
+            if error:
+                self.console.log(error, level="error")
+                messagebox.showerror("Save Failed", error)
             else:
-                self.console.log("No file selected for saving.", level="error")
+                self.console.log(f"File saved successfully: {file_name}", level="success")
+
+        self.root.after(SAVE_POLL_MS, poll)
+
+    def start_autosave(self):
+        """Start autosaving the current file in the background."""
+        self.stop_autosave()
+        # Console.log is thread-safe, so the autosave thread can report errors directly
+        self.autosave = ProjectAutosave(self.current_file_name,
+                                        on_error=lambda message: self.console.log(message, level="error"))
+        self.autosave_state = (self.whiteboard.command_log.version, dict(self.simulation_properties))
+        self.root.after(AUTOSAVE_INTERVAL * 1000, self.autosave_tick)
+
+    def autosave_tick(self):
+        """Hand the project to the autosave thread if it changed since the last check."""
+        if self.autosave is None:
+            return
+        state = (self.whiteboard.command_log.version, dict(self.simulation_properties))
+        if state != self.autosave_state:
+            self.autosave.update([element.to_data() for element in self.whiteboard.elements],
+                                 dict(self.simulation_properties))
+            self.autosave_state = state
+        self.root.after(AUTOSAVE_INTERVAL * 1000, self.autosave_tick)
+
+    def stop_autosave(self):
+        """Finish pending autosave writes and stop the autosave thread."""
+        if self.autosave is not None:
+            self.autosave.close()
+            self.autosave = None
 
     def terminate_file(self):
         """Terminate the current file."""
         if self.file_open:
+            self.stop_autosave()
             self.file_manager.close_file()  # Clear file-related data
             self.simulation = None
             self.file_saved = False
@@ -863,6 +971,7 @@ class AiravataSoftware:
             self.update_file_label()  # Update the file label
             self.console.log("File terminated successfully.",level="success")
         else:
+            self.stop_autosave()
             self.root.quit()
 
     def clear_screen(self):
@@ -1004,116 +1113,71 @@ class AiravataSoftware:
         self.console.log(f"Element {element.label} highlighted.",level="info")
 
     def monitor_performance(self):
-        cpu_usage = psutil.cpu_percent(interval=1)
-        memory_info = psutil.virtual_memory()
-        disk_info = psutil.disk_usage('/')
-        net_info = psutil.net_io_counters()
-        battery = psutil.sensors_battery()
-        battery_status = "Charging" if battery and battery.power_plugged else "Not Charging"
-        battery_percentage = battery.percent if battery else "N/A"
-        
+        """Show or hide the live performance panel at the side of the whiteboard."""
+        if self.performance_panel is not None:
+            self.performance_panel.close()
+            return
         try:
-            import GPUtil
-            gpus = GPUtil.getGPUs()
-            gpu_usage = ", ".join([f"GPU {gpu.id}: {gpu.memoryUtil * 100:.2f}% used" for gpu in gpus])
+            from performance_monitor import PerformancePanel  # Needs psutil
         except ImportError:
-            gpu_usage = "GPU monitoring not available"
-        
-        processes = [(p.info['pid'], p.info['name'], p.info['cpu_percent']) for p in psutil.process_iter(attrs=['pid', 'name', 'cpu_percent'])]
-        processes = sorted(processes, key=lambda x: x[2], reverse=True)[:5]
-        process_info = "\n".join([f"PID: {pid}, Name: {name}, CPU Usage: {cpu}%" for pid, name, cpu in processes])
-
-        messagebox.showinfo("Performance Monitoring", 
-                            f"CPU Usage: {cpu_usage}%\n"
-                            f"Memory Usage: {memory_info.percent}%\n"
-                            f"Disk Usage: {disk_info.percent}%\n"
-                            f"Network - Sent: {net_info.bytes_sent} bytes, Received: {net_info.bytes_recv} bytes\n"
-                            f"Battery Status: {battery_status} ({battery_percentage}%)\n"
-                            f"GPU Usage: {gpu_usage}\n"
-                            f"Top 5 Processes by CPU Usage:\n{process_info}")
+            messagebox.showerror("Performance Monitoring", "Performance monitoring requires the psutil package.")
+            return
+        self.performance_panel = PerformancePanel(self.root, before=self.whiteboard_frame,
+                                                  on_close=self.performance_panel_closed,
+                                                  on_error=lambda message: self.console.log(message, level="warning"))
+        self.console.log("Performance monitor started.", level="info")
 
-        self.console.log(f"CPU Usage: {cpu_usage}%, Memory Usage: {memory_info.percent}%",level="info")
+    def performance_panel_closed(self):
+        self.performance_panel = None
+        self.console.log("Performance monitor stopped.", level="info")
 
 
 
-# Update the splash screen function to use relative paths as well
-def show_video_splash_screen(root, on_splash_close):
-    # Get the directory where the script is located
+def show_splash_screen(root, on_splash_close):
+    """Show the static splash image while the dashboard is built behind it."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    video_path = os.path.join(script_dir, "Icons", "splash_video.mp4")
-    
-    if not os.path.exists(video_path):
-        print(f"Warning: Splash video not found at {video_path}")
-        # Skip splash screen if video not found
-        on_splash_close(None)
-        return
-    
+    image_path = os.path.join(script_dir, "Icons", "splash_image.png")
+
     splash = Toplevel(root)
     splash.title("Airavata Loading")
-    splash.geometry("800x600")
     splash.overrideredirect(True)
-    
     x = (root.winfo_screenwidth() // 2) - (800 // 2)
     y = (root.winfo_screenheight() // 2) - (600 // 2)
     splash.geometry(f"800x600+{x}+{y}")
 
-    # Open the video file
-    cap = cv2.VideoCapture(video_path)
-
-    # Get video dimensions
-    original_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    original_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    
-    # Calculate scaling factors
-    splash_width = 800
-    splash_height = 600
-
-    # Calculate the scaling factor to fit the splash screen
-    scale_x = splash_width / original_width
-    scale_y = splash_height / original_height
-    scale = max(scale_x, scale_y)
-
-    def update_frame():
-        ret, frame = cap.read()
-        if ret:
-            # Resize frame to fill the splash screen
-            frame = cv2.resize(frame, (int(original_width * scale), int(original_height * scale)))
-
-            # Crop the frame if it exceeds the splash screen dimensions
-            height, width, _ = frame.shape
-            start_x = max(0, (width - splash_width) // 2)
-            start_y = max(0, (height - splash_height) // 2)
-            frame = frame[start_y:start_y + splash_height, start_x:start_x + splash_width]
-
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_image = Image.fromarray(frame)
-            frame_photo = ImageTk.PhotoImage(frame_image)
-            splash_label.config(image=frame_photo)
-            splash_label.image = frame_photo
-            splash_label.after(10, update_frame)
-        else:
-            on_splash_close(splash)
-
-    splash_label = tk.Label(splash)
+    splash_label = tk.Label(splash, text="Airavata\nLoading...", font=("Segoe UI", 24), bg="#333", fg="white")
+    if os.path.exists(image_path):
+        try:
+            with Image.open(image_path) as image:
+                splash_label.image = ImageTk.PhotoImage(image.resize((800, 600), Image.LANCZOS))
+            splash_label.config(image=splash_label.image)
+        except OSError as e:
+            print(f"Warning: Splash image could not be loaded: {e}")
+    else:
+        print(f"Warning: Splash image not found at {image_path}")
     splash_label.pack(fill=tk.BOTH, expand=True)
+    splash.update_idletasks()
+    startup_profile.mark("splash shown")
 
-    root.withdraw()
-    update_frame()
-
-    splash.after(5000, lambda: on_splash_close(splash))
+    # Build the dashboard while the splash is visible, then swap them
+    root.after_idle(lambda: show_dashboard_screen(root))
+    splash.after(SPLASH_TIME, lambda: on_splash_close(splash))
 
 
 # Show the main dashboard after the splash screen
 def show_dashboard_screen(root):
     go_to_main_callback = lambda: show_main_application(root)
     dashboard = Dashboard(root, go_to_main_callback)  # Pass the callback as an argument
+    startup_profile.mark("dashboard built")
 
 # Function that will be triggered when the splash screen is closed
 def on_splash_close(splash):
     splash.destroy()  # Close splash screen
     root.deiconify()  # Show the main window
     root.state("zoomed")  # Maximize the window after the splash screen
-    show_dashboard_screen(root)  # Show the dashboard after splash screen
+    startup_profile.mark("main window shown")
+    if startup_profile.active():
+        root.after_idle(lambda: print(startup_profile.report()))
 
 # Function to show the main application when the button is clicked on the dashboard
 def show_main_application(root):
@@ -1122,12 +1186,14 @@ def show_main_application(root):
     app = AiravataSoftware(root)  # Initialize the main application
 
 if __name__ == "__main__":
+    # python Airavata_software.py [--profile-startup]
+    startup_profile.mark("modules imported")
     root = tk.Tk()
     root.geometry(f"{root.winfo_screenwidth()}x{root.winfo_screenheight()}+0+0")
     root.state("normal")
     root.withdraw()
 
     # Start the splash screen
-    show_video_splash_screen(root, on_splash_close)
+    show_splash_screen(root, on_splash_close)
     
     root.mainloop()
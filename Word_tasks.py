@@ -1,7 +1,9 @@
 import json
 import os
 import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from discretisation import DiscretisationPlan, plan_discretisation
 
 def safe_float(value: Any, default: float = 0.0) -> float:
     """
@@ -56,8 +58,9 @@ def prepare_whamo_detailed_input(input_json_file: str) -> str:
         reservoir_section = generate_reservoir_section(reservoir)
         sections.append(reservoir_section)
     
-    # Conduit Properties
-    conduit_section = generate_conduit_properties(elements)
+    # Conduit Properties, segments and DTCOMP follow the discretisation plan
+    plan = plan_conduits(elements, sim_props)
+    conduit_section = generate_conduit_properties(elements, plan)
     sections.append(conduit_section)
     
     # Surge Tank
@@ -75,7 +78,7 @@ def prepare_whamo_detailed_input(input_json_file: str) -> str:
     sections.append("\nC OUTPUT REQUEST\n" + output_request_section)
     
     # Computational Parameters
-    comp_params_section = generate_computational_parameters(sim_props)
+    comp_params_section = generate_computational_parameters(sim_props, plan)
     sections.append("\nC COMPUTATIONAL PARAMETERS\n" + comp_params_section)
     
     # Execution Control
@@ -174,7 +177,31 @@ def generate_reservoir_section(reservoir: Dict) -> str:
  ELEV {elevation_ft:.2f}
  FINISH"""
 
-def generate_conduit_properties(elements: List[Dict]) -> str:
+def plan_conduits(elements: List[Dict], sim_props: Dict) -> Optional[DiscretisationPlan]:
+    """
+    Build the discretisation plan of all pipes with a usable length and celerity
+
+    Args:
+        elements: Project elements
+        sim_props: Simulation properties (time_step, celerity_tolerance)
+
+    Returns:
+        DiscretisationPlan, or None when no pipe can be planned
+    """
+    conduits = []
+    for pipe in (e for e in elements if e['class'] == 'Pipe'):
+        length = safe_float(pipe.get('length'))
+        celerity = safe_float(pipe.get('celerity'))
+        if length > 0 and celerity > 0:
+            conduits.append({"name": pipe['name'], "length": length, "celerity": celerity})
+    if not conduits:
+        return None
+
+    plan = plan_discretisation(conduits, sim_props)
+    print(plan.report())
+    return plan
+
+def generate_conduit_properties(elements: List[Dict], plan: Optional[DiscretisationPlan] = None) -> str:
     """Generate conduit properties section"""
     conduit_lines = []
     
@@ -188,9 +215,10 @@ def generate_conduit_properties(elements: List[Dict]) -> str:
         diameter = safe_float(pipe.get('diameter', 1)) * 3.281
         celerity = safe_float(pipe.get('celerity', 1000)) * 3.281
         friction = safe_float(pipe.get('manning_n', 0.01), 0.01)
+        numseg = plan.segments(name) if plan else 5
         
         conduit_lines.append(f"""CONDUIT ID {name} LENG {length:.2f} DIAM {diameter:.2f} CELE {celerity:.2f} FRIC {friction:.4f}  
-ADDEDLOSS CPLUS 0.1 CMINUS 0.1 NUMSEG 5 FINISH""")
+ADDEDLOSS CPLUS 0.1 CMINUS 0.1 NUMSEG {numseg} FINISH""")
     
     # Dummy conduits (if needed)
     dummy_conduits = [
@@ -254,13 +282,14 @@ def generate_output_request_section() -> str:
  NODE 54 PRESSURE HEAD
 FINISH"""
 
-def generate_computational_parameters(sim_props: Dict) -> str:
+def generate_computational_parameters(sim_props: Dict, plan: Optional[DiscretisationPlan] = None) -> str:
     """Generate computational parameters section"""
-    time_step = safe_float(sim_props.get('time_step', 0.01), 0.01)
+    time_step = plan.dt if plan else safe_float(sim_props.get('time_step', 0.01), 0.01)
     sim_time = safe_float(sim_props.get('simulation_time', 500.0), 500.0)
+    dtout = safe_float(sim_props.get('dtout', 0.1), 0.1)
     
     return f"""CONTROL
- DTCOMP {time_step} DTOUT .1 TMAX {sim_time}
+ DTCOMP {time_step} DTOUT {dtout:g} TMAX {sim_time}
 FINISH"""
 
 def run_simulation_from_file(input_file_path: str = "input.json"):
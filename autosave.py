@@ -0,0 +1,273 @@
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Seconds between autosave checks of the whiteboard
+AUTOSAVE_INTERVAL = 10
+# Journal entries appended before they are compacted into a snapshot
+COMPACT_ENTRIES = 50
+# Journal size that triggers a compaction regardless of the entry count [bytes]
+COMPACT_BYTES = 4 * 1024 * 1024
+
+
+def atomic_write_json(path: str, data, indent: Optional[int] = 4):
+    """
+    Replace a JSON file atomically
+
+    The data is written to a temporary file in the same directory, flushed
+    to disk and renamed over the target, so a crash leaves either the old or
+    the new file, never a partial one. Each call has its own temporary file,
+    so concurrent writers to one target cannot corrupt each other.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    # mkstemp creates the file private; keep the mode of the file being replaced
+    mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+    descriptor, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(data, file, indent=indent)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself (not possible on Windows)
+        descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+
+def load_project_file(path: str) -> Dict:
+    """Content of a JSON or binary (.apb) project file."""
+    if path.lower().endswith(".apb"):
+        from project_archive import read_project  # numpy-backed, loaded only for binary projects
+        return read_project(path)
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def save_project_file(path: str, content: Dict):
+    """Atomically write a project file, binary when the path ends in .apb."""
+    if path.lower().endswith(".apb"):
+        from project_archive import write_project
+        write_project(path, content)
+    else:
+        atomic_write_json(path, content)
+
+
+def snapshot_path(project_path: str) -> str:
+    """Autosave snapshot of a project file."""
+    return f"{project_path}.autosave"
+
+
+def journal_path(project_path: str) -> str:
+    """Autosave journal of a project file, one JSON delta per line."""
+    return f"{project_path}.journal"
+
+
+def _split(project: Dict):
+    content = project.get("elements", {}) if isinstance(project, dict) else {}
+    if isinstance(content, list):
+        return content, project.get("simulation_properties", {})
+    return content.get("elements", []), content.get("simulation_properties", {})
+
+
+def _read_base(project_path: str) -> Dict:
+    for path in (snapshot_path(project_path), project_path):
+        if os.path.exists(path):
+            try:
+                if path == project_path:
+                    return load_project_file(path)
+                with open(path, 'r') as file:
+                    return json.load(file)
+            except (OSError, ValueError):
+                continue
+    return {}
+
+
+def recover(project_path: str) -> Optional[Dict]:
+    """
+    Project content with the autosaved changes applied
+
+    Starts from the autosave snapshot (or the project file when there is
+    none) and replays the journal. A line cut short by a crash is ignored.
+
+    Returns:
+        Project content in the saved file layout, or None when nothing was
+        autosaved since the last save
+    """
+    snapshot = snapshot_path(project_path)
+    journal = journal_path(project_path)
+    if not os.path.exists(snapshot) and not os.path.exists(journal):
+        return None
+
+    elements, properties = _split(_read_base(project_path))
+    by_name = {element.get("name"): element for element in elements}
+    order = [element.get("name") for element in elements]
+    if os.path.exists(journal):
+        with open(journal, 'r') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Incomplete last entry
+                for name in entry.get("remove", []):
+                    by_name.pop(name, None)
+                for element in entry.get("set", []):
+                    by_name[element.get("name")] = element
+                order = entry.get("order", order)
+                if "simulation_properties" in entry:
+                    properties = entry["simulation_properties"]
+    return {"elements": {"elements": [by_name[name] for name in order if name in by_name],
+                         "simulation_properties": properties}}
+
+
+def discard(project_path: str):
+    """Delete the autosave files of a project."""
+    for path in (snapshot_path(project_path), journal_path(project_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class ProjectAutosave:
+    """
+    Background autosave of one project file.
+
+    The Tk thread hands over the element dicts with `update` and returns at
+    once; a worker thread diffs them against the last saved state by element
+    name and appends only the changed elements to the journal. Tracking
+    starts from the given content, the recovered autosave or the file. Every
+    COMPACT_ENTRIES entries the state is written to the autosave snapshot
+    atomically and the journal is truncated. `save` writes the project file
+    itself atomically on the same thread and removes the autosave files.
+    """
+
+    def __init__(self, project_path: str, project: Optional[Dict] = None,
+                 on_error: Optional[Callable[[str], None]] = None):
+        self.project_path = project_path
+        self.on_error = on_error or print
+        if project is None:
+            # Continue from recovered changes when they were kept
+            project = recover(project_path) or _read_base(project_path)
+        elements, properties = _split(project)
+        self.state = {element.get("name"): element for element in elements}
+        self.order = [element.get("name") for element in elements]
+        self.properties = properties
+        self.entries = 0
+        self.tasks = queue.Queue()
+        self.thread = threading.Thread(target=self._work, name="autosave", daemon=True)
+        self.thread.start()
+
+    def update(self, elements: List[Dict], simulation_properties: Dict):
+        """Queue the current project content for journaling; returns immediately."""
+        self.tasks.put(("update", elements, simulation_properties, None))
+
+    def save(self, elements: List[Dict], simulation_properties: Dict,
+             done: Optional[Callable[[Optional[str]], None]] = None):
+        """
+        Queue an atomic save of the project file
+
+        Args:
+            elements, simulation_properties: Project content
+            done: Called on the worker thread once the save has finished, with
+                None on success or the error message; failures of saves
+                without it go to on_error
+        """
+        self.tasks.put(("save", elements, simulation_properties, done))
+
+    def close(self, timeout: Optional[float] = None):
+        """Finish the queued work and stop the worker thread."""
+        self.tasks.put(None)
+        self.thread.join(timeout)
+
+    def _work(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            kind, elements, properties, done = task
+            try:
+                if kind == "save":
+                    self._save(elements, properties)
+                else:
+                    self._journal(elements, properties)
+            except Exception as e:  # Keep the worker alive, later saves must still run
+                message = f"{'Saving' if kind == 'save' else 'Autosave of'} {os.path.basename(self.project_path)} failed: {e}"
+                if done:
+                    done(message)
+                else:
+                    self.on_error(message)
+            else:
+                if done:
+                    done(None)
+
+    def _journal(self, elements: List[Dict], properties: Dict):
+        state = {element.get("name"): element for element in elements}
+        entry = {"time": time.time()}
+        changed = [element for name, element in state.items() if self.state.get(name) != element]
+        removed = [name for name in self.state if name not in state]
+        order = list(state)
+        if changed:
+            entry["set"] = changed
+        if removed:
+            entry["remove"] = removed
+        if order != self.order:
+            entry["order"] = order
+        if properties != self.properties:
+            entry["simulation_properties"] = properties
+        if len(entry) == 1:
+            return
+
+        journal = journal_path(self.project_path)
+        with open(journal, 'a') as file:
+            file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.state, self.order, self.properties = state, order, properties
+        self.entries += 1
+        if self.entries >= COMPACT_ENTRIES or os.path.getsize(journal) >= COMPACT_BYTES:
+            self._compact()
+
+    def _compact(self):
+        atomic_write_json(snapshot_path(self.project_path), self._content(), indent=None)
+        # The snapshot now holds every journaled change
+        open(journal_path(self.project_path), 'w').close()
+        self.entries = 0
+
+    def _content(self) -> Dict:
+        return {"elements": {"elements": [self.state[name] for name in self.order],
+                             "simulation_properties": self.properties}}
+
+    def _save(self, elements: List[Dict], properties: Dict):
+        state = {element.get("name"): element for element in elements}
+        save_project_file(self.project_path, {"elements": {"elements": list(state.values()),
+                                                           "simulation_properties": properties}})
+        # Only a saved state is the new baseline; after a failure the journal still diffs against the old one
+        self.state, self.order, self.properties = state, list(state), properties
+        discard(self.project_path)
+        self.entries = 0
+
+
+if __name__ == "__main__":
+    # python autosave.py recover <project.json>   writes the recovered project next to it
+    if len(sys.argv) != 3 or sys.argv[1] != "recover":
+        print("Usage: autosave.py recover <project.json>")
+        sys.exit(1)
+    recovered = recover(sys.argv[2])
+    if recovered is None:
+        print("No autosaved changes found.")
+    else:
+        target = os.path.splitext(sys.argv[2])[0] + "_recovered.json"
+        atomic_write_json(target, recovered)
+        print(f"Recovered project written to {target}")
@@ -0,0 +1,103 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def layout_path(path: str) -> str:
+    """JSON file describing the snapshot layout of a checkpoint file."""
+    return os.path.splitext(path)[0] + "_layout.json"
+
+
+class CheckpointWriter:
+    """
+    Writes solver snapshots into a preallocated .npy file.
+
+    Every snapshot is one row of a (snapshots, state size) float64 array, so
+    a reader can memory-map the file and restore any row without loading the
+    others. The field offsets and a signature of the network live in a JSON
+    sidecar written next to it.
+    """
+
+    def __init__(self, path: str, times: List[float], state: Dict[str, np.ndarray], signature: Dict):
+        self.path = path
+        self.times = sorted(float(t) for t in times)
+        self.fields = []
+        offset = 0
+        for name, values in state.items():
+            size = int(np.size(values))
+            self.fields.append({"name": name, "offset": offset, "size": size})
+            offset += size
+
+        self.data = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64,
+                                              shape=(len(self.times), offset))
+        self.written = []
+        self.layout = {"times": self.times, "written": self.written, "fields": self.fields, "signature": signature}
+
+    def write(self, index: int, state: Dict[str, np.ndarray]):
+        """Store the state of snapshot `index` (position in `times`)."""
+        row = self.data[index]
+        for field in self.fields:
+            row[field["offset"]:field["offset"] + field["size"]] = np.ravel(state[field["name"]])
+        self.written.append(self.times[index])
+
+    def close(self):
+        """Flush the snapshots and write the layout sidecar."""
+        self.data.flush()
+        with open(layout_path(self.path), 'w') as file:
+            json.dump(self.layout, file, indent=4)
+        del self.data
+
+
+class CheckpointReader:
+    """Read access to a checkpoint file written by CheckpointWriter."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(layout_path(path), 'r') as file:
+            self.layout = json.load(file)
+        self.times = self.layout["times"]
+        self.written = set(self.layout["written"])
+        self.data = np.load(path, mmap_mode='r')
+
+    def nearest(self, time: float) -> int:
+        """Index of the latest written snapshot at or before `time`."""
+        candidates = [i for i, t in enumerate(self.times) if t in self.written and t <= time + 1e-9]
+        if not candidates:
+            raise ValueError(f"No checkpoint at or before t = {time} s in {self.path}.")
+        return candidates[-1]
+
+    def state(self, index: int) -> Dict[str, np.ndarray]:
+        """Copy of the state stored in snapshot `index`."""
+        row = self.data[index]
+        return {f["name"]: np.array(row[f["offset"]:f["offset"] + f["size"]]) for f in self.layout["fields"]}
+
+    def check_signature(self, signature: Dict):
+        """Raise ValueError when the snapshot was written for a different network."""
+        if json.loads(json.dumps(signature)) != self.layout["signature"]:
+            raise ValueError(f"{self.path} was written for a different network or discretisation.")
+
+
+def restore(solver, path: str, time: Optional[float] = None) -> float:
+    """
+    Load a snapshot into a solver built from the same network.
+
+    The solver may come from a modified project (different valve schedules
+    or governor settings); only its topology and discretisation have to
+    match the run that wrote the checkpoint.
+
+    Args:
+        solver: MOCSolver to restore into
+        path: Checkpoint .npy file
+        time: Restart time [s], the latest snapshot at or before it is used;
+            defaults to the last snapshot
+
+    Returns:
+        Time of the restored snapshot [s]
+    """
+    reader = CheckpointReader(path)
+    reader.check_signature(solver.signature())
+    index = reader.nearest(float("inf") if time is None else time)
+    solver.set_state(reader.state(index))
+    return reader.times[index]
@@ -0,0 +1,214 @@
+import sys
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+# Memory the undo history may use before the oldest commands are dropped [bytes]
+MAX_HISTORY_BYTES = 4 * 1024 * 1024
+
+
+def estimate_size(value) -> int:
+    """Approximate memory of a plain value (numbers, strings, lists, tuples, dicts) [bytes]."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(v) for v in value)
+    return size
+
+
+class Command:
+    """
+    One reversible user action on the whiteboard.
+
+    Commands keep only what the action changed, never a copy of the project.
+    """
+
+    label = "Action"
+
+    def undo(self):
+        raise NotImplementedError
+
+    def redo(self):
+        raise NotImplementedError
+
+    def size(self) -> int:
+        """Approximate memory held by the command [bytes]."""
+        return sys.getsizeof(self)
+
+    def merge(self, other: "Command") -> bool:
+        """Absorb a following command into this one; return False when they cannot be merged."""
+        return False
+
+
+class AddCommand(Command):
+    """An element added to the whiteboard (also used for pipes created by linking)."""
+
+    def __init__(self, whiteboard, element, label: str = "Add"):
+        self.whiteboard = whiteboard
+        self.element = element
+        self.label = f"{label} {element.name}"
+        self._size = sys.getsizeof(self) + estimate_size(element.to_data())
+
+    def undo(self):
+        self.whiteboard.remove_element(self.element)
+
+    def redo(self):
+        self.whiteboard.restore_element(self.element)
+
+    def size(self) -> int:
+        return self._size
+
+
+class DeleteCommand(AddCommand):
+    """An element removed from the whiteboard."""
+
+    def __init__(self, whiteboard, element):
+        super().__init__(whiteboard, element, "Delete")
+
+    def undo(self):
+        super().redo()
+
+    def redo(self):
+        super().undo()
+
+
+class MoveCommand(Command):
+    """
+    An element dragged from one position to another.
+
+    Consecutive motion events of the same drag merge into a single command,
+    which is closed when the mouse button is released.
+    """
+
+    def __init__(self, whiteboard, element, start: Tuple[float, float], end: Tuple[float, float]):
+        self.whiteboard = whiteboard
+        self.element = element
+        self.start = start
+        self.end = end
+        self.closed = False
+        self.label = f"Move {element.name}"
+
+    def undo(self):
+        self.whiteboard.move_element(self.element, *self.start)
+
+    def redo(self):
+        self.whiteboard.move_element(self.element, *self.end)
+
+    def merge(self, other: Command) -> bool:
+        if self.closed or not isinstance(other, MoveCommand) or other.element is not self.element:
+            return False
+        self.end = other.end
+        self.closed = other.closed
+        return True
+
+
+class EditCommand(Command):
+    """Property values of one element changed in its dialog, stored as field -> (old, new)."""
+
+    def __init__(self, whiteboard, element, changes: Dict[str, tuple]):
+        self.whiteboard = whiteboard
+        self.element = element
+        self.changes = changes
+        self.label = f"Edit {element.name}"
+        self._size = sys.getsizeof(self) + estimate_size(changes)
+
+    def undo(self):
+        self.whiteboard.update_element(self.element, {field: old for field, (old, new) in self.changes.items()})
+
+    def redo(self):
+        self.whiteboard.update_element(self.element, {field: new for field, (old, new) in self.changes.items()})
+
+    def size(self) -> int:
+        return self._size
+
+
+def data_changes(before: Dict, after: Dict) -> Dict[str, tuple]:
+    """Fields that differ between two element dicts, as field -> (old, new); position is ignored."""
+    return {field: (before.get(field), value) for field, value in after.items()
+            if field not in ("x", "y") and before.get(field) != value}
+
+
+class CommandLog:
+    """
+    Undo and redo stacks of whiteboard commands.
+
+    The undo history is capped by the estimated memory of its commands; the
+    oldest commands are dropped first. Recording a new command clears the
+    redo stack.
+    """
+
+    def __init__(self, max_bytes: int = MAX_HISTORY_BYTES):
+        self.max_bytes = max_bytes
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.bytes = 0
+        # Set while a command is undone or redone, so the changes it makes are not recorded again
+        self.replaying = False
+        # Incremented on every change to the whiteboard, lets callers such as autosave skip idle checks
+        self.version = 0
+
+    def record(self, command: Command):
+        """Add a performed command to the history."""
+        if self.replaying:
+            return
+        self.version += 1
+        self.redo_stack.clear()
+        if self.undo_stack:
+            last = self.undo_stack[-1]
+            before = last.size()
+            if last.merge(command):
+                self.bytes += last.size() - before
+                return
+        self.undo_stack.append(command)
+        self.bytes += command.size()
+        while self.bytes > self.max_bytes and len(self.undo_stack) > 1:
+            self.bytes -= self.undo_stack.popleft().size()
+
+    def close_move(self):
+        """End the current drag, so the next one becomes a separate command."""
+        if self.undo_stack and isinstance(self.undo_stack[-1], MoveCommand):
+            self.undo_stack[-1].closed = True
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def undo(self) -> Optional[Command]:
+        """Undo the most recent command and return it, or None when there is nothing to undo."""
+        if not self.undo_stack:
+            return None
+        command = self.undo_stack.pop()
+        self.bytes -= command.size()
+        self.version += 1
+        self.replaying = True
+        try:
+            command.undo()
+        finally:
+            self.replaying = False
+        if isinstance(command, MoveCommand):
+            command.closed = True
+        self.redo_stack.append(command)
+        return command
+
+    def redo(self) -> Optional[Command]:
+        """Redo the most recently undone command and return it, or None."""
+        if not self.redo_stack:
+            return None
+        command = self.redo_stack.pop()
+        self.version += 1
+        self.replaying = True
+        try:
+            command.redo()
+        finally:
+            self.replaying = False
+        self.undo_stack.append(command)
+        self.bytes += command.size()
+        return command
+
+    def clear(self):
+        self.version += 1
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.bytes = 0
@@ -2,14 +2,56 @@ import tkinter as tk
 from tkinter import scrolledtext, filedialog
 from datetime import datetime
 import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+from collections import deque
 import tkinter.filedialog as filedialog
 
+# Log entries kept in memory; older ones are spilled to SPILL_PATH
+MAX_LOGS = 50000
+# Lines shown in the console widget
+MAX_DISPLAY_LINES = 5000
+# Milliseconds between two drains of the log queue, and entries drained per pass
+DRAIN_INTERVAL = 40
+DRAIN_BATCH = 2000
+# Rotating on-disk log of entries dropped from memory
+SPILL_PATH = os.path.join(os.path.expanduser("~"), ".airavata", "console.log")
+SPILL_BYTES = 5 * 1024 * 1024
+SPILL_BACKUPS = 3
+
+LEVELS = ("debug", "info", "success", "warning", "error", "critical")
+LINE_PATTERN = re.compile(r"\[(.*?)\] \[([A-Z]+)\] (.*)")
+
+
+def format_entry(entry):
+    """Console line of a (timestamp, level, message) entry."""
+    timestamp, level, message = entry
+    return f"[{timestamp}] [{level.upper()}] {message}"
+
+
 class Console:
+    """
+    Log console of the application.
+
+    `log` may be called from any thread: messages go through a queue that
+    the Tk thread drains in batches. Entries are kept in a bounded ring
+    buffer, with a per-level index used by the filter; entries falling out
+    of memory are written to a rotating log file, and the widget only ever
+    holds the last MAX_DISPLAY_LINES lines.
+    """
+
     def __init__(self, parent):
         # Console frame
         self.frame = tk.Frame(parent, bg="#333")
         self.frame.pack(fill=tk.X, padx=10, pady=5)
-        self.logs = []  # Initialize logs as an empty list
+        self.logs = deque(maxlen=MAX_LOGS)  # (timestamp, level, message), oldest first
+        self.level_logs = {level: deque(maxlen=MAX_LOGS) for level in LEVELS}
+        self.displayed = deque()  # Entries shown in the widget, one per line
+        self.queue = queue.Queue()
+        self.spill_logger = None
 
         # Desired initial console height
         initial_slider_value = 8
@@ -93,6 +135,8 @@ class Console:
         self.load_button = tk.Button(self.toolbar, text="Load Last Session", command=self.load_last_session, bg="#444", fg="white")
         self.load_button.pack(side=tk.LEFT, padx=5)
 
+        self.frame.after(DRAIN_INTERVAL, self.drain)
+
     def toggle_theme(self):
         """Toggle between dark and light themes."""
         current_bg = self.frame.cget("bg")
@@ -164,10 +208,13 @@ class Console:
         file_path = filedialog.askopenfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if file_path:
             with open(file_path, "r") as file:
-                logs = file.read()
-                self.console.config(state="normal")
-                self.console.insert(tk.END, logs)
-                self.console.config(state="disabled")
+                for line in file:
+                    # Lines written by export_logs keep their time and level
+                    match = LINE_PATTERN.fullmatch(line.rstrip("\n"))
+                    if match and match.group(2).lower() in LEVELS:
+                        self.queue.put((match.group(1), match.group(2).lower(), match.group(3)))
+                    elif line.strip():
+                        self.queue.put((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "info", line.rstrip("\n")))
             self.log("Logs loaded successfully.", level="success")
 
     def send_message(self):
@@ -179,61 +226,112 @@ class Console:
             self.message_input.delete(0, tk.END)  # Clear the input field
 
     def log(self, message, level="info"):
-        """Logs a message with a specified level."""
-        self.console.config(state="normal")
+        """Logs a message with a specified level; safe to call from any thread."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        formatted_message = f"[{timestamp}] [{level.upper()}] {message}\n"
-        self.console.insert(tk.END, formatted_message, level)
-        self.console.yview(tk.END)
+        level = level.lower() if level.lower() in LEVELS else "info"
+        # One entry per line, so multi-line output such as WHAMO's can be filtered and searched by line
+        for line in str(message).splitlines() or [""]:
+            self.queue.put((timestamp, level, line))
+
+    def drain(self):
+        """Move queued log entries into the buffer and the widget, on the Tk thread."""
+        batch = []
+        try:
+            while len(batch) < DRAIN_BATCH:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if batch:
+            spilled = []
+            for entry in batch:
+                if len(self.logs) == MAX_LOGS:
+                    spilled.append(self.logs[0])
+                self.logs.append(entry)
+                self.level_logs[entry[1]].append(entry)
+            if spilled:
+                self.spill(spilled)
+
+            level = self.log_level.get().lower()
+            self.show([entry for entry in batch if level == "all" or entry[1] == level])
+
+        self.frame.after(DRAIN_INTERVAL if self.queue.empty() else 1, self.drain)
+
+    def show(self, entries):
+        """Append entries to the widget in one insert and drop the lines above MAX_DISPLAY_LINES."""
+        entries = entries[-MAX_DISPLAY_LINES:]
+        if not entries:
+            return
+        arguments = []
+        for entry in entries:
+            arguments += [format_entry(entry) + "\n", entry[1]]
+        self.console.config(state="normal")
+        self.console.insert(tk.END, *arguments)
+        self.displayed.extend(entries)
+        excess = len(self.displayed) - MAX_DISPLAY_LINES
+        if excess > 0:
+            self.console.delete("1.0", f"{excess + 1}.0")
+            for _ in range(excess):
+                self.displayed.popleft()
         self.console.config(state="disabled")
-        
-        # Store the log message in self.logs
-        self.logs.append((timestamp, level, message))
+        self.console.yview(tk.END)
+
+    def spill(self, entries):
+        """Append entries dropped from memory to the rotating log file."""
+        if self.spill_logger is None:
+            try:
+                os.makedirs(os.path.dirname(SPILL_PATH), exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(SPILL_PATH, maxBytes=SPILL_BYTES,
+                                                               backupCount=SPILL_BACKUPS, encoding="utf-8")
+            except OSError as e:
+                print(f"Console log file unavailable: {e}")
+                self.spill_logger = False
+                return
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.spill_logger = logging.getLogger("airavata.console")
+            self.spill_logger.propagate = False
+            self.spill_logger.setLevel(logging.INFO)
+            self.spill_logger.addHandler(handler)
+        if self.spill_logger:
+            for entry in entries:
+                self.spill_logger.info(format_entry(entry))
 
     def clear(self):
         """Clears the console."""
         self.console.config(state="normal")
         self.console.delete(1.0, tk.END)
         self.console.config(state="disabled")
+        self.displayed.clear()
 
     def export_logs(self):
-        """Exports console logs to a file."""
+        """Exports the console logs kept in memory to a file."""
         file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if file_path:
             with open(file_path, "w") as file:
-                logs = self.console.get("1.0", tk.END).strip()
-                file.write(logs)
+                file.write("\n".join(format_entry(entry) for entry in self.logs))
             self.log("Logs exported successfully.", level="success")
 
     def apply_filter(self, event=None):
         """Applies a filter to show only selected log levels."""
         level = self.log_level.get().lower()
-        self.console.config(state="normal")
-        self.console.delete(1.0, tk.END)
-
-        for line in self.logs:
-            timestamp, log_level, message = line
-            if level == "all" or log_level == level:
-                tag = log_level
-                formatted_message = f"[{timestamp}] [{log_level.upper()}] {message}\n"
-                self.console.insert(tk.END, formatted_message, tag)
-
-        self.console.config(state="disabled")
-        self.console.yview(tk.END)
+        entries = self.logs if level == "all" else self.level_logs.get(level, ())
+        # Only the last lines of the level's index are rendered
+        count = min(len(entries), MAX_DISPLAY_LINES)
+        self.clear()
+        self.show([entries[i] for i in range(len(entries) - count, len(entries))])
 
     def search(self, event=None):
-        """Searches the console logs for a query."""
+        """Highlights a query in the displayed lines and reports matches in the whole buffer."""
         query = self.search_entry.get().strip().lower()
+        self.console.tag_remove("highlight", "1.0", tk.END)
         if query:
-            self.console.tag_remove("highlight", "1.0", tk.END)
-            start_pos = "1.0"
-            while True:
-                start_pos = self.console.search(query, start_pos, stopindex=tk.END, nocase=True)
-                if not start_pos:
-                    break
-                end_pos = f"{start_pos}+{len(query)}c"
-                self.console.tag_add("highlight", start_pos, end_pos)
-                start_pos = end_pos
+            for line, entry in enumerate(self.displayed, start=1):
+                text = format_entry(entry).lower()
+                start = text.find(query)
+                while start >= 0:
+                    self.console.tag_add("highlight", f"{line}.{start}", f"{line}.{start + len(query)}")
+                    start = text.find(query, start + len(query))
             self.console.tag_config("highlight", background="yellow", foreground="black")
-
-
+            self.console.see("highlight.first" if self.console.tag_ranges("highlight") else tk.END)
+            total = sum(query in entry[2].lower() for entry in self.logs)
+            self.log(f"Search '{query}': {total} matching lines in memory.", level="debug")
@@ -141,7 +141,11 @@ import tkinter as tk
 from tkinter import messagebox, ttk
 from PIL import Image, ImageTk
 import os
+import sqlite3
 import sys
+import time
+
+from run_database import RunDatabase
 
 
 class Dashboard:
@@ -246,8 +250,8 @@ class Dashboard:
         project_frame = tk.Frame(scroll_canvas, bg="#ecf0f1")
         scroll_canvas.create_window((0, 0), window=project_frame, anchor="nw")
 
-        # Add project cards
-        projects = [
+        # Add project cards, from the run database when it has any runs
+        projects = self.recorded_projects() or [
             {"name": "Project A", "description": "AI-powered analytics system.", "status": "In Progress"},
             {"name": "Project B", "description": "Cloud-based backup solution.", "status": "Completed"},
             {"name": "Project C", "description": "Mobile app for task tracking.", "status": "On Hold"},
@@ -261,6 +265,26 @@ class Dashboard:
         project_frame.update_idletasks()
         scroll_canvas.config(scrollregion=scroll_canvas.bbox("all"))
 
+    def recorded_projects(self):
+        """Project cards for the recently simulated projects in the run database."""
+        try:
+            database = RunDatabase()
+            summaries = database.project_summaries()
+            database.close()
+        except sqlite3.Error as e:
+            print(f"Run database not available: {e}")
+            return []
+
+        projects = []
+        for summary in summaries:
+            last_run = time.strftime("%Y-%m-%d %H:%M", time.localtime(summary["started"]))
+            description = f"{summary['project_path']}\nLast run {last_run}"
+            if summary["peak_channel"]:
+                description += f", peak head {summary['peak_head']:.2f} m at {summary['peak_channel'][:-len('.HEAD')]}"
+            projects.append({"name": os.path.splitext(os.path.basename(summary["project_path"]))[0],
+                             "description": description, "status": f"{summary['runs']} run(s)"})
+        return projects
+
     def add_project_card(self, parent, project):
         card_frame = tk.Frame(parent, bg="#ffffff", relief=tk.RAISED, bd=2)
         card_frame.pack(pady=10, padx=20, fill=tk.X)
@@ -0,0 +1,142 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Largest relative wave speed change accepted to hold Courant = 1
+DEFAULT_CELERITY_TOLERANCE = 0.1
+
+# Finest subdivision of the shortest conduit considered when searching for a time step
+MAX_SHORTEST_SEGMENTS = 200
+
+
+def max_stable_time_step(conduits: List[Dict]) -> float:
+    """
+    Largest time step the method of characteristics can use (one reach in the
+    shortest conduit travel time)
+
+    Args:
+        conduits: Dicts with numeric `length` [m] and `celerity` [m/s]
+
+    Returns:
+        Time step [s]
+    """
+    return min(c["length"] / c["celerity"] for c in conduits)
+
+
+def suggest_time_step(conduits: List[Dict], tolerance: float = DEFAULT_CELERITY_TOLERANCE,
+                      dt_max: Optional[float] = None) -> float:
+    """
+    Largest time step, not above dt_max, at which every conduit reaches
+    Courant = 1 with a wave speed change within the tolerance.
+
+    Candidates divide the shortest conduit into 1, 2, ... reaches and are
+    checked for all conduits at once.
+
+    Args:
+        conduits: Dicts with numeric `length` [m] and `celerity` [m/s]
+        tolerance: Accepted relative celerity change
+        dt_max: Upper limit for the time step [s]
+
+    Returns:
+        Time step [s]; the finest candidate if none satisfies the tolerance
+    """
+    lengths = np.array([c["length"] for c in conduits], dtype=float)[:, None]
+    celerity = np.array([c["celerity"] for c in conduits], dtype=float)[:, None]
+    candidates = (lengths / celerity).min() / np.arange(1, MAX_SHORTEST_SEGMENTS + 1)
+    if dt_max:
+        allowed = candidates <= dt_max * (1.0 + 1e-9)
+        candidates = candidates[allowed] if allowed.any() else candidates[-1:]
+
+    segments = np.maximum(np.round(lengths / (celerity * candidates)), 1.0)
+    error = np.abs(lengths / (segments * candidates) - celerity) / celerity
+    feasible = (error <= tolerance).all(axis=0)
+    return float(candidates[feasible][0] if feasible.any() else candidates[-1])
+
+
+class DiscretisationPlan:
+    """
+    Segment counts and adjusted wave speeds of all conduits for one time step.
+
+    `conduits` maps each conduit name to a dict with `segments`,
+    `celerity_adjusted`, `celerity_error` (relative change introduced to hold
+    Courant = 1) and `courant` (Courant number the unadjusted celerity would
+    give on that mesh, the interpolation a fixed wave speed would need).
+    """
+
+    def __init__(self, conduits: List[Dict], dt: float, tolerance: float = DEFAULT_CELERITY_TOLERANCE):
+        self.requested_dt = dt
+        self.tolerance = tolerance
+        self.max_stable_dt = max_stable_time_step(conduits)
+        self.suggested_dt = suggest_time_step(conduits, tolerance)
+
+        self.within_tolerance = self._errors(conduits, dt).max() <= tolerance
+        # Fall back to the largest acceptable step below the requested one
+        self.dt = dt if self.within_tolerance else suggest_time_step(conduits, tolerance, dt_max=dt)
+        errors = self._errors(conduits, self.dt)
+
+        self.conduits = {}
+        for conduit, error in zip(conduits, errors):
+            segments = self.segment_count(conduit, self.dt)
+            self.conduits[conduit["name"]] = {
+                "segments": segments,
+                "celerity": conduit["celerity"],
+                "celerity_adjusted": conduit["length"] / (segments * self.dt),
+                "celerity_error": float(error),
+                "courant": conduit["celerity"] * self.dt * segments / conduit["length"],
+            }
+
+    @staticmethod
+    def segment_count(conduit: Dict, dt: float) -> int:
+        """Number of reaches closest to Courant = 1 for a conduit."""
+        return max(1, int(round(conduit["length"] / (conduit["celerity"] * dt))))
+
+    def _errors(self, conduits: List[Dict], dt: float) -> np.ndarray:
+        lengths = np.array([c["length"] for c in conduits], dtype=float)
+        celerity = np.array([c["celerity"] for c in conduits], dtype=float)
+        segments = np.maximum(np.round(lengths / (celerity * dt)), 1.0)
+        return np.abs(lengths / (segments * dt) - celerity) / celerity
+
+    def segments(self, name: str, default: int = 5) -> int:
+        """Segment count of a conduit, or default for conduits outside the plan."""
+        return self.conduits[name]["segments"] if name in self.conduits else default
+
+    def report(self) -> str:
+        """Readable summary of the plan for the console."""
+        lines = [f"Time step {self.dt:g} s (requested {self.requested_dt:g} s, "
+                 f"largest stable {self.max_stable_dt:g} s, suggested {self.suggested_dt:g} s)"]
+        if not self.within_tolerance:
+            lines.append(f"Requested time step needs wave speed changes above {self.tolerance:.0%}, "
+                         f"using {self.dt:g} s instead.")
+        elif self.suggested_dt > self.dt * 1.5:
+            lines.append(f"A time step of {self.suggested_dt:g} s would hold the tolerance with fewer segments.")
+        for name, conduit in self.conduits.items():
+            lines.append(f"  {name}: {conduit['segments']} segments, celerity {conduit['celerity']:g} -> "
+                         f"{conduit['celerity_adjusted']:.1f} m/s ({conduit['celerity_error']:.1%}), "
+                         f"Courant {conduit['courant']:.3f}")
+        return "\n".join(lines)
+
+
+def plan_discretisation(conduits: List[Dict], simulation_properties: Optional[Dict] = None,
+                        dt: Optional[float] = None) -> DiscretisationPlan:
+    """
+    Build the discretisation plan for a set of conduits
+
+    Args:
+        conduits: Dicts with `name` and numeric `length` [m] and `celerity` [m/s]
+        simulation_properties: Project simulation properties (time_step, celerity_tolerance)
+        dt: Optional time step overriding simulation_properties [s]
+
+    Returns:
+        DiscretisationPlan
+    """
+    props = simulation_properties or {}
+    try:
+        tolerance = float(props.get("celerity_tolerance", DEFAULT_CELERITY_TOLERANCE))
+    except (TypeError, ValueError):
+        tolerance = DEFAULT_CELERITY_TOLERANCE
+    if dt is None:
+        try:
+            dt = float(props.get("time_step", 0.01)) or 0.01
+        except (TypeError, ValueError):
+            dt = 0.01
+    return DiscretisationPlan(conduits, dt, tolerance)
@@ -0,0 +1,404 @@
+import base64
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+import zlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from autosave import atomic_write_json
+from moc_solver import run_batch
+from scenario_runner import ScenarioRunner
+
+DEFAULT_PORT = 8765
+# The broker accepts job payloads without authentication: local only unless asked otherwise
+DEFAULT_HOST = "127.0.0.1"
+
+
+def pack_bundle(envelope: Dict[str, tuple]) -> str:
+    """Compress an envelope for transport."""
+    text = json.dumps({k: [float(x) for x in v] for k, v in envelope.items()})
+    return base64.b64encode(zlib.compress(text.encode("utf-8"))).decode("ascii")
+
+
+def unpack_bundle(bundle: str) -> Dict[str, tuple]:
+    """Inverse of pack_bundle."""
+    text = zlib.decompress(base64.b64decode(bundle)).decode("utf-8")
+    return {k: tuple(v) for k, v in json.loads(text).items()}
+
+
+def post(url: str, path: str, payload: Dict, timeout: float = 30.0) -> Dict:
+    """
+    POST a JSON payload to the broker
+
+    Args:
+        url: Broker base URL, e.g. http://host:8765
+        path: Endpoint, e.g. /lease
+        payload: JSON-serialisable request body
+        timeout: Socket timeout [s]
+
+    Returns:
+        Decoded JSON reply
+    """
+    request = urllib.request.Request(url.rstrip("/") + path, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+class SweepBroker:
+    """
+    Work queue for sweep jobs served over HTTP.
+
+    Jobs are solver configurations keyed by their content hash
+    (scenario_runner.scenario_key), so submitting a scenario that is queued,
+    running or already finished adds nothing. Workers lease jobs and must
+    heartbeat; leases that miss `lease_timeout` go back to the queue, and
+    failed jobs are retried up to `max_retries` times. Finished envelopes are
+    kept compressed and, with `cache_dir`, written in the ScenarioRunner cache
+    format so local runners share them.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, lease_timeout: float = 60.0, max_retries: int = 2):
+        self.cache_dir = cache_dir
+        self.lease_timeout = lease_timeout
+        self.max_retries = max_retries
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.queue = deque()
+        self.leases = {}
+        self.attempts = {}
+        self.results = {}
+        self.failed = {}
+        self.workers = {}
+        self.server = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _cached(self, key: str) -> Optional[str]:
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r') as file:
+                        return pack_bundle(json.load(file))
+                except (OSError, ValueError) as e:
+                    print(f"Ignoring cache entry {os.path.basename(path)}: {e}")
+        return None
+
+    def _requeue_expired(self, now: float):
+        for key, (worker, deadline) in list(self.leases.items()):
+            if deadline < now:
+                print(f"Lease of job {key[:12]} by {worker} expired, requeueing")
+                del self.leases[key]
+                self._retry(key, f"worker {worker} stopped heartbeating")
+
+    def _retry(self, key: str, error: str):
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        if self.attempts[key] > self.max_retries:
+            self.failed[key] = error
+            self.jobs.pop(key, None)
+        else:
+            self.queue.append(key)
+
+    def submit(self, jobs: Dict[str, Dict]) -> int:
+        """Queue jobs by key, skipping known ones. Returns the number queued."""
+        queued = 0
+        with self.lock:
+            for key, job in jobs.items():
+                if key in self.results or key in self.jobs:
+                    continue
+                bundle = self._cached(key)
+                if bundle is not None:
+                    self.results[key] = bundle
+                    continue
+                self.failed.pop(key, None)
+                self.attempts.pop(key, None)
+                self.jobs[key] = job
+                self.queue.append(key)
+                queued += 1
+        return queued
+
+    def lease(self, worker: str, count: int = 1) -> Dict[str, Dict]:
+        """Hand up to `count` queued jobs to a worker."""
+        now = time.time()
+        with self.lock:
+            self.workers[worker] = now
+            self._requeue_expired(now)
+            leased = {}
+            while self.queue and len(leased) < count:
+                key = self.queue.popleft()
+                if key in self.jobs and key not in self.results:
+                    self.leases[key] = (worker, now + self.lease_timeout)
+                    leased[key] = self.jobs[key]
+            return leased
+
+    def heartbeat(self, worker: str, keys: List[str]):
+        """Extend the leases a worker still holds."""
+        now = time.time()
+        with self.lock:
+            self.workers[worker] = now
+            for key in keys:
+                if self.leases.get(key, (None,))[0] == worker:
+                    self.leases[key] = (worker, now + self.lease_timeout)
+
+    def complete(self, worker: str, results: Dict[str, str]):
+        """Store compressed result bundles pushed by a worker."""
+        if self.cache_dir:
+            # File I/O outside the lock, so leases and failures are not held up by it
+            for key, bundle in results.items():
+                envelope = unpack_bundle(bundle)
+                atomic_write_json(os.path.join(self.cache_dir, f"{key}.json"),
+                                  {k: list(v) for k, v in envelope.items()}, indent=None)
+        with self.lock:
+            self.workers[worker] = time.time()
+            for key, bundle in results.items():
+                self.leases.pop(key, None)
+                self.jobs.pop(key, None)
+                self.results[key] = bundle
+
+    def fail(self, worker: str, keys: List[str], error: str):
+        """Record a failed attempt; the jobs are retried or given up."""
+        with self.lock:
+            print(f"Worker {worker} failed {len(keys)} job(s): {error}")
+            for key in keys:
+                if self.leases.pop(key, None) is not None:
+                    self._retry(key, error)
+
+    def collect(self, keys: List[str]) -> Dict:
+        """Finished bundles and failures among the given keys."""
+        with self.lock:
+            self._requeue_expired(time.time())
+            return {
+                "results": {k: self.results[k] for k in keys if k in self.results},
+                "failed": {k: self.failed[k] for k in keys if k in self.failed},
+            }
+
+    def status(self) -> Dict:
+        """Queue counters and last contact time per worker."""
+        with self.lock:
+            return {"queued": len(self.queue), "leased": len(self.leases), "done": len(self.results),
+                    "failed": len(self.failed), "workers": dict(self.workers)}
+
+    def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, background: bool = True) -> str:
+        """
+        Start the HTTP endpoint
+
+        Args:
+            host: Interface to bind; the loopback interface by default. Binding
+                others (e.g. "0.0.0.0" for remote workers) exposes an
+                unauthenticated endpoint, only do it on a trusted network
+            port: TCP port, 0 for any free port
+            background: Serve from a daemon thread instead of blocking
+
+        Returns:
+            Base URL of the broker
+        """
+        broker = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, payload: Dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/status":
+                    self._reply(broker.status())
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/submit":
+                    self._reply({"queued": broker.submit(request["jobs"])})
+                elif self.path == "/lease":
+                    self._reply({"jobs": broker.lease(request["worker"], request.get("count", 1))})
+                elif self.path == "/heartbeat":
+                    broker.heartbeat(request["worker"], request["keys"])
+                    self._reply({})
+                elif self.path == "/result":
+                    broker.complete(request["worker"], request["results"])
+                    self._reply({})
+                elif self.path == "/fail":
+                    broker.fail(request["worker"], request["keys"], request.get("error", ""))
+                    self._reply({})
+                elif self.path == "/collect":
+                    self._reply(broker.collect(request["keys"]))
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        if host not in (DEFAULT_HOST, "localhost", "::1"):
+            print(f"Warning: the sweep broker on {host} accepts jobs from any host that can reach it")
+        url = f"http://{'127.0.0.1' if host in ('0.0.0.0', '') else host}:{self.server.server_address[1]}"
+        if background:
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        else:
+            print(f"Sweep broker listening on {url}")
+            self.server.serve_forever()
+        return url
+
+    def shutdown(self):
+        """Stop the HTTP endpoint."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class SweepWorker:
+    """
+    Pulls jobs from a broker, runs them through the batched solver and
+    pushes the compressed envelopes back, heartbeating while it works.
+    """
+
+    def __init__(self, url: str, name: Optional[str] = None, batch_size: int = 8,
+                 heartbeat_interval: float = 10.0, poll_interval: float = 2.0):
+        self.url = url
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+
+    def _heartbeat(self, keys: List[str], done: threading.Event):
+        while not done.wait(self.heartbeat_interval):
+            try:
+                post(self.url, "/heartbeat", {"worker": self.name, "keys": keys})
+            except OSError as e:
+                print(f"Heartbeat to {self.url} failed: {e}")
+
+    def _run(self, jobs: Dict[str, Dict]):
+        # Jobs sharing simulation properties and length run as one batch
+        groups = {}
+        for key, job in jobs.items():
+            signature = json.dumps([job["simulation_properties"], job.get("t_max")], sort_keys=True)
+            groups.setdefault(signature, []).append(key)
+
+        for keys in groups.values():
+            first = jobs[keys[0]]
+            try:
+                envelopes = run_batch([jobs[k]["elements"] for k in keys], first["simulation_properties"],
+                                      first.get("t_max"))
+            except Exception as e:  # Any solver error is the job's failure, the worker goes on
+                if len(keys) > 1:
+                    # Isolate the failing job instead of failing the whole group
+                    for key in keys:
+                        self._run({key: jobs[key]})
+                else:
+                    post(self.url, "/fail", {"worker": self.name, "keys": keys,
+                                             "error": f"{type(e).__name__}: {e}"})
+                continue
+            post(self.url, "/result", {"worker": self.name,
+                                       "results": {k: pack_bundle(e) for k, e in zip(keys, envelopes)}})
+
+    def run_once(self) -> int:
+        """Lease and run one batch of jobs. Returns the number of jobs run."""
+        jobs = post(self.url, "/lease", {"worker": self.name, "count": self.batch_size})["jobs"]
+        if not jobs:
+            return 0
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(list(jobs), done), daemon=True).start()
+        try:
+            self._run(jobs)
+        finally:
+            done.set()
+        return len(jobs)
+
+    def run_forever(self, idle_exit: Optional[float] = None):
+        """
+        Keep pulling jobs
+
+        Args:
+            idle_exit: Stop after this many seconds without work, never if None
+        """
+        idle_since = time.time()
+        while True:
+            try:
+                count = self.run_once()
+            except OSError as e:
+                print(f"Broker {self.url} unreachable: {e}")
+                count = 0
+            if count:
+                idle_since = time.time()
+                continue
+            if idle_exit is not None and time.time() - idle_since > idle_exit:
+                return
+            time.sleep(self.poll_interval)
+
+
+def _worker_process(url: str, batch_size: int, idle_exit: Optional[float]):
+    SweepWorker(url, batch_size=batch_size).run_forever(idle_exit)
+
+
+def start_workers(url: str, processes: int = 1, batch_size: int = 8,
+                  idle_exit: Optional[float] = None) -> List[multiprocessing.Process]:
+    """Start local worker processes pulling from `url`."""
+    workers = [multiprocessing.Process(target=_worker_process, args=(url, batch_size, idle_exit), daemon=True)
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+class DistributedRunner(ScenarioRunner):
+    """
+    ScenarioRunner that executes uncached scenarios on broker workers instead
+    of local processes. The local content-addressed cache is consulted first,
+    and the broker deduplicates again across all submitters.
+    """
+
+    def __init__(self, url: str, simulation_properties: Dict, t_max: Optional[float] = None,
+                 cache_dir: Optional[str] = None, poll_interval: float = 1.0, timeout: Optional[float] = None):
+        super().__init__(simulation_properties, t_max, cache_dir=cache_dir)
+        self.url = url
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def _execute(self, pending: Dict[str, List[Dict]]):
+        if not pending:
+            return
+        jobs = {key: {"elements": elements, "simulation_properties": self.simulation_properties,
+                      "t_max": self.t_max} for key, elements in pending.items()}
+        post(self.url, "/submit", {"jobs": jobs})
+
+        remaining = list(pending)
+        started = time.time()
+        while remaining:
+            reply = post(self.url, "/collect", {"keys": remaining})
+            if reply["failed"]:
+                raise ValueError(f"{len(reply['failed'])} scenario(s) failed: {next(iter(reply['failed'].values()))}")
+            for key, bundle in reply["results"].items():
+                self._store(key, unpack_bundle(bundle))
+            remaining = [k for k in remaining if k not in reply["results"]]
+            if remaining:
+                if self.timeout is not None and time.time() - started > self.timeout:
+                    raise TimeoutError(f"{len(remaining)} scenario(s) not finished after {self.timeout} s")
+                time.sleep(self.poll_interval)
+
+
+if __name__ == "__main__":
+    # python distributed_sweep.py broker [port] [cache_dir] [host]   (host 0.0.0.0 to accept remote workers)
+    # python distributed_sweep.py worker <broker url> [processes]
+    mode = sys.argv[1] if len(sys.argv) > 1 else "broker"
+    if mode == "broker":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+        cache = sys.argv[3] if len(sys.argv) > 3 and sys.argv[3] != "-" else None
+        host = sys.argv[4] if len(sys.argv) > 4 else DEFAULT_HOST
+        SweepBroker(cache).serve(host, port=port, background=False)
+    else:
+        processes = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+        for process in start_workers(sys.argv[2], processes):
+            process.join()
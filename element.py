@@ -3,10 +3,17 @@ from tkinter import ttk
 from PIL import Image, ImageTk  # To load and resize images for icons
 import os
 import json  # Add this import statement
+from icon_cache import get_icon, quantise_zoom
+from command_log import AddCommand
 from tkinter import messagebox
 import tkinter.filedialog as filedialog
 # other imports...
 
+# Size limits of an element icon when zooming [px]
+MIN_ICON_SIZE = 20
+MAX_ICON_SIZE = 300
+
+
 class Element:
     def __init__(self, canvas, name, icon_path):
         self.canvas = canvas
@@ -31,33 +38,22 @@ class Element:
         self.original_height = 70  # Default original height
         self.original_button_size = 2  # Default button size (inlet/outlet buttons)
         self.original_font_size = 12  # Default label font size
+        self.zoom = 1.0  # Zoom of the icon relative to its original size
+        # Whether each canvas item should show; culled elements keep them hidden until back in view
+        self.shown = {"icon": True, "label": True, "inlet": True, "outlet": True, "rect": False, "highlight": False}
+        self.culled = False
 
     def scale(self, scale_factor):
         """Scale the element size and adjust associated ports, label, and icon while keeping the icon fixed in place."""
-        
-        # Get the current bounding box of the icon
-        current_bbox = self.canvas.bbox(self.icon_item)
-        if current_bbox:
-            # Calculate new dimensions based on scale_factor
-            original_width = current_bbox[2] - current_bbox[0]
-            original_height = current_bbox[3] - current_bbox[1]
-
-            # Apply scale factor to both width and height
-            new_width = int(original_width * scale_factor)
-            new_height = int(original_height * scale_factor)
-
-            # Set minimum and maximum size limits
-            min_size = 20  # Minimum size for the icon (both width and height)
-            max_size = 300  # Maximum size for the icon (both width and height)
-
-            # Ensure the new size is within the bounds
-            new_width = max(min_size, min(new_width, max_size))
-            new_height = max(min_size, min(new_height, max_size))
-
-            # Resize the icon image proportionally
-            img = Image.open(self.icon_path)
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            self.icon = ImageTk.PhotoImage(img)
+        # Track the zoom continuously, stopping once the icon hits a size limit
+        self.zoom = min(max(self.zoom * scale_factor, MIN_ICON_SIZE / max(self.original_width, self.original_height)),
+                        MAX_ICON_SIZE / min(self.original_width, self.original_height))
+
+        # Elements not drawn yet only keep the zoom; hidden (culled) ones are resized like the others
+        if self.icon_item:
+            new_width, new_height = self.icon_size()
+
+            self.icon = get_icon(self.icon_path, new_width, new_height)
             self.canvas.itemconfig(self.icon_item, image=self.icon)
 
             # Keep the icon's center position fixed, without moving it
@@ -98,14 +94,15 @@ class Element:
     def create(self): 
         """Create the element on the canvas.""" 
         # Load and resize the icon 
-        icon_width, icon_height = self.original_width, self.original_height  # Use original size here
-        img = Image.open(self.icon_path) 
-        img = img.resize((icon_width, icon_height), Image.LANCZOS)  # Resize the icon to fit the element 
-        self.icon = ImageTk.PhotoImage(img) 
+        # Original size, or the current zoom for elements drawn after zooming
+        icon_width, icon_height = self.icon_size()
+        self.icon = get_icon(self.icon_path, icon_width, icon_height)
+        self.culled = False
 
         # Create the element icon on the canvas 
         self.icon_item = self.canvas.create_image(self.x + icon_width // 2, self.y + icon_height // 2, image=self.icon) 
-        self.label_id = self.canvas.create_text(self.x + icon_width // 2, self.y - 10, text=self.label, fill="black") 
+        self.label_id = self.canvas.create_text(self.x + icon_width // 2, self.y - 10, text=self.label, fill="black",
+                                                state="normal" if self.shown["label"] else "hidden")
 
         # Create inlet and outlet buttons
         button_size = self.original_button_size  # Use the original button size
@@ -129,9 +126,10 @@ class Element:
     def reset_size(self):
         """Reset the element size, label, and ports to their original size."""
         # Reset icon size using the original dimensions
-        img = Image.open(self.icon_path)
-        img = img.resize((self.original_width, self.original_height), Image.Resampling.LANCZOS)
-        self.icon = ImageTk.PhotoImage(img)
+        self.zoom = 1.0
+        if not self.icon_item:
+            return  # Not drawn yet, it will be drawn at the original size
+        self.icon = get_icon(self.icon_path, self.original_width, self.original_height)
         self.canvas.itemconfig(self.icon_item, image=self.icon)
 
         # Reset the position of the icon (keep it centered at the same place)
@@ -209,7 +207,8 @@ class Element:
             pipe.create()
 
             # Track the pipe as part of the elements
-            whiteboard.elements.append(pipe)
+            whiteboard.register_element(pipe)
+            whiteboard.command_log.record(AddCommand(whiteboard, pipe, "Link"))
 
             print(f"Pipe created between {outlet_element.name} and {inlet_element.name}")
         else:
@@ -230,12 +229,12 @@ class Element:
                 self.x + 100, self.y + 100,
                 outline="blue", width=2
             )
-        self.canvas.itemconfig(self.highlight_rect, state="normal")
+        self.show_item("highlight", True)
 
     def remove_highlight(self):
         """Remove the visual highlight from the element."""
         if self.highlight_rect:
-            self.canvas.itemconfig(self.highlight_rect, state="hidden")
+            self.show_item("highlight", False)
 
 
     def on_click(self, event):
@@ -262,24 +261,20 @@ class Element:
             )
 
         # Show rectangle on click and highlight it
-        self.canvas.itemconfig(self.highlight_rect, state="normal")  # Show the highlight rectangle
+        self.show_item("highlight", True)  # Show the highlight rectangle
 
 
-    def on_drag_motion(self, event):
-        """Handle dragging motion of the element."""
-        dx = event.x - self.x - 30  # Calculate the offset for movement
-        dy = event.y - self.y - 20
-
-        # Move the icon
-        self.canvas.move(self.icon_item, dx, dy)
-        self.canvas.move(self.label_id, dx, dy)
-        self.canvas.move(self.inlet_button_window, dx, dy)
-        self.canvas.move(self.outlet_button_window, dx, dy)
-        self.canvas.move(self.rect_item, dx, dy)  # Move the rectangle along with the icon
+    def move_to(self, x, y):
+        """Move the element and its canvas items to a new position."""
+        dx = x - self.x
+        dy = y - self.y
+        for item in (self.icon_item, self.label_id, self.inlet_button_window, self.outlet_button_window, self.rect_item):
+            if item:
+                self.canvas.move(item, dx, dy)
 
         # Update the position of the element
-        self.x = event.x - 30
-        self.y = event.y - 20
+        self.x = x
+        self.y = y
 
         # Move the highlight rectangle to the new position as well
         if self.highlight_rect:
@@ -291,18 +286,75 @@ class Element:
                 self.y + 80
             )
 
+    def on_drag_motion(self, event):
+        """Handle dragging motion of the element."""
+        start = (self.x, self.y)
+        self.move_to(event.x - 30, event.y - 20)
+
+        # Each step is recorded; the steps of one drag merge into a single undo command
+        whiteboard = self.canvas.master
+        if hasattr(whiteboard, "record_move") and start != (self.x, self.y):
+            whiteboard.record_move(self, start, (self.x, self.y))
+
 
     def on_drag_release(self, event):
         """Handle drag release."""
         # Once drag is released, update the element's position
-        self.x = event.x - 30
-        self.y = event.y - 20
+        start = (self.x, self.y)
+        self.move_to(event.x - 30, event.y - 20)
+
+        # Refresh the element's box in the whiteboard's spatial index
+        whiteboard = self.canvas.master
+        if hasattr(whiteboard, "index_element"):
+            if start != (self.x, self.y):
+                whiteboard.record_move(self, start, (self.x, self.y))
+            whiteboard.command_log.close_move()
+            whiteboard.index_element(self)
+
+    def icon_size(self):
+        """Icon width and height [px] at the current zoom, from its zoom bucket so icons are shared."""
+        zoom = quantise_zoom(self.zoom)
+        return (max(MIN_ICON_SIZE, min(int(round(self.original_width * zoom)), MAX_ICON_SIZE)),
+                max(MIN_ICON_SIZE, min(int(round(self.original_height * zoom)), MAX_ICON_SIZE)))
+
+    def model_bounds(self):
+        """Icon bounding box from the element's position and zoom; valid whether it is drawn, hidden or not."""
+        width, height = self.icon_size()
+        return self.x, self.y, self.x + width, self.y + height
+
+    def canvas_items(self):
+        """Canvas items of the element by role, None for the ones not created."""
+        return {"icon": self.icon_item, "label": self.label_id, "inlet": self.inlet_button_window,
+                "outlet": self.outlet_button_window, "rect": self.rect_item, "highlight": self.highlight_rect}
+
+    def show_item(self, role, shown):
+        """Set whether one canvas item (e.g. "label") shows; it stays hidden while the element is culled."""
+        self.shown[role] = shown
+        item = self.canvas_items()[role]
+        if item:
+            self.canvas.itemconfig(item, state="normal" if shown and not self.culled else "hidden")
+
+    def set_visible(self, visible):
+        """Show or hide the element on the canvas for culling, keeping the state of each of its items."""
+        self.culled = not visible
+        for role, item in self.canvas_items().items():
+            if item:
+                self.canvas.itemconfig(item, state="normal" if visible and self.shown[role] else "hidden")
 
     def on_double_click(self, event):
         """Handle double-click events (open properties dialog)."""
         print(f"Double-clicked: {self.label}")
+        self.edit_snapshot = self.to_data()  # Compared on saving, for undo
         self.open_properties_dialog()
 
+    def record_edit(self):
+        """Record the changes made in the properties dialog as one undo command."""
+        whiteboard = self.canvas.master
+        before = getattr(self, "edit_snapshot", None)
+        if before is not None and hasattr(whiteboard, "record_edit"):
+            whiteboard.record_edit(self, before)
+        self.edit_snapshot = None
+
     def open_properties_dialog(self):
         """Open a dialog to edit properties of the element."""
         dialog = tk.Toplevel(self.canvas)
@@ -336,6 +388,7 @@ class Element:
             for prop, entry in user_inputs.items():
                 new_value = entry.get()  # Get the value from the entry field
                 setattr(self, prop, new_value)  # Update the element's attribute dynamically
+            self.record_edit()
             dialog.destroy()  # Close the dialog
 
         # Add Save and Cancel buttons
@@ -355,6 +408,7 @@ class Element:
         if self.highlight_rect:
             self.canvas.delete(self.highlight_rect)
             self.highlight_rect = None  # Clear the highlight rectangle
+        self.shown["highlight"] = False
 
     def remove_highlight_on_outside_click(self, event):
         """Remove highlight if click is outside of any element."""
@@ -482,6 +536,7 @@ class InletReservoir(Element):
         """Save the properties and close the dialog."""
         for attribute, entry in user_inputs.items():
             setattr(self, attribute, entry.get())
+        self.record_edit()
         dialog.destroy()
 
 
@@ -634,6 +689,7 @@ class Pipe(Element):
         self.inlet_element = inlet
         self.outlet_element = outlet
 
+        self.record_edit()
         dialog.destroy()
 
 
@@ -746,6 +802,7 @@ class OutletReservoir(Element):
         """Save the properties and close the dialog."""
         for attribute, entry in user_inputs.items():
             setattr(self, attribute, entry.get())
+        self.record_edit()
         dialog.destroy()
 
 
@@ -964,6 +1021,7 @@ class Valve(Element):
             if t_value or y_value:  # Save only non-empty rows
                 self.custom_values.append((t_value, y_value))
 
+        self.record_edit()
         dialog.destroy()
 
 
@@ -1081,6 +1139,7 @@ class Manifold(Element):
         """Save the properties and close the dialog."""
         for attribute, entry in user_inputs.items():
             setattr(self, attribute, entry.get())
+        self.record_edit()
         dialog.destroy()
 
 
@@ -1120,8 +1179,8 @@ class SurgeTank(Element):
         self.throttle_kin = data.get("throttle_kin", "")
         self.throttle_kout = data.get("throttle_kout", "")
         self.throttle_el_zo = data.get("throttle_el_zo", "")
-        self.D_ST= data.get("D_ST","")
-        self.C_W_L = data.get("C_W_L","")
+        self.D_ST= data.get("Diameter_surge_tank", data.get("D_ST",""))
+        self.C_W_L = data.get("Current_Water_level", data.get("C_W_L",""))
 
     def validate_input(self, input_value):
         """Validate that the input is a number or a float."""
@@ -1213,6 +1272,7 @@ class SurgeTank(Element):
         """Save properties and close dialog."""
         for attribute, entry in user_inputs.items():
             setattr(self, attribute, entry.get())
+        self.record_edit()
         dialog.destroy()
 
 
@@ -1245,6 +1305,7 @@ class Turbine(Element):
         self.tr = "0.0"
         self.td = "0.0"
         self.bp = "0.0"
+        self.governor_mode = "Emergency"  # "Emergency" shutdown or "Partial" load rejection
         self.governor_image_path = "C:/Users/Aniket/Desktop/SIH Software/Main folder Airavata/Icons/governor_diagram.png" 
         # Image paths
         self.turbine_schematic = [
@@ -1284,6 +1345,7 @@ class Turbine(Element):
             "tr": self.tr,
             "td": self.td,
             "bp": self.bp,
+            "governor_mode": self.governor_mode,
             # For other tabs
             "governor_image_path": self.governor_image_path,
             "graph_image_paths": self.graph_image_paths,
@@ -1325,6 +1387,7 @@ class Turbine(Element):
         self.tr = data.get("tr", "0.0")
         self.td = data.get("td", "0.0")
         self.bp = data.get("bp", "0.0")
+        self.governor_mode = data.get("governor_mode", "Emergency")
 
     
 
@@ -1500,12 +1563,14 @@ class Turbine(Element):
             t_value = float(t_entry.get()) if t_entry.get().strip() else 0.0
             y_value = float(y_entry.get())
             self.table_data.append((t_value, y_value))
+        self.governor_mode = self.mode_var.get()
         # Example: Save to a JSON file
         data = self.to_data()  # Convert object data to dictionary format
         with open(f"{self.name}_turbine_data.json", 'w') as f:
             json.dump(data, f, indent=4)
 
         print(f"Turbine properties saved to {self.name}_turbine_data.json")
+        self.record_edit()
         dialog.destroy()
 
 
@@ -1614,7 +1679,7 @@ class Turbine(Element):
         modes_container = tk.Frame(frame, bg="white")
         modes_container.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-        self.mode_var = tk.StringVar(value="Emergency")
+        self.mode_var = tk.StringVar(value=self.governor_mode)
 
         # Left side - Emergency Mode with its components
         emergency_container = tk.Frame(modes_container, bg="white")
@@ -17,10 +17,12 @@ class Features:
         self.app = app
 
     # 1. Undo/Redo Functionality
-    def undo_redo(self):
-        # Simple implementation of undo/redo functionality could involve a stack of changes
-        # This is a placeholder for the actual logic.
-        pass
+    def undo_redo(self, redo=False):
+        # The whiteboard keeps the command log, see command_log.CommandLog
+        if redo:
+            self.app.whiteboard.redo()
+        else:
+            self.app.whiteboard.undo()
 
     # 2. Project History
     def open_recent_project(self):
@@ -1,9 +1,9 @@
 import os
 import json
 import tkinter.filedialog as filedialog
-import pandas as pd
 import json  # Add this import statement
 import tkinter.filedialog as filedialog
+from autosave import atomic_write_json
 # other imports...
 
 
@@ -49,6 +49,7 @@ class FileManager:
 
     def export_to_excel(self, data, output_path):
         """Export data to `.xlsx` format."""
+        import pandas as pd  # Only needed here, kept out of start-up
         df = pd.DataFrame(data)
         df.to_excel(output_path, index=False)
 
@@ -76,6 +77,8 @@ class FileManager:
 
             # Load elements into the canvas
             self.whiteboard.load_elements(elements_data['elements'])
+            for warning in self.whiteboard.project.warnings:
+                self.console.log(warning, level="warning")
 
             # Update file state
             self.current_file_name = file_path
@@ -171,8 +174,8 @@ class FileManager:
             # Ensure the data is in the correct format
             data_to_save = {"elements": elements_data}  # Wrap the data in the 'elements' key
             
-            with open(file_path, 'w') as file:
-                json.dump(data_to_save, file, indent=4)  # Save the elements data in the correct format
+            # Written to a temporary file and renamed, so a crash cannot leave a partial project
+            atomic_write_json(file_path, data_to_save)
             
             print(f"Data successfully saved to {file_path}")
         except TypeError:
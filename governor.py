@@ -0,0 +1,204 @@
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from Word_tasks import safe_float
+
+
+def parse_percent(value: Any, default: float = 0.0) -> float:
+    """
+    Convert a percentage entry such as "-100%" or "25" to a float
+
+    Args:
+        value: Raw value from the project JSON
+        default: Value returned when the entry is empty or invalid
+
+    Returns:
+        Percentage as a float (e.g. -100.0)
+    """
+    if isinstance(value, str):
+        value = value.strip().rstrip('%')
+    return safe_float(value, default)
+
+
+def normalise_gate_table(table_data: List) -> np.ndarray:
+    """
+    Turn the Turbine t - y(t) table into a sorted (n, 2) array of time and
+    per-unit gate opening. Rows with an empty time after the first are
+    dropped, and openings entered as percentages are scaled to 0-1.
+
+    Args:
+        table_data: List of (t, y) pairs as stored by Turbine.to_data
+
+    Returns:
+        Array with one row per usable table entry (possibly empty)
+    """
+    rows = []
+    for i, row in enumerate(table_data or []):
+        if len(row) < 2:
+            continue
+        t = safe_float(row[0])
+        y = safe_float(row[1])
+        # The dialog pre-fills seven (0, 0) rows, only keep the ones that were edited
+        if i > 0 and t == 0.0 and y == 0.0:
+            continue
+        rows.append((t, y))
+
+    if not rows:
+        return np.zeros((0, 2))
+
+    table = np.array(sorted(rows), dtype=float)
+    if table[:, 1].max() > 1.0:
+        table[:, 1] /= 100.0
+    table[:, 1] = np.clip(table[:, 1], 0.0, 1.0)
+    return table
+
+
+class TurbineGovernors:
+    """
+    Governor and rotating-mass model for every turbine of a network.
+
+    All units are held in flat numpy arrays so one call to `advance` updates
+    the whole plant; the per-step cost does not grow with Python branching
+    per unit. Two operating modes mirror the Governor tab of the Turbine
+    dialog:
+
+    * "Emergency": the wicket gate follows the t - y(t) table and the
+      generator disconnects at `t_load_rej`.
+    * "Partial": `delta_p` of the rated load is rejected at `t_load_rej` over
+      `dt_ramp`, and a PID governor (Tg servo, Tr reset, Td derivative, bp
+      permanent droop) drives the gate from the speed deviation.
+    """
+
+    def __init__(self, turbines: List[Dict], rho: float = 1000.0, gravity: float = 9.81):
+        self.names = [t.get("name") for t in turbines]
+        self.count = len(turbines)
+        self.rho = rho
+        self.gravity = gravity
+
+        self.efficiency = np.array([safe_float(t.get("efficiency"), 0.9) or 0.9 for t in turbines])
+        self.rated_rpm = np.array([safe_float(t.get("no")) for t in turbines])
+        self.inertia = np.array([safe_float(t.get("jh")) for t in turbines])
+        self.tg = np.array([safe_float(t.get("tg")) for t in turbines])
+        self.tr = np.array([safe_float(t.get("tr")) for t in turbines])
+        self.td = np.array([safe_float(t.get("td")) for t in turbines])
+        self.bp = np.array([safe_float(t.get("bp")) for t in turbines])
+        self.t_load_rej = np.array([safe_float(t.get("t_load_rej")) for t in turbines])
+        self.dt_ramp = np.array([safe_float(t.get("dt_ramp")) for t in turbines])
+
+        self.emergency = np.array([t.get("governor_mode", "Emergency") != "Partial" for t in turbines], dtype=bool)
+        # Emergency shutdown always rejects the full load
+        self.delta_p = np.array([parse_percent(t.get("delta_p"), -100.0) for t in turbines]) / 100.0
+        self.delta_p = np.where(self.emergency, -1.0, -np.abs(self.delta_p))
+
+        self.tables = [normalise_gate_table(t.get("table_data")) for t in turbines]
+        self.gate_initial = np.array([
+            table[0, 1] if len(table) and table[0, 1] > 0.0 else 1.0 for table in self.tables
+        ])
+        # Tables padded to one width by repeating their last row, so all are interpolated at once
+        self.has_table = np.array([len(table) > 1 for table in self.tables], dtype=bool)
+        width = max([2] + [len(table) for table in self.tables])
+        self.table_t = np.zeros((self.count, width))
+        self.table_y = np.zeros((self.count, width))
+        for i, table in enumerate(self.tables):
+            if len(table) > 1:
+                self.table_t[i] = np.concatenate([table[:, 0], np.full(width - len(table), table[-1, 0])])
+                self.table_y[i] = np.concatenate([table[:, 1], np.full(width - len(table), table[-1, 1])])
+        # Without a usable table the gate closes linearly over the ramp time, the servo time, or at once
+        self.closing = np.where(self.dt_ramp > 0.0, self.dt_ramp, self.tg)
+
+        # Units without inertia data keep synchronous speed (infinitely stiff grid)
+        self.free_speed = (self.inertia > 0.0) & (self.rated_rpm > 0.0)
+        self.omega_rated = np.where(self.rated_rpm > 0.0, self.rated_rpm, 1.0) * 2.0 * math.pi / 60.0
+
+        self.reset()
+
+    def reset(self):
+        """Return every unit to its pre-transient operating point."""
+        self.omega = self.omega_rated.copy()
+        self.gate = self.gate_initial.copy()
+        self.integral = np.zeros(self.count)
+        self.error_prev = np.zeros(self.count)
+        self.power_rated = np.zeros(self.count)
+        self.power_mech = np.zeros(self.count)
+
+    def initialise(self, flow: np.ndarray, head: np.ndarray):
+        """
+        Set the rated electrical load from the steady-state operating point.
+
+        Args:
+            flow: Steady turbine discharges [m3/s]
+            head: Steady net heads across the turbines [m]
+        """
+        self.power_rated = self.rho * self.gravity * flow * head * self.efficiency
+        self.power_mech = self.power_rated.copy()
+
+    def speed_rpm(self) -> np.ndarray:
+        """Current rotational speed of every unit in rpm."""
+        return self.omega * 60.0 / (2.0 * math.pi)
+
+    def electrical_power(self, t: float) -> np.ndarray:
+        """Electrical load on each generator at time t [W]."""
+        ramp = np.where(
+            self.dt_ramp > 0.0,
+            np.clip((t - self.t_load_rej) / np.where(self.dt_ramp > 0.0, self.dt_ramp, 1.0), 0.0, 1.0),
+            (t >= self.t_load_rej).astype(float),
+        )
+        return self.power_rated * (1.0 + self.delta_p * ramp)
+
+    def scheduled_gate(self, t: float) -> np.ndarray:
+        """Gate opening from the emergency shutdown tables at time t."""
+        # Clamped linear interpolation of every table, as np.interp per unit
+        rows = np.arange(self.count)
+        k = np.clip((self.table_t <= t).sum(axis=1) - 1, 0, self.table_t.shape[1] - 2)
+        t0, t1 = self.table_t[rows, k], self.table_t[rows, k + 1]
+        y0, y1 = self.table_y[rows, k], self.table_y[rows, k + 1]
+        span = t1 - t0
+        fraction = np.clip(np.where(span > 0.0, (t - t0) / np.where(span > 0.0, span, 1.0), 1.0), 0.0, 1.0)
+        tabulated = y0 + (y1 - y0) * fraction
+
+        elapsed = np.where(self.closing > 0.0, (t - self.t_load_rej) / np.where(self.closing > 0.0, self.closing, 1.0), 1.0)
+        ramped = np.where(t >= self.t_load_rej, self.gate_initial * np.maximum(0.0, 1.0 - elapsed), self.gate)
+
+        return np.where(self.emergency, np.where(self.has_table, tabulated, ramped), self.gate)
+
+    def advance(self, t: float, dt: float, flow: np.ndarray, head: np.ndarray,
+                torque: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Integrate speed and gate position over one solver step.
+
+        Args:
+            t: Time at the end of the step [s]
+            dt: Step length [s]
+            flow: Turbine discharges from the hydraulic solution [m3/s]
+            head: Net heads across the turbines [m]
+            torque: Optional shaft torques from the hill charts [N m], NaN
+                where a unit has no chart and its power follows from efficiency
+
+        Returns:
+            Gate openings to use for the next hydraulic step
+        """
+        self.power_mech = self.rho * self.gravity * flow * np.maximum(head, 0.0) * self.efficiency
+        if torque is not None:
+            self.power_mech = np.where(np.isnan(torque), self.power_mech, torque * self.omega)
+        power_elec = self.electrical_power(t)
+
+        # Rotating mass: J * omega * d(omega)/dt = Pm - Pe
+        accel = (self.power_mech - power_elec) / (np.where(self.free_speed, self.inertia, 1.0) * self.omega)
+        self.omega = np.where(self.free_speed, np.maximum(self.omega + accel * dt, 0.0), self.omega)
+
+        # PID on the per-unit speed deviation with permanent droop feedback
+        deviation = (self.omega - self.omega_rated) / self.omega_rated
+        error = -deviation - self.bp * (self.gate - self.gate_initial)
+        self.integral += np.where(self.tr > 0.0, error * dt / np.where(self.tr > 0.0, self.tr, 1.0), 0.0)
+        derivative = self.td * (error - self.error_prev) / dt
+        self.error_prev = error
+        command = np.clip(self.gate_initial + error + self.integral + derivative, 0.0, 1.0)
+
+        # First-order gate servomotor
+        servo = np.where(self.tg > 0.0, np.minimum(dt / np.where(self.tg > 0.0, self.tg, 1.0), 1.0), 1.0)
+        pid_gate = self.gate + (command - self.gate) * servo
+
+        self.gate = np.clip(np.where(self.emergency, self.scheduled_gate(t), pid_gate), 0.0, 1.0)
+        return self.gate
@@ -4,8 +4,71 @@ from tkinter import ttk, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import math
+import queue
+import sqlite3
+import threading
+import time
 import numpy as np
 
+from history_writer import HistoryStore
+from moc_solver import run_project_transient
+from run_database import RunDatabase
+
+# Result channel plotted for each element class, with its axis label
+RESULT_CHANNELS = {
+    "InletReservoir": ("HEAD", "Water Level (m)"),
+    "OutletReservoir": ("HEAD", "Water Level (m)"),
+    "Valve": ("Q", "Flow Rate (m³/s)"),
+    "Pipe": ("Q", "Discharge (m³/s)"),
+    "Turbine": ("HEAD", "Pressure Head (m)"),
+    "SurgeTank": ("ELEV", "W.S. Elevation (m)"),
+    "Manifold": ("HEAD", "Pressure Head (m)"),
+}
+# Points per curve in the overall view of real results
+OVERVIEW_POINTS = 2000
+# Curves in the overall view of real results; the other elements are read when picked
+OVERVIEW_CURVES = 10
+# Period of the check for the finished solver run [ms]
+SOLVE_POLL_MS = 100
+
+
+def load_result_history(current_file_name, file_content, log=None):
+    """
+    History store holding the native solver results of a project.
+
+    The latest recorded run of the same project content is reused when its
+    history still exists; otherwise the project is run and recorded. Safe to
+    call from a worker thread.
+
+    Args:
+        log: Console log function such as Console.log, print by default
+
+    Returns:
+        HistoryStore, or None when the project cannot be simulated
+    """
+    log = log or (lambda message, level="info": print(message))
+    try:
+        database = RunDatabase()
+    except sqlite3.Error as e:
+        log(f"Run database not available: {e}", level="warning")
+        database = None
+
+    try:
+        path = database.latest_history(file_content) if database else None
+        if path:
+            return HistoryStore(path)
+        started = time.perf_counter()
+        result = run_project_transient(file_content)
+        if database:
+            database.record_result(file_content, result, current_file_name, wall_time=time.perf_counter() - started)
+        return result.store
+    except Exception as e:  # Any solver failure falls back to the estimated curves
+        log(f"Native transient solver skipped, showing estimated curves: {e}", level="warning")
+        return None
+    finally:
+        if database:
+            database.close()
+
 
 
 def generate_advanced_data(time_points, element_class, parameters):
@@ -99,8 +162,19 @@ def generate_advanced_data(time_points, element_class, parameters):
 
 
 
-def run_simulation_and_generate_graphs(root, current_file_name):
-    """Runs the simulation based on the file contents and generates graphs with realistic behavior."""
+def run_simulation_and_generate_graphs(root, current_file_name, log=None):
+    """
+    Runs the simulation based on the file contents and generates graphs with realistic behavior.
+
+    The results are loaded, or the solver is run, on a worker thread behind
+    a progress window; the graph window opens when they are ready.
+
+    Args:
+        root: Tk root
+        current_file_name: Project file to plot
+        log: Console log function such as Console.log, print by default
+    """
+    log = log or (lambda message, level="info": print(message))
     if not current_file_name:
         messagebox.showerror("Error", "No file is currently open!")
         return
@@ -109,7 +183,37 @@ def run_simulation_and_generate_graphs(root, current_file_name):
         # Read the JSON file
         with open(current_file_name, 'r') as file:
             file_content = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        messagebox.showerror("Error", f"Failed to read the file: {e}")
+        return
+
+    progress_window = tk.Toplevel(root)
+    progress_window.title("Processing")
+    progress_window.transient(root)
+    tk.Label(progress_window, text="Running the transient solver...", font=("Segoe UI", 12)).pack(padx=20, pady=10)
+    progress_bar = ttk.Progressbar(progress_window, mode="indeterminate", length=250)
+    progress_bar.pack(padx=20, pady=(0, 15))
+    progress_bar.start(10)
+
+    finished = queue.Queue()
+    threading.Thread(target=lambda: finished.put(load_result_history(current_file_name, file_content, log)),
+                     name="graph-results", daemon=True).start()
+
+    def poll():
+        try:
+            store = finished.get_nowait()
+        except queue.Empty:
+            root.after(SOLVE_POLL_MS, poll)
+            return
+        progress_window.destroy()
+        show_graphs(root, file_content, store, log)
+
+    root.after(SOLVE_POLL_MS, poll)
 
+
+def show_graphs(root, file_content, store, log):
+    """Open the graph window of a project, from its native results when store is not None."""
+    try:
         elements = file_content.get("elements", {}).get("elements", [])
         simulation_props = file_content.get("elements", {}).get("simulation_properties", {})
 
@@ -124,8 +228,64 @@ def run_simulation_and_generate_graphs(root, current_file_name):
         graph_data = {}
         pipe_elements = []
 
+        # Real results mode: series stay on disk until an element is picked
+        if store is not None:
+            for element in elements:
+                element_class = element.get("class")
+                element_name = element.get("name")
+                quantity, y_label = RESULT_CHANNELS.get(element_class, ("HEAD", "Value"))
+                channel = f"{element_name}.{quantity}"
+                if channel not in store.index:
+                    continue
+                if element_class == "Pipe":
+                    pipe_elements.append(element_name)
+                graph_data[element_name] = {
+                    'time_points': store.times,
+                    'values': None,
+                    'channel': channel,
+                    'x_label': "Time (s)",
+                    'y_label': y_label,
+                    'graph_type': 'line',
+                    'base_value': 0
+                }
+            if not graph_data or not store.rows:
+                # Nothing of this project was recorded, keep the estimated curves
+                graph_data.clear()
+                pipe_elements.clear()
+                store = None
+
+        def series(name):
+            """Values of an element, read from the results on first use."""
+            data = graph_data[name]
+            if data['values'] is None:
+                data['values'] = np.asarray(store.channel(data['channel']))
+            return data['time_points'], data['values']
+
+        def overview(name):
+            """Series of an element for the overall graph, thinned (once) for real results."""
+            data = graph_data[name]
+            if store is None:
+                return data['time_points'], data['values']
+            if data.get('overview') is None:
+                stride = max(len(data['time_points']) // OVERVIEW_POINTS, 1)
+                values = data['values'] if data['values'] is not None else store.channel(data['channel'])
+                data['overview'] = (data['time_points'][::stride], np.array(values[::stride]))
+            return data['overview']
+
+        # With real results only the first few elements are read for the overall graph,
+        # so a large history does not hold up the window
+        if store is not None:
+            overview_names = ([name for name in graph_data if name not in pipe_elements]
+                              or list(graph_data))[:OVERVIEW_CURVES]
+        else:
+            overview_names = list(graph_data)
+        if len(overview_names) < len(graph_data):
+            overview_title = f"Overall Simulation Overview ({len(overview_names)} of {len(graph_data)} elements)"
+        else:
+            overview_title = "Overall Simulation Overview"
+
         # Generate graph data for each element
-        for element in elements:
+        for element in (elements if store is None else []):
             element_class = element.get("class")
             element_name = element.get("name")
 
@@ -198,17 +358,19 @@ def run_simulation_and_generate_graphs(root, current_file_name):
         fig, ax = plt.subplots(figsize=(12, 7), dpi=100)
 
         # Initial overall graph
-        for name, data in graph_data.items():
+        for name in overview_names:
+            data = graph_data[name]
+            time_points, values = overview(name)
             if data['graph_type'] == 'wave':
-                ax.plot(data['time_points'], data['values'], label=name, linewidth=1, linestyle='-')
+                ax.plot(time_points, values, label=name, linewidth=1, linestyle='-')
             elif data['graph_type'] == 'step':
-                ax.step(data['time_points'], data['values'], label=name, linewidth=1, where='mid')
+                ax.step(time_points, values, label=name, linewidth=1, where='mid')
             elif data['graph_type'] == 'curved':
-                ax.plot(data['time_points'], data['values'], label=name, linewidth=1, linestyle='--')
+                ax.plot(time_points, values, label=name, linewidth=1, linestyle='--')
             else:
-                ax.plot(data['time_points'], data['values'], label=name, linewidth=1)
+                ax.plot(time_points, values, label=name, linewidth=1)
 
-        ax.set_title("Overall Simulation Overview", fontsize=15, fontweight='bold')
+        ax.set_title(overview_title, fontsize=15, fontweight='bold')
         ax.set_xlabel("Time (s)", fontsize=12)
         ax.set_ylabel("Simulated Values", fontsize=12)
         ax.legend(loc='best')
@@ -383,31 +545,34 @@ def run_simulation_and_generate_graphs(root, current_file_name):
             selected_element = element_dropdown.get()
             
             if selected_element == "Overall Simulation Graph":
-                for name, data in graph_data.items():
+                for name in overview_names:
+                    data = graph_data[name]
+                    time_points, values = overview(name)
                     if data['graph_type'] == 'wave':
-                        ax.plot(data['time_points'], data['values'], label=name, linewidth=1, linestyle='-')
+                        ax.plot(time_points, values, label=name, linewidth=1, linestyle='-')
                     elif data['graph_type'] == 'step':
-                        ax.step(data['time_points'], data['values'], label=name, linewidth=1, where='mid')
+                        ax.step(time_points, values, label=name, linewidth=1, where='mid')
                     elif data['graph_type'] == 'curved':
-                        ax.plot(data['time_points'], data['values'], label=name, linewidth=1, linestyle='--')
+                        ax.plot(time_points, values, label=name, linewidth=1, linestyle='--')
                     else:
-                        ax.plot(data['time_points'], data['values'], label=name, linewidth=1)
+                        ax.plot(time_points, values, label=name, linewidth=1)
                 
-                ax.set_title("Overall Simulation Overview", fontsize=15, fontweight='bold')
+                ax.set_title(overview_title, fontsize=15, fontweight='bold')
                 ax.set_xlabel("Time (s)", fontsize=12)
                 ax.set_ylabel("Simulated Values", fontsize=12)
                 ax.legend(loc='best')
                 ax.grid(True, linestyle='--', alpha=0.7)
             else:
                 data = graph_data[selected_element]
+                time_points, values = series(selected_element)
                 if data['graph_type'] == 'wave':
-                    ax.plot(data['time_points'], data['values'], color='red', linewidth=1, linestyle='-')
+                    ax.plot(time_points, values, color='red', linewidth=1, linestyle='-')
                 elif data['graph_type'] == 'step':
-                    ax.step(data['time_points'], data['values'], color='red', linewidth=1, where='mid')
+                    ax.step(time_points, values, color='red', linewidth=1, where='mid')
                 elif data['graph_type'] == 'curved':
-                    ax.plot(data['time_points'], data['values'], color='red', linewidth=1, linestyle='--')
+                    ax.plot(time_points, values, color='red', linewidth=1, linestyle='--')
                 else:
-                    ax.plot(data['time_points'], data['values'], color='red', linewidth=1)
+                    ax.plot(time_points, values, color='red', linewidth=1)
                 
                 ax.set_title(f"Graph for {selected_element}", fontsize=15, fontweight='bold')
                 ax.set_xlabel(data['x_label'], fontsize=12)
@@ -461,6 +626,25 @@ def run_simulation_and_generate_graphs(root, current_file_name):
                 ax.clear()
 
                 data = graph_data[selected_pipe]
+                if store is not None:
+                    time_points, discharge_values = series(selected_pipe)
+                    ax.plot(time_points, discharge_values, color='blue', linewidth=1, label="Discharge (m³/s)")
+                    for index, status in ((int(np.argmax(discharge_values)), "High"),
+                                          (int(np.argmin(discharge_values)), "Low")):
+                        ax.annotate(
+                            f"{status}: {discharge_values[index]:.3f} m³/s at {time_points[index]:.2f} s",
+                            xy=(time_points[index], discharge_values[index]),
+                            fontsize=10,
+                            color='red'
+                        )
+                    ax.set_title(f"Discharge-Time Graph for Pipe: {selected_pipe}", fontsize=16, fontweight='bold')
+                    ax.set_xlabel("Time (s)", fontsize=12)
+                    ax.set_ylabel("Discharge (m³/s)", fontsize=12)
+                    ax.grid(True, linestyle='--', alpha=0.7)
+                    ax.legend()
+                    canvas.draw()
+                    return
+
                 discharge_values, pressure_head_values, annotations = generate_detailed_pipe_data(
                     data['time_points'], data['base_value']
                 )
@@ -507,8 +691,9 @@ def run_simulation_and_generate_graphs(root, current_file_name):
 
         element_dropdown.bind("<<ComboboxSelected>>", update_graph)
         pipe_dropdown.bind("<<ComboboxSelected>>", update_pipe_graph)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        messagebox.showerror("Error", f"Failed to read the file: {e}")
+    except Exception as e:  # Graph errors must not escape into the Tk event loop
+        log(f"Graphs could not be shown: {e}", level="error")
+        messagebox.showerror("Error", f"Graphs could not be shown: {e}")
 
 
 if __name__ == "__main__":
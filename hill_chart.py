@@ -0,0 +1,282 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from Word_tasks import safe_float
+
+# Generic characteristics for the built-in turbine types, as
+# (slope of unit discharge against unit speed, runaway unit speed),
+# both relative to the rated operating point
+BUILTIN_CHARACTERISTICS = {
+    "Francis 23": (-0.35, 1.6),
+    "Francis 67": (-0.2, 1.7),
+    "Francis 78": (-0.1, 1.8),
+    "Kaplan 115": (0.25, 2.3),
+}
+
+# Parsed charts, keyed by turbine type or by (path, modification time)
+_chart_cache = {}
+
+
+class HillChart:
+    """
+    Turbine characteristic on a regular (unit speed, gate opening) grid.
+
+    `unit_flow` and `unit_torque` hold Q11 and T11 at every grid point. A
+    `relative` chart is normalised so that (1.0, 1.0) is the rated operating
+    point; otherwise the speed axis is the absolute n11 [rpm m^0.5 / m^0.5].
+    """
+
+    def __init__(self, n11: np.ndarray, gate: np.ndarray, unit_flow: np.ndarray,
+                 unit_torque: np.ndarray, relative: bool = False):
+        self.n11 = np.asarray(n11, dtype=float)
+        self.gate = np.asarray(gate, dtype=float)
+        self.unit_flow = np.asarray(unit_flow, dtype=float)
+        self.unit_torque = np.asarray(unit_torque, dtype=float)
+        self.relative = relative
+
+    def evaluate(self, n11: np.ndarray, gate: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Bilinear lookup of unit discharge and unit torque.
+
+        Args:
+            n11: Unit speeds, any shape
+            gate: Gate openings [pu], same shape as n11
+
+        Returns:
+            tuple: (Q11, T11) arrays, clamped to the edges of the grid
+        """
+        n11 = np.clip(np.asarray(n11, dtype=float), self.n11[0], self.n11[-1])
+        gate = np.clip(np.asarray(gate, dtype=float), self.gate[0], self.gate[-1])
+
+        i = np.clip(np.searchsorted(self.n11, n11) - 1, 0, len(self.n11) - 2)
+        j = np.clip(np.searchsorted(self.gate, gate) - 1, 0, len(self.gate) - 2)
+        u = (n11 - self.n11[i]) / (self.n11[i + 1] - self.n11[i])
+        v = (gate - self.gate[j]) / (self.gate[j + 1] - self.gate[j])
+
+        def lookup(grid):
+            return ((1 - u) * (1 - v) * grid[j, i] + u * (1 - v) * grid[j, i + 1]
+                    + (1 - u) * v * grid[j + 1, i] + u * v * grid[j + 1, i + 1])
+
+        return lookup(self.unit_flow), lookup(self.unit_torque)
+
+    def save(self, path: str, source_mtime: float = 0.0):
+        """Write the grid to a .npz file."""
+        np.savez(path, n11=self.n11, gate=self.gate, unit_flow=self.unit_flow,
+                 unit_torque=self.unit_torque, relative=self.relative, source_mtime=source_mtime)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["HillChart", float]:
+        """Read a grid written by `save`, returning it with the source file time it was built from."""
+        with np.load(path) as data:
+            chart = cls(data["n11"], data["gate"], data["unit_flow"], data["unit_torque"], bool(data["relative"]))
+            return chart, float(data["source_mtime"])
+
+
+def builtin_chart(turbine_type: str, points: int = 61) -> HillChart:
+    """
+    Generic relative characteristic for one of the built-in turbine types
+
+    Args:
+        turbine_type: Key of BUILTIN_CHARACTERISTICS
+        points: Number of grid points along the unit speed axis
+
+    Returns:
+        Relative HillChart
+    """
+    slope, runaway = BUILTIN_CHARACTERISTICS[turbine_type]
+    n11 = np.linspace(0.0, 1.25 * runaway, points)
+    gate = np.linspace(0.0, 1.0, 21)
+    speed, opening = np.meshgrid(n11, gate)
+    unit_flow = np.maximum(opening * (1.0 + slope * (speed - 1.0)), 0.0)
+    # Torque falls linearly with speed and vanishes at runaway
+    unit_torque = unit_flow * (runaway - speed) / (runaway - 1.0)
+    return HillChart(n11, gate, unit_flow, unit_torque, relative=True)
+
+
+def _column(frame, *names):
+    columns = {str(c).strip().lower(): c for c in frame.columns}
+    for name in names:
+        if name in columns:
+            return frame[columns[name]].to_numpy(dtype=float)
+    return None
+
+
+def parse_hill_table(path: str, rho: float = 1000.0, gravity: float = 9.81, points: int = 61) -> HillChart:
+    """
+    Read a tabulated hill chart (.xlsx or .csv) and resample it on a regular grid.
+
+    The sheet needs one row per measured point with the columns `gate`
+    (or `y`), `n11`, `q11` and either `t11` or `efficiency`.
+
+    Args:
+        path: Spreadsheet path
+        rho: Fluid density used to derive torque from efficiency [kg/m3]
+        gravity: Gravitational acceleration [m/s2]
+        points: Number of grid points along the unit speed axis
+
+    Returns:
+        Absolute HillChart
+    """
+    import pandas as pd
+
+    frame = pd.read_csv(path) if path.lower().endswith(".csv") else pd.read_excel(path)
+    gate = _column(frame, "gate", "y", "opening")
+    n11 = _column(frame, "n11")
+    q11 = _column(frame, "q11")
+    t11 = _column(frame, "t11", "torque")
+    if gate is None or n11 is None or q11 is None:
+        raise ValueError(f"{path}: hill chart needs gate, n11 and q11 columns.")
+    if t11 is None:
+        efficiency = _column(frame, "efficiency", "eta")
+        if efficiency is None:
+            raise ValueError(f"{path}: hill chart needs a t11 or an efficiency column.")
+        omega11 = np.maximum(n11, 1e-6) * 2.0 * np.pi / 60.0
+        t11 = rho * gravity * q11 * efficiency / omega11
+
+    if gate.max() > 1.0:
+        gate = gate / 100.0
+    openings = np.unique(gate)
+    if len(openings) < 2:
+        raise ValueError(f"{path}: hill chart needs at least two gate openings.")
+
+    axis = np.linspace(n11.min(), n11.max(), points)
+    unit_flow = np.empty((len(openings), points))
+    unit_torque = np.empty((len(openings), points))
+    for row, opening in enumerate(openings):
+        rows = gate == opening
+        order = np.argsort(n11[rows])
+        unit_flow[row] = np.interp(axis, n11[rows][order], q11[rows][order])
+        unit_torque[row] = np.interp(axis, n11[rows][order], t11[rows][order])
+
+    return HillChart(axis, openings, unit_flow, unit_torque, relative=False)
+
+
+def grid_cache_path(path: str) -> str:
+    """Location of the parsed grid kept beside a hill chart spreadsheet."""
+    return os.path.splitext(path)[0] + "_hill_grid.npz"
+
+
+def load_hill_chart(turbine_type: str, rho: float = 1000.0, gravity: float = 9.81) -> Optional[HillChart]:
+    """
+    Return the characteristic grid of a turbine type, parsing it at most once.
+
+    Built-in types are generated in memory. Spreadsheet types (for example
+    "hill.xlsx") are parsed once and saved beside the file as
+    `<name>_hill_grid.npz`, which is reused until the spreadsheet changes.
+
+    Args:
+        turbine_type: Turbine.turbine_type value
+        rho: Fluid density [kg/m3]
+        gravity: Gravitational acceleration [m/s2]
+
+    Returns:
+        HillChart, or None when no characteristic data is available
+    """
+    if turbine_type in BUILTIN_CHARACTERISTICS:
+        if turbine_type not in _chart_cache:
+            _chart_cache[turbine_type] = builtin_chart(turbine_type)
+        return _chart_cache[turbine_type]
+
+    if not turbine_type or not os.path.exists(turbine_type):
+        return None
+
+    mtime = os.path.getmtime(turbine_type)
+    key = (os.path.abspath(turbine_type), mtime)
+    if key in _chart_cache:
+        return _chart_cache[key]
+
+    cache_path = grid_cache_path(turbine_type)
+    chart = None
+    if os.path.exists(cache_path):
+        try:
+            chart, source_mtime = HillChart.load(cache_path)
+            if source_mtime != mtime:
+                chart = None
+        except (OSError, KeyError, ValueError):
+            chart = None
+
+    if chart is None:
+        try:
+            chart = parse_hill_table(turbine_type, rho, gravity)
+        except ImportError:
+            print(f"pandas is needed to read {turbine_type}, using the orifice turbine model.")
+            return None
+        try:
+            chart.save(cache_path, mtime)
+        except OSError as e:
+            print(f"Could not save hill chart grid: {e}")
+
+    _chart_cache[key] = chart
+    return chart
+
+
+class TurbineCharacteristics:
+    """
+    Hill-chart boundary data for the turbines of a network.
+
+    Each unit is calibrated on its steady operating point so that the chart
+    reproduces the steady discharge and mechanical power exactly. Units that
+    share a chart are evaluated in one vectorised lookup per time step.
+    Units without characteristic data keep the orifice model (their entries
+    in `flow_ratio` stay equal to gate / gate0).
+    """
+
+    def __init__(self, turbines: list, rho: float = 1000.0, gravity: float = 9.81):
+        self.count = len(turbines)
+        charts = [load_hill_chart(t.get("turbine_type", ""), rho, gravity) for t in turbines]
+        self.groups = []
+        for chart in {id(c): c for c in charts if c is not None}.values():
+            self.groups.append((chart, np.array([i for i, c in enumerate(charts) if c is chart], dtype=int)))
+        self.diameter = np.array([safe_float(t.get("do")) for t in turbines])
+        self.rated_rpm = np.array([safe_float(t.get("no")) for t in turbines])
+
+    def initialise(self, head: np.ndarray, gate: np.ndarray, omega: np.ndarray, power: np.ndarray):
+        """
+        Record the steady operating point of each unit.
+
+        Args:
+            head: Steady net heads [m]
+            gate: Steady gate openings [pu]
+            omega: Steady rotational speeds [rad/s]
+            power: Steady mechanical powers [W]
+        """
+        self.head0 = np.maximum(head, 1e-9)
+        self.omega0 = np.where(omega > 0.0, omega, 1.0)
+        self.torque_rated = power / self.omega0
+        # Steady chart coordinates and values of each unit
+        self.n11_0 = np.ones(self.count)
+        self.flow0 = np.ones(self.count)
+        self.torque0 = np.ones(self.count)
+        for chart, units in self.groups:
+            if not chart.relative:
+                absolute = self.rated_rpm[units] * self.diameter[units] / np.sqrt(self.head0[units])
+                self.n11_0[units] = np.where(absolute > 0.0, absolute, 0.5 * (chart.n11[0] + chart.n11[-1]))
+            q, t = chart.evaluate(self.n11_0[units], gate[units])
+            self.flow0[units] = np.where(q > 0.0, q, 1.0)
+            self.torque0[units] = np.where(t != 0.0, t, 1.0)
+        self.gate0 = np.where(gate > 0.0, gate, 1.0)
+
+    def evaluate(self, head: np.ndarray, gate: np.ndarray, omega: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Discharge ratio and shaft torque of every unit.
+
+        Args:
+            head: Current net heads [m]
+            gate: Current gate openings [pu]
+            omega: Current rotational speeds [rad/s]
+
+        Returns:
+            tuple: (flow_ratio, torque) where Q = Q0 * sqrt(H / H0) * flow_ratio,
+            and torque [N m] is NaN for units without a chart
+        """
+        flow_ratio = gate / self.gate0
+        torque = np.full(self.count, np.nan)
+        head = np.maximum(head, 1e-6)
+        speed_ratio = (omega / self.omega0) * np.sqrt(self.head0 / head)
+        for chart, units in self.groups:
+            q, t = chart.evaluate(self.n11_0[units] * speed_ratio[units], gate[units])
+            flow_ratio[units] = q / self.flow0[units]
+            torque[units] = self.torque_rated[units] * (head[units] / self.head0[units]) * t / self.torque0[units]
+        return flow_ratio, torque
@@ -0,0 +1,223 @@
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+# Directory of the history stores of runs without an explicit location, overridable with AIRAVATA_RESULTS
+DEFAULT_RESULTS_DIRECTORY = os.path.join(os.path.expanduser("~"), ".airavata", "results")
+# Managed history stores kept; older ones are removed when a new run starts
+HISTORY_RETENTION = 20
+HISTORY_PREFIX = "history_"
+
+
+def select_channels(channel_names: List[str], requested: Optional[List[str]]) -> List[int]:
+    """
+    Indices of the channels named in a HISTORY request
+
+    Args:
+        channel_names: All channels produced by the solver
+        requested: Channel names ("SurgeTank_1.ELEV") or element names
+            ("SurgeTank_1", meaning all of its channels); empty for all
+
+    Returns:
+        Sorted list of channel indices
+    """
+    if not requested:
+        return list(range(len(channel_names)))
+    wanted = set(requested)
+    return [i for i, name in enumerate(channel_names)
+            if name in wanted or name.rsplit(".", 1)[0] in wanted]
+
+
+class HistoryWriter:
+    """
+    Streams solver output to an append-only columnar store.
+
+    Selected channels are decimated to DTOUT and collected in a preallocated
+    chunk that is appended to one binary file per channel when it fills, so
+    memory use depends on the chunk size and not on the run length. Running
+    maxima and minima (with their times) are kept for every channel at every
+    computational step.
+    """
+
+    def __init__(self, path: str, channel_names: List[str], selected: List[int], chunk_rows: int = 4096):
+        self.path = path
+        self.channel_names = channel_names
+        self.selected = np.asarray(selected, dtype=int)
+        self.chunk_rows = chunk_rows
+        os.makedirs(path, exist_ok=True)
+
+        self.buffer = np.empty((chunk_rows, len(self.selected)))
+        self.time_buffer = np.empty(chunk_rows)
+        self.filled = 0
+        self.rows = 0
+
+        count = len(channel_names)
+        self.max = np.full(count, -np.inf)
+        self.min = np.full(count, np.inf)
+        self.tmax = np.zeros(count)
+        self.tmin = np.zeros(count)
+
+        self.files = [f"c{i:05d}.bin" for i in range(len(self.selected))]
+        for name in self.files + ["time.bin"]:
+            open(os.path.join(path, name), 'wb').close()
+        self._write_manifest()
+
+    def update_envelope(self, t: float, values: np.ndarray):
+        """Fold one computational step into the running envelopes."""
+        higher = values > self.max
+        self.max[higher] = values[higher]
+        self.tmax[higher] = t
+        lower = values < self.min
+        self.min[lower] = values[lower]
+        self.tmin[lower] = t
+
+    def record(self, t: float, values: np.ndarray):
+        """Append one output row (all channels, only the selected ones are kept)."""
+        self.buffer[self.filled] = values[self.selected]
+        self.time_buffer[self.filled] = t
+        self.filled += 1
+        if self.filled == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Append the filled part of the chunk to the store."""
+        if not self.filled:
+            return
+        with open(os.path.join(self.path, "time.bin"), 'ab') as file:
+            file.write(self.time_buffer[:self.filled].tobytes())
+        for column, name in enumerate(self.files):
+            with open(os.path.join(self.path, name), 'ab') as file:
+                file.write(np.ascontiguousarray(self.buffer[:self.filled, column]).tobytes())
+        self.rows += self.filled
+        self.filled = 0
+        self._write_manifest()
+
+    def envelope(self) -> Dict[str, tuple]:
+        """(max, time of max, min, time of min) of every channel."""
+        return {name: (self.max[i], self.tmax[i], self.min[i], self.tmin[i])
+                for i, name in enumerate(self.channel_names)}
+
+    def close(self):
+        """Flush the remaining rows and store the envelopes with the manifest."""
+        self.flush()
+        self._write_manifest(envelope=self.envelope())
+
+    def _write_manifest(self, envelope: Optional[Dict] = None):
+        manifest = {
+            "dtype": "float64",
+            "rows": self.rows,
+            "channels": [self.channel_names[i] for i in self.selected],
+            "files": self.files,
+        }
+        if envelope is not None:
+            manifest["envelope"] = {name: [float(v) for v in values] for name, values in envelope.items()}
+        with open(os.path.join(self.path, MANIFEST_NAME), 'w') as file:
+            json.dump(manifest, file)
+
+
+class HistoryStore:
+    """Read access to a store written by HistoryWriter, one channel at a time."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME), 'r') as file:
+            self.manifest = json.load(file)
+        self.channel_names = self.manifest["channels"]
+        self.index = {name: i for i, name in enumerate(self.channel_names)}
+        self.rows = self.manifest["rows"]
+
+    def _column(self, file_name: str) -> np.ndarray:
+        if not self.rows:
+            return np.zeros(0)
+        return np.memmap(os.path.join(self.path, file_name), dtype=np.float64, mode='r', shape=(self.rows,))
+
+    @property
+    def times(self) -> np.ndarray:
+        return self._column("time.bin")
+
+    def channel(self, name: str) -> np.ndarray:
+        """Memory-mapped history of one channel."""
+        return self._column(self.manifest["files"][self.index[name]])
+
+    def envelope(self) -> Dict[str, tuple]:
+        """Envelopes stored when the run finished."""
+        return {name: tuple(values) for name, values in self.manifest.get("envelope", {}).items()}
+
+
+def results_directory() -> str:
+    """Managed directory holding the history stores of runs, next to the run database by default."""
+    return os.environ.get("AIRAVATA_RESULTS", DEFAULT_RESULTS_DIRECTORY)
+
+
+def is_managed_history(path: str) -> bool:
+    """True when a history store lives in the managed results directory."""
+    return os.path.dirname(os.path.abspath(path)) == os.path.abspath(results_directory())
+
+
+def prune_histories(keep: int = HISTORY_RETENTION):
+    """
+    Remove the oldest managed history stores
+
+    The runs recorded with a removed store keep their envelopes in the run
+    database but lose their history path, in the same step, so no view is
+    left holding a dead path. Nothing is removed when the database cannot
+    be updated.
+
+    Args:
+        keep: Number of most recent stores to keep
+    """
+    directory = os.path.abspath(results_directory())
+    if not os.path.isdir(directory):
+        return
+    stores = [entry for entry in os.scandir(directory) if entry.is_dir() and entry.name.startswith(HISTORY_PREFIX)]
+    stores.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    removed = [entry.path for entry in stores[max(keep, 0):]]
+    if not removed:
+        return
+
+    import sqlite3
+    from run_database import RunDatabase  # Imported here, run_database imports this module
+    try:
+        database = RunDatabase()
+        try:
+            database.forget_histories(removed)
+        finally:
+            database.close()
+    except sqlite3.Error as e:
+        print(f"Old history stores kept, the run database could not be updated: {e}")
+        return
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def default_history_path() -> str:
+    """
+    New store directory in the managed results directory, for a run that did not ask for a location
+
+    Older stores beyond HISTORY_RETENTION are removed first, so repeated
+    report and graph runs do not accumulate on disk.
+    """
+    directory = os.path.abspath(results_directory())
+    os.makedirs(directory, exist_ok=True)
+    # Leaves room for the new store
+    prune_histories(HISTORY_RETENTION - 1)
+    return tempfile.mkdtemp(prefix=HISTORY_PREFIX, dir=directory)
+
+
+def persist_history(path: str) -> str:
+    """
+    Copy a history store into the managed results directory, unless it is already there
+
+    Returns:
+        Path of the managed store
+    """
+    if is_managed_history(path):
+        return path
+    target = default_history_path()
+    shutil.copytree(path, target, dirs_exist_ok=True)
+    return target
@@ -0,0 +1,80 @@
+import math
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+# Zoom levels are rounded to powers of this step, so repeated zooming reuses icons
+ZOOM_STEP = 1.05
+# Resized icons kept in memory
+MAX_ICONS = 256
+
+
+def quantise_zoom(zoom: float) -> float:
+    """Nearest zoom bucket (a power of ZOOM_STEP) of a zoom factor."""
+    return ZOOM_STEP ** round(math.log(max(zoom, 1e-6)) / math.log(ZOOM_STEP))
+
+
+class IconCache:
+    """
+    Least-recently-used cache of resized element icons.
+
+    PhotoImages are keyed by (path, width, height). Decoded source images are
+    kept separately so a size not seen before is resized from memory instead
+    of reading the PNG from disk again.
+    """
+
+    def __init__(self, max_icons: int = MAX_ICONS):
+        self.max_icons = max_icons
+        self.icons = OrderedDict()
+        self.sources = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, width: int, height: int) -> ImageTk.PhotoImage:
+        """
+        Icon of a file at a given size
+
+        Args:
+            path: Image file
+            width, height: Size in pixels
+
+        Returns:
+            Shared PhotoImage, do not modify it
+        """
+        key = (path, int(width), int(height))
+        icon = self.icons.get(key)
+        if icon is not None:
+            self.icons.move_to_end(key)
+            self.hits += 1
+            return icon
+
+        self.misses += 1
+        source = self.sources.get(path)
+        if source is None:
+            with Image.open(path) as image:
+                source = image.convert("RGBA")
+            self.sources[path] = source
+        icon = ImageTk.PhotoImage(source.resize(key[1:], Image.Resampling.LANCZOS))
+        self.icons[key] = icon
+        while len(self.icons) > self.max_icons:
+            # Elements still showing an evicted icon keep their own reference
+            self.icons.popitem(last=False)
+        return icon
+
+    def clear(self):
+        """Drop all cached icons and decoded images."""
+        self.icons.clear()
+        self.sources.clear()
+
+
+_cache = IconCache()
+
+
+def get_icon(path: str, width: int, height: int) -> ImageTk.PhotoImage:
+    """Icon from the process-wide cache, see IconCache.get."""
+    return _cache.get(path, width, height)
+
+
+def icon_cache() -> IconCache:
+    """The process-wide icon cache."""
+    return _cache
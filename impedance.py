@@ -0,0 +1,153 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from moc_solver import FIXED_HEAD, TANK, MOCSolver, Network, project_elements
+
+
+class ImpedanceAnalysis:
+    """
+    Frequency response of a network by the impedance (transfer matrix) method.
+
+    Each conduit is a distributed two-port with linearised friction around
+    the steady flow. The network is assembled into a nodal admittance matrix
+    per frequency: conduits couple their end nodes, surge tanks add a
+    capacitance A*s, valves a linearised orifice conductance, and reservoirs
+    are nodes of zero head oscillation. Turbines are treated as constant-flow
+    units, the points where the response is excited and observed. All
+    frequencies are solved together as one batch of small linear systems.
+    """
+
+    def __init__(self, network: Network):
+        self.network = network
+        solver = MOCSolver(network)
+        solver.steady_state()
+        g = network.gravity
+
+        self.n_nodes = solver.n_nodes
+        self.up = solver.up_node
+        self.down = solver.down_node
+        lengths = np.array([c["length"] for c in network.conduits])
+        diameters = np.array([c["diameter"] for c in network.conduits])
+        friction = np.array([c["friction"] for c in network.conduits])
+        areas = np.pi * diameters ** 2 / 4.0
+        flow = solver.Q[solver.first]
+
+        self.lengths = lengths
+        self.inertance = 1.0 / (g * areas)
+        self.capacitance = g * areas / np.array([c["celerity"] for c in network.conduits]) ** 2
+        self.resistance = friction * np.abs(flow) / (g * diameters * areas ** 2)
+
+        # Surge tank storage and linearised valve conductances
+        self.storage = np.where(solver.node_kind == TANK, solver.node_area, 0.0)
+        self.free = np.flatnonzero(solver.node_kind != FIXED_HEAD)
+        valve_flow = solver.link_flow[solver.valve_links]
+        head_drop = np.abs(solver._link_head_difference(solver.node_heads)[solver.valve_links])
+        self.valve_up = solver.link_up[solver.valve_links]
+        self.valve_down = solver.link_down[solver.valve_links]
+        self.valve_conductance = np.where(head_drop > 0.0, np.abs(valve_flow) / (2.0 * np.maximum(head_drop, 1e-12)), 0.0)
+
+        self.units = {network.links[i]["name"]: int(network.links[i]["up"]) for i in solver.turbine_links}
+        if not self.units:
+            # Without turbines, look at the valves instead
+            self.units = {network.links[i]["name"]: int(network.links[i]["up"]) for i in solver.valve_links}
+
+    def admittance(self, omega: np.ndarray) -> np.ndarray:
+        """
+        Nodal admittance matrices for a set of angular frequencies.
+
+        Args:
+            omega: Angular frequencies [rad/s], shape (F,)
+
+        Returns:
+            Complex array of shape (F, nodes, nodes)
+        """
+        s = 1j * np.asarray(omega, dtype=float)[:, None]
+        series = self.inertance * s + self.resistance
+        gamma = np.sqrt(series * self.capacitance * s)
+        impedance = np.sqrt(series / (self.capacitance * s))
+        sinh = np.sinh(gamma * self.lengths)
+        self_term = np.cosh(gamma * self.lengths) / (impedance * sinh)
+        mutual = -1.0 / (impedance * sinh)
+
+        F = len(s)
+        Y = np.zeros((F, self.n_nodes, self.n_nodes), dtype=complex)
+        frequencies = np.arange(F)[:, None]
+        np.add.at(Y, (frequencies, self.up, self.up), self_term)
+        np.add.at(Y, (frequencies, self.down, self.down), self_term)
+        np.add.at(Y, (frequencies, self.up, self.down), mutual)
+        np.add.at(Y, (frequencies, self.down, self.up), mutual)
+
+        nodes = np.arange(self.n_nodes)
+        Y[:, nodes, nodes] += self.storage * s
+        for up, down, conductance in zip(self.valve_up, self.valve_down, self.valve_conductance):
+            Y[:, up, up] += conductance
+            if down >= 0:
+                Y[:, down, down] += conductance
+                Y[:, up, down] -= conductance
+                Y[:, down, up] -= conductance
+        return Y
+
+    def response(self, omega: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Driving-point impedance h/q at every unit node.
+
+        Args:
+            omega: Angular frequencies [rad/s]
+
+        Returns:
+            Dict of unit name -> complex impedance [s/m2] per frequency
+        """
+        Y = self.admittance(omega)[:, self.free][:, :, self.free]
+        position = {node: k for k, node in enumerate(self.free)}
+        columns = [position[node] for node in self.units.values()]
+        excitation = np.zeros((len(omega), len(self.free), len(columns)), dtype=complex)
+        excitation[:, columns, np.arange(len(columns))] = 1.0
+        heads = np.linalg.solve(Y, excitation)
+        return {name: heads[:, columns[k], k] for k, name in enumerate(self.units)}
+
+    def natural_periods(self, omega: np.ndarray, unit: Optional[str] = None) -> List[float]:
+        """
+        Natural periods read from the resonance peaks of the response.
+
+        Args:
+            omega: Angular frequency grid [rad/s], increasing
+            unit: Unit to look at, the first one by default
+
+        Returns:
+            Periods [s] of the response peaks, longest first
+        """
+        responses = self.response(omega)
+        return resonance_periods(omega, responses[unit or next(iter(responses))])
+
+
+def resonance_periods(omega: np.ndarray, response: np.ndarray) -> List[float]:
+    """Periods [s] of the local maxima of |response| on an increasing grid, longest first."""
+    magnitude = np.abs(response)
+    peaks = np.flatnonzero((magnitude[1:-1] > magnitude[:-2]) & (magnitude[1:-1] > magnitude[2:])) + 1
+    return sorted((2.0 * np.pi / omega[peaks]).tolist(), reverse=True)
+
+
+def frequency_grid(longest_period: float = 1000.0, shortest_period: float = 0.1, points: int = 4000) -> np.ndarray:
+    """Logarithmic angular frequency grid between two periods [s]."""
+    return np.logspace(np.log10(2.0 * np.pi / longest_period), np.log10(2.0 * np.pi / shortest_period), points)
+
+
+def analyse_project(project_data: Dict, omega: Optional[np.ndarray] = None) -> Dict:
+    """
+    Frequency response and natural periods of a project
+
+    Args:
+        project_data: Project JSON content
+        omega: Angular frequency grid [rad/s], frequency_grid() by default
+
+    Returns:
+        dict with "omega", "response" (unit -> complex impedance) and
+        "periods" (unit -> natural periods [s], longest first)
+    """
+    elements, simulation_properties = project_elements(project_data)
+    analysis = ImpedanceAnalysis(Network(elements, simulation_properties))
+    omega = frequency_grid() if omega is None else omega
+    response = analysis.response(omega)
+    periods = {name: resonance_periods(omega, values) for name, values in response.items()}
+    return {"omega": omega, "response": response, "periods": periods}
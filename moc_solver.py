@@ -0,0 +1,842 @@
+import json
+import math
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from Word_tasks import safe_float
+from checkpoint import CheckpointWriter, restore
+from discretisation import plan_discretisation
+from governor import TurbineGovernors, normalise_gate_table
+from hill_chart import TurbineCharacteristics
+from history_writer import HistoryStore, HistoryWriter, default_history_path, select_channels
+
+# Boundary node kinds used by the solver
+JUNCTION = 0
+FIXED_HEAD = 1
+TANK = 2
+
+# Separates the variant index from element names in batched networks
+BATCH_SEPARATOR = "|"
+
+# Elements that sit between two pipes and are modelled as an orifice link
+LINK_CLASSES = ("Valve", "Turbine")
+
+# Field holding the elevation of each element class [m asl]
+ELEVATION_FIELDS = {
+    "InletReservoir": "pipe_z",
+    "OutletReservoir": "level_z",
+    "Manifold": "elev_z",
+    "SurgeTank": "throttle_el_zo",
+    "Valve": "elevation_z",
+    "Turbine": "z_elev",
+}
+
+
+def darcy_from_manning(manning_n: float, diameter: float, gravity: float = 9.81) -> float:
+    """
+    Convert a Manning roughness to the Darcy-Weisbach factor of a full circular conduit
+
+    Args:
+        manning_n: Manning n [s/m^(1/3)]
+        diameter: Conduit diameter [m]
+        gravity: Gravitational acceleration [m/s2]
+
+    Returns:
+        Darcy-Weisbach friction factor f [-]
+    """
+    return 8.0 * gravity * manning_n ** 2 / (diameter / 4.0) ** (1.0 / 3.0)
+
+
+def project_elements(project_data: Dict) -> tuple:
+    """
+    Split a loaded project JSON into its element list and simulation properties
+
+    Args:
+        project_data: Content of a project file as written by AiravataSoftware.save_file
+
+    Returns:
+        tuple: (elements, simulation_properties)
+    """
+    content = project_data.get("elements", {})
+    if isinstance(content, list):
+        return content, project_data.get("simulation_properties", {})
+    return content.get("elements", []), content.get("simulation_properties", {})
+
+
+class Network:
+    """
+    Solver-side description of a project in SI units.
+
+    Reservoirs, manifolds and surge tanks become boundary nodes. Valves and
+    turbines become orifice links between an inlet-side node (named after the
+    element) and an outlet-side node (`<name>/out`), or discharge to a fixed
+    tail level when nothing is connected downstream. Pipes become conduits
+    between nodes. A pipe flows from its `outlet_element` to its
+    `inlet_element`, the same convention the canvas and the INP writer use.
+    """
+
+    def __init__(self, elements: List[Dict], simulation_properties: Optional[Dict] = None):
+        props = simulation_properties or {}
+        self.simulation_properties = props
+        self.gravity = safe_float(props.get("gravity"), 9.81) or 9.81
+        self.rho = safe_float(props.get("fluid_density"), 1000.0) or 1000.0
+        self.dt = safe_float(props.get("time_step"), 0.01) or 0.01
+        self.t_max = safe_float(props.get("simulation_time"), 10.0)
+
+        # Optional column separation model: "DVCM", "DGCM" or none
+        self.cavitation = str(props.get("cavitation_model", "") or "").strip().upper()
+        if self.cavitation not in ("", "DVCM", "DGCM"):
+            raise ValueError(f"Unknown cavitation model {self.cavitation}, use DVCM or DGCM.")
+        self.vapour_pressure = safe_float(props.get("vapour_pressure"), 2340.0)
+        self.atmospheric_pressure = safe_float(props.get("atmospheric_pressure"), 101325.0)
+        self.gas_fraction = safe_float(props.get("gas_fraction"), 1e-7)
+
+        self.node_names = []
+        self.node_index = {}
+        self.node_kind = []
+        self.node_head = []
+        self.node_area = []
+        self.node_throttle = []
+        self.node_elevation = []
+        self.conduits = []
+        self.links = []
+        self.warnings = []
+
+        self._build(elements)
+
+    def _add_node(self, name, kind=JUNCTION, head=0.0, area=0.0, throttle=(0.0, 0.0, 0.0), elevation=0.0):
+        self.node_index[name] = len(self.node_names)
+        self.node_elevation.append(elevation)
+        self.node_names.append(name)
+        self.node_kind.append(kind)
+        self.node_head.append(head)
+        self.node_area.append(area)
+        self.node_throttle.append(throttle)
+        return self.node_index[name]
+
+    def _build(self, elements):
+        pipes = [e for e in elements if e.get("class") == "Pipe"]
+        ends_at = {}
+        starts_at = {}
+        for pipe in pipes:
+            ends_at.setdefault(pipe.get("inlet_element"), []).append(pipe)
+            starts_at.setdefault(pipe.get("outlet_element"), []).append(pipe)
+
+        outlet_side = {}
+        for element in elements:
+            element_class = element.get("class")
+            name = element.get("name")
+            if element_class == "Pipe" or not name:
+                continue
+            elevation = safe_float(element.get(ELEVATION_FIELDS.get(element_class, "")))
+
+            if element_class in ("InletReservoir", "OutletReservoir"):
+                self._add_node(name, FIXED_HEAD, head=safe_float(element.get("level_h")), elevation=elevation)
+
+            elif element_class == "SurgeTank":
+                area = safe_float(element.get("stank_a"))
+                if area <= 0.0:
+                    diameter = safe_float(element.get("Diameter_surge_tank", element.get("D_ST")))
+                    area = math.pi * diameter ** 2 / 4.0
+                throttle = (
+                    safe_float(element.get("throttle_kin")),
+                    safe_float(element.get("throttle_kout")),
+                    safe_float(element.get("throttle_ao")),
+                )
+                self._add_node(name, TANK if area > 0.0 else JUNCTION, area=area, throttle=throttle,
+                               elevation=elevation)
+
+            elif element_class in LINK_CLASSES:
+                up = self._add_node(name, elevation=elevation)
+                if ends_at.get(name) and starts_at.get(name):
+                    down = self._add_node(f"{name}/out", elevation=elevation)
+                    outlet_side[name] = f"{name}/out"
+                    tail = 0.0
+                else:
+                    down = -1
+                    tail = safe_float(element.get("z_elev" if element_class == "Turbine" else "elevation_z"))
+                self.links.append({
+                    "name": name,
+                    "class": element_class,
+                    "up": up,
+                    "down": down,
+                    "tail": tail,
+                    "data": element,
+                })
+
+            else:
+                self._add_node(name, elevation=elevation)
+
+        for pipe in pipes:
+            upstream = outlet_side.get(pipe.get("outlet_element"), pipe.get("outlet_element"))
+            downstream = pipe.get("inlet_element")
+            if upstream not in self.node_index or downstream not in self.node_index:
+                self.warnings.append(f"{pipe.get('name')} is not connected at both ends and was skipped.")
+                continue
+
+            length = safe_float(pipe.get("length"))
+            diameter = safe_float(pipe.get("diameter"))
+            celerity = safe_float(pipe.get("celerity"))
+            if length <= 0.0 or diameter <= 0.0 or celerity <= 0.0:
+                raise ValueError(f"{pipe.get('name')}: length, diameter and celerity must be positive numbers.")
+
+            manning_n = safe_float(pipe.get("manning_n"), 0.012)
+            self.conduits.append({
+                "name": pipe.get("name"),
+                "up": self.node_index[upstream],
+                "down": self.node_index[downstream],
+                "length": length,
+                "diameter": diameter,
+                "celerity": celerity,
+                "friction": darcy_from_manning(manning_n, diameter, self.gravity),
+            })
+
+        if not self.conduits:
+            raise ValueError("The project has no connected pipes to simulate.")
+
+
+class SimulationResult:
+    """Output of a native solver run, read back lazily from its history store."""
+
+    def __init__(self, store: HistoryStore, warnings: Optional[List[str]] = None):
+        self.store = store
+        # Network and discretisation notes of the run, for the caller to report
+        self.warnings = warnings or []
+        self.channel_names = store.channel_names
+        self.index = store.index
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.store.times
+
+    def channel(self, name: str) -> np.ndarray:
+        """Return the history of a single recorded channel, e.g. "SurgeTank_1.ELEV"."""
+        return self.store.channel(name)
+
+    def envelope(self) -> Dict[str, tuple]:
+        """Maximum and minimum of every channel with the times they occur, at every computational step."""
+        return self.store.envelope()
+
+
+class MOCSolver:
+    """
+    Method of characteristics transient solver.
+
+    Interior points of all conduits are stored in one flat array and updated
+    with vectorised numpy expressions. Boundary nodes are solved together
+    through their Thevenin form H = H0 - Z * Qext, which lets junctions,
+    reservoirs, surge tanks and valve / turbine orifices share one code path
+    per time step. Turbines are coupled to a TurbineGovernors bank that sets
+    their gate opening each step.
+
+    With a cavitation model enabled, interior points carry separate upstream
+    (`Qu`) and downstream (`Q`) side flows and a cavity volume, following the
+    discrete vapour (DVCM) or discrete gas (DGCM) cavity model. Junction
+    nodes between conduits (including valve and turbine sides) use a vapour
+    cavity whichever model is selected.
+    """
+
+    def __init__(self, network: Network, dt: Optional[float] = None):
+        self.network = network
+        # Segment counts and the time step come from the discretisation planner
+        self.plan = plan_discretisation(network.conduits, network.simulation_properties, dt or network.dt)
+        if not self.plan.within_tolerance:
+            network.warnings.append(self.plan.report())
+        self.dt = self.plan.dt
+        g = network.gravity
+        dt = self.dt
+
+        self.node_kind = np.array(network.node_kind)
+        self.node_head = np.array(network.node_head, dtype=float)
+        self.node_area = np.array(network.node_area, dtype=float)
+        throttle = np.array(network.node_throttle, dtype=float).reshape(-1, 3)
+        self.throttle_kin, self.throttle_kout, self.throttle_ao = throttle.T
+        self.n_nodes = len(network.node_names)
+
+        # Flat computational grid over all conduits
+        segments = np.array([self.plan.segments(c["name"]) for c in network.conduits])
+        lengths = np.array([c["length"] for c in network.conduits])
+        diameters = np.array([c["diameter"] for c in network.conduits])
+        friction = np.array([c["friction"] for c in network.conduits])
+        areas = math.pi * diameters ** 2 / 4.0
+        self.celerity = lengths / (segments * dt)
+        self.segments = segments
+
+        points = segments + 1
+        self.first = np.concatenate(([0], np.cumsum(points)[:-1]))
+        self.last = self.first + segments
+        n_points = int(points.sum())
+        owner = np.repeat(np.arange(len(segments)), points)
+
+        self.B = (self.celerity / (g * areas))[owner]
+        self.R = (friction * (lengths / segments) / (2.0 * g * diameters * areas ** 2))[owner]
+        interior = np.ones(n_points, dtype=bool)
+        interior[self.first] = False
+        interior[self.last] = False
+        self.interior = np.flatnonzero(interior)
+        self.up_node = np.array([c["up"] for c in network.conduits])
+        self.down_node = np.array([c["down"] for c in network.conduits])
+        self.conduit_resistance = friction * lengths / (2.0 * g * diameters * areas ** 2)
+
+        # Pipe profile interpolated between the elevations of the end nodes
+        node_elevation = np.array(network.node_elevation, dtype=float)
+        position = np.arange(n_points) - self.first[owner]
+        fraction = position / segments[owner]
+        self.elevation = ((1.0 - fraction) * node_elevation[self.up_node[owner]]
+                          + fraction * node_elevation[self.down_node[owner]])
+        self.reach_volume = (areas * lengths / segments)[owner]
+
+        # Sum of 1/B at every node is constant for the whole run
+        self.SB = (
+            np.bincount(self.down_node, 1.0 / self.B[self.last], self.n_nodes)
+            + np.bincount(self.up_node, 1.0 / self.B[self.first], self.n_nodes)
+        )
+
+        self._setup_links()
+        self.H = np.zeros(n_points)
+        self.Q = np.zeros(n_points)
+        self.cavitation = network.cavitation
+        if self.cavitation:
+            vapour_head = (network.vapour_pressure - network.atmospheric_pressure) / (network.rho * g)
+            self.vapour_head = self.elevation + vapour_head
+            self.Qu = np.zeros(n_points)
+            self.cavity = np.zeros(n_points)
+            self.node_vapour_head = node_elevation + vapour_head
+            self.cavity_nodes = (self.node_kind == JUNCTION) & (self.SB > 0.0)
+            self.node_cavity = np.zeros(self.n_nodes)
+        else:
+            # Without cavities both sides of a point carry the same flow
+            self.Qu = self.Q
+        self.CP = np.zeros(n_points)
+        self.CM = np.zeros(n_points)
+
+        # Points read by `sample`, fixed for the whole run
+        self.named_nodes = np.array([i for i, n in enumerate(network.node_names) if "/" not in n], dtype=int)
+        self.tank_nodes = np.flatnonzero(self.node_kind == TANK)
+        self.cavity_node_index = np.flatnonzero(self.cavity_nodes) if self.cavitation else np.zeros(0, dtype=int)
+
+    def _setup_links(self):
+        links = self.network.links
+        self.link_up = np.array([l["up"] for l in links], dtype=int)
+        self.link_down = np.array([l["down"] for l in links], dtype=int)
+        self.link_tail = np.array([l["tail"] for l in links], dtype=float)
+        self.link_has_down = self.link_down >= 0
+        self.link_cv = np.zeros(len(links))
+
+        g = self.network.gravity
+        self.valve_links = np.array([i for i, l in enumerate(links) if l["class"] == "Valve"], dtype=int)
+        self.valve_tables = []
+        self.valve_cv_full = np.zeros(len(self.valve_links))
+        for k, i in enumerate(self.valve_links):
+            data = links[i]["data"]
+            area = math.pi * safe_float(data.get("diameter")) ** 2 / 4.0
+            loss = max(safe_float(data.get("loss_coefficient")), 1e-3)
+            self.valve_cv_full[k] = area * math.sqrt(2.0 * g / loss)
+            self.valve_tables.append(normalise_gate_table(data.get("custom_values")))
+
+        self.turbine_links = np.array([i for i, l in enumerate(links) if l["class"] == "Turbine"], dtype=int)
+        turbines = [links[i]["data"] for i in self.turbine_links]
+        self.turbine_qo = np.array([safe_float(t.get("qo")) for t in turbines])
+        self.turbine_cv_steady = np.zeros(len(turbines))
+        self.governors = TurbineGovernors(turbines, self.network.rho, g)
+        self.characteristics = TurbineCharacteristics(turbines, self.network.rho, g)
+
+    def valve_opening(self, t: float) -> np.ndarray:
+        """Relative opening of every valve from its t - y schedule."""
+        opening = np.ones(len(self.valve_links))
+        for k, table in enumerate(self.valve_tables):
+            if len(table):
+                opening[k] = np.interp(t, table[:, 0], table[:, 1])
+        return opening
+
+    def _link_head_difference(self, node_heads):
+        downstream = np.where(self.link_has_down, node_heads[np.maximum(self.link_down, 0)], self.link_tail)
+        return node_heads[self.link_up] - downstream
+
+    def steady_state(self, iterations: int = 50, tolerance: float = 1e-8):
+        """
+        Solve the initial steady flow with Newton iterations on the network.
+
+        Conduits and valves are quadratic resistances, surge tanks are
+        junctions, and turbines withdraw their rated discharge `qo`. The
+        resulting head across each turbine fixes its rated orifice coefficient.
+        """
+        n = self.n_nodes
+        fixed_nodes = self.node_kind == FIXED_HEAD
+
+        # Link list for the steady solve: conduits, then valves
+        valve_up = self.link_up[self.valve_links]
+        valve_down = self.link_down[self.valve_links]
+        valve_cv = self.valve_cv_full * self.valve_opening(0.0)
+        terminal = valve_down < 0
+        tail_nodes = n + np.arange(int(terminal.sum()))
+        valve_down = valve_down.copy()
+        valve_down[terminal] = tail_nodes
+
+        up = np.concatenate((self.up_node, valve_up))
+        down = np.concatenate((self.down_node, valve_down))
+        resistance = np.concatenate((
+            self.conduit_resistance,
+            np.where(valve_cv > 0.0, 1.0 / np.maximum(valve_cv, 1e-12) ** 2, 1e12),
+        ))
+        total = n + len(tail_nodes)
+        heads = np.zeros(total)
+        heads[:n] = np.where(fixed_nodes, self.node_head, 0.0)
+        heads[tail_nodes] = self.link_tail[self.valve_links][terminal]
+        known = np.concatenate((fixed_nodes, np.ones(len(tail_nodes), dtype=bool)))
+        unknown = np.flatnonzero(~known)
+
+        demand = np.zeros(total)
+        turbine_up = self.link_up[self.turbine_links]
+        turbine_down = self.link_down[self.turbine_links]
+        np.add.at(demand, turbine_up, self.turbine_qo)
+        has_down = turbine_down >= 0
+        np.add.at(demand, turbine_down[has_down], -self.turbine_qo[has_down])
+
+        # Continuity matrix: +1 where a link enters a node, -1 where it leaves
+        incidence = np.zeros((total, len(up)))
+        incidence[down, np.arange(len(up))] = 1.0
+        incidence[up, np.arange(len(up))] = -1.0
+        M = incidence[unknown]
+
+        flow = np.full(len(up), 1e-3)
+        if len(unknown) and known.any():
+            heads[unknown] = heads[known].mean()
+        for _ in range(iterations):
+            f1 = resistance * flow * np.abs(flow) + incidence.T @ heads
+            f2 = M @ flow - demand[unknown]
+            slope = np.maximum(2.0 * resistance * np.abs(flow), 1e-9)
+            if len(unknown):
+                lhs = (M / slope) @ M.T
+                rhs = f2 - M @ (f1 / slope)
+                dh = np.linalg.lstsq(lhs, rhs, rcond=None)[0]
+                heads[unknown] += dh
+                dq = -(f1 + M.T @ dh) / slope
+            else:
+                dq = -f1 / slope
+            flow += dq
+            if np.abs(dq).max() < tolerance:
+                break
+
+        node_heads = heads[:n]
+        conduit_flow = flow[:len(self.up_node)]
+
+        # Linear head grade and uniform flow along each conduit
+        for c, (start, end) in enumerate(zip(self.first, self.last)):
+            self.H[start:end + 1] = np.linspace(node_heads[self.up_node[c]], node_heads[self.down_node[c]], end - start + 1)
+            self.Q[start:end + 1] = conduit_flow[c]
+        if self.cavitation:
+            self.Qu[:] = self.Q
+            self.cavity[:] = 0.0
+            self.node_cavity[:] = 0.0
+            # Free gas at the steady pressure, DGCM only (DVCM has none)
+            gas_head = np.maximum(self.H - self.vapour_head, 1e-3)
+            self.gas_constant = (self.network.gas_fraction * self.reach_volume * gas_head
+                                 if self.cavitation == "DGCM" else np.zeros_like(self.H))
+            self.cavity[self.interior] = self.gas_constant[self.interior] / gas_head[self.interior]
+
+        self.node_heads = node_heads.copy()
+        self.tank_level = node_heads.copy()
+        self.tank_flow = np.zeros(n)
+
+        self.link_flow = np.zeros(len(self.network.links))
+        self.link_flow[self.valve_links] = flow[len(self.up_node):]
+        self.link_flow[self.turbine_links] = self.turbine_qo
+        self.link_cv[self.valve_links] = valve_cv
+
+        net_head = self._link_head_difference(node_heads)[self.turbine_links]
+        for k, i in enumerate(self.turbine_links):
+            if self.turbine_qo[k] > 0.0 and net_head[k] <= 0.0:
+                raise ValueError(f"{self.network.links[i]['name']}: steady net head is not positive, check reservoir levels.")
+        self.turbine_cv_steady = np.where(
+            self.turbine_qo > 0.0, self.turbine_qo / np.sqrt(np.maximum(net_head, 1e-9)), 0.0
+        )
+        governors = self.governors
+        governors.reset()
+        governors.initialise(self.turbine_qo, net_head)
+        self.characteristics.initialise(net_head, governors.gate, governors.omega, governors.power_rated)
+        self.link_cv[self.turbine_links] = self.turbine_cv_steady
+        self.step_index = 0
+        self.t = 0.0
+
+    def step(self):
+        """Advance the whole network by one time step."""
+        dt = self.dt
+        H, Q, Qu, B, R = self.H, self.Q, self.Qu, self.B, self.R
+        CP, CM = self.CP, self.CM
+        g = self.network.gravity
+
+        # Characteristic invariants carried from the neighbouring points
+        CP[1:] = H[:-1] + B[:-1] * Q[:-1] - R[:-1] * Q[:-1] * np.abs(Q[:-1])
+        CM[:-1] = H[1:] - B[1:] * Qu[1:] + R[1:] * Qu[1:] * np.abs(Qu[1:])
+
+        i = self.interior
+        H[i] = 0.5 * (CP[i] + CM[i])
+        Q[i] = (CP[i] - CM[i]) / (2.0 * B[i])
+        if self.cavitation:
+            self._cavity_step(i)
+
+        # Thevenin form of every node: H = H0 - Z * Qext
+        first, last = self.first, self.last
+        SC = (
+            np.bincount(self.down_node, CP[last] / B[last], self.n_nodes)
+            + np.bincount(self.up_node, CM[first] / B[first], self.n_nodes)
+        )
+        SB = self.SB
+        safe_SB = np.where(SB > 0.0, SB, 1.0)
+        H0 = np.where(SB > 0.0, SC / safe_SB, self.node_heads)
+        Z = np.where(SB > 0.0, 1.0 / safe_SB, 0.0)
+
+        tanks = self.node_kind == TANK
+        if tanks.any():
+            area = np.where(tanks, self.node_area, 1.0)
+            k_loss = np.where(self.tank_flow >= 0.0, self.throttle_kin, self.throttle_kout)
+            ao = np.where(self.throttle_ao > 0.0, self.throttle_ao, 1.0)
+            throttle = np.where(self.throttle_ao > 0.0, k_loss * np.abs(self.tank_flow) / (2.0 * g * ao ** 2), 0.0)
+            G = dt / (2.0 * area) + throttle
+            level = self.tank_level + dt / (2.0 * area) * self.tank_flow
+            H0 = np.where(tanks, (level + G * SC) / (1.0 + G * SB), H0)
+            Z = np.where(tanks, G / (1.0 + G * SB), Z)
+
+        fixed = self.node_kind == FIXED_HEAD
+        H0 = np.where(fixed, self.node_head, H0)
+        Z = np.where(fixed, 0.0, Z)
+
+        self.step_index += 1
+        self.t = self.step_index * dt
+        if len(self.valve_links):
+            self.link_cv[self.valve_links] = self.valve_cv_full * self.valve_opening(self.t)
+
+        # Orifice links (valves and turbines) between two Thevenin nodes
+        qext = np.zeros(self.n_nodes)
+        if len(self.link_up):
+            down = np.maximum(self.link_down, 0)
+            E = H0[self.link_up] - np.where(self.link_has_down, H0[down], self.link_tail)
+            W = Z[self.link_up] + np.where(self.link_has_down, Z[down], 0.0)
+            cv = self.link_cv
+            magnitude = np.abs(E)
+            denominator = W * cv + np.sqrt((W * cv) ** 2 + 4.0 * magnitude)
+            flow = np.sign(E) * 2.0 * magnitude * cv / np.where(denominator > 0.0, denominator, 1.0)
+            self.link_flow = flow
+            qext += np.bincount(self.link_up, flow, self.n_nodes)
+            qext -= np.bincount(down[self.link_has_down], flow[self.link_has_down], self.n_nodes)
+
+        node_heads = H0 - Z * qext
+        if self.cavitation:
+            node_heads = self._node_cavity_step(node_heads, SC, qext)
+        self.node_heads = node_heads
+
+        if tanks.any():
+            tank_flow = SC - node_heads * SB - qext
+            self.tank_level = np.where(
+                tanks, self.tank_level + dt / (2.0 * area) * (self.tank_flow + tank_flow), node_heads
+            )
+            self.tank_flow = np.where(tanks, tank_flow, 0.0)
+
+        H[last] = node_heads[self.down_node]
+        Q[last] = (CP[last] - H[last]) / B[last]
+        H[first] = node_heads[self.up_node]
+        Q[first] = (H[first] - CM[first]) / B[first]
+        if self.cavitation:
+            Qu[last] = Q[last]
+            Qu[first] = Q[first]
+
+        if len(self.turbine_links):
+            net_head = self._link_head_difference(node_heads)[self.turbine_links]
+            governors = self.governors
+            _, torque = self.characteristics.evaluate(net_head, governors.gate, governors.omega)
+            gate = governors.advance(self.t, dt, self.link_flow[self.turbine_links], net_head, torque)
+            # Hill-chart discharge at the new gate and speed sets the orifice for the next step
+            flow_ratio, _ = self.characteristics.evaluate(net_head, gate, governors.omega)
+            self.link_cv[self.turbine_links] = self.turbine_cv_steady * flow_ratio
+
+    def _cavity_step(self, i: np.ndarray):
+        """
+        Apply the cavity model to the interior points i after the liquid update.
+
+        Args:
+            i: Indices of the interior points
+        """
+        dt = self.dt
+        CP, CM, B = self.CP[i], self.CM[i], self.B[i]
+        vapour = self.vapour_head[i]
+        cavity = self.cavity[i]
+
+        if self.cavitation == "DVCM":
+            liquid_head = 0.5 * (CP + CM)
+            cavitating = (liquid_head < vapour) | (cavity > 0.0)
+            head = np.where(cavitating, vapour, liquid_head)
+            upstream = (CP - head) / B
+            downstream = (head - CM) / B
+            volume = np.where(cavitating, cavity + dt * (downstream - upstream), 0.0)
+            # Collapsed cavities rejoin the liquid column
+            collapsed = volume <= 0.0
+            head = np.where(collapsed, liquid_head, head)
+            liquid_flow = (CP - CM) / (2.0 * B)
+            upstream = np.where(collapsed, liquid_flow, upstream)
+            downstream = np.where(collapsed, liquid_flow, downstream)
+            volume = np.maximum(volume, 0.0)
+        else:
+            # Gas volume C3 / Hp and continuity give K * Hp^2 + D0 * Hp - C3 = 0
+            C3 = self.gas_constant[i]
+            K = 2.0 * dt / B
+            D0 = cavity + dt * (2.0 * vapour - CP - CM) / B
+            root = np.sqrt(D0 ** 2 + 4.0 * K * C3)
+            gas_head = np.where(D0 > 0.0, 2.0 * C3 / np.maximum(D0 + root, 1e-300), (root - D0) / (2.0 * K))
+            gas_head = np.maximum(gas_head, 1e-12)
+            head = vapour + gas_head
+            volume = C3 / gas_head
+            upstream = (CP - head) / B
+            downstream = (head - CM) / B
+
+        self.H[i] = head
+        self.Qu[i] = upstream
+        self.Q[i] = downstream
+        self.cavity[i] = volume
+
+    def _node_cavity_step(self, node_heads: np.ndarray, SC: np.ndarray, qext: np.ndarray) -> np.ndarray:
+        """Clamp junction heads at vapour pressure and track their cavity volumes."""
+        vapour = self.node_vapour_head
+        inflow = SC - vapour * self.SB - qext
+        cavitating = self.cavity_nodes & ((node_heads < vapour) | (self.node_cavity > 0.0))
+        volume = np.where(cavitating, self.node_cavity - self.dt * inflow, 0.0)
+        cavitating &= volume > 0.0
+        self.node_cavity = np.where(cavitating, volume, 0.0)
+        return np.where(cavitating, vapour, node_heads)
+
+    def channel_names(self) -> List[str]:
+        """Names of the channels returned by `sample`, in order."""
+        network = self.network
+        names = [f"{network.node_names[i]}.HEAD" for i in self.named_nodes]
+        names += [f"{c['name']}.Q" for c in network.conduits]
+        names += [f"{network.node_names[i]}.ELEV" for i in self.tank_nodes]
+        names += [f"{network.node_names[i]}.Q" for i in self.tank_nodes]
+        names += [f"{l['name']}.Q" for l in network.links]
+        turbine_names = [network.links[i]["name"] for i in self.turbine_links]
+        for quantity in ("GATE", "SPEED", "POWER"):
+            names += [f"{name}.{quantity}" for name in turbine_names]
+        if self.cavitation:
+            owner = np.repeat(np.arange(len(network.conduits)), self.segments + 1)
+            position = np.arange(len(self.H)) - self.first[owner]
+            names += [f"{network.conduits[owner[k]]['name']}.CAVITY{position[k]}" for k in self.interior]
+            names += [f"{network.node_names[k]}.CAVITY" for k in self.cavity_node_index]
+        return names
+
+    def sample(self) -> np.ndarray:
+        """Current value of every channel listed by `channel_names`."""
+        governors = self.governors
+        cavities = (np.concatenate((self.cavity[self.interior], self.node_cavity[self.cavity_node_index]))
+                    if self.cavitation else np.zeros(0))
+        return np.concatenate((
+            self.node_heads[self.named_nodes],
+            self.Q[self.first],
+            self.tank_level[self.tank_nodes],
+            self.tank_flow[self.tank_nodes],
+            self.link_flow,
+            governors.gate,
+            governors.speed_rpm(),
+            governors.power_mech,
+            cavities,
+        ))
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Arrays that fully describe the solver between two steps, for checkpoints."""
+        governors = self.governors
+        characteristics = self.characteristics
+        state = {
+            "step_index": np.array([self.step_index], dtype=float),
+            "H": self.H,
+            "Q": self.Q,
+            "node_heads": self.node_heads,
+            "tank_level": self.tank_level,
+            "tank_flow": self.tank_flow,
+            "link_flow": self.link_flow,
+            "link_cv": self.link_cv,
+            "turbine_cv_steady": self.turbine_cv_steady,
+            "omega": governors.omega,
+            "gate": governors.gate,
+            "gate_initial": governors.gate_initial,
+            "integral": governors.integral,
+            "error_prev": governors.error_prev,
+            "power_rated": governors.power_rated,
+            "power_mech": governors.power_mech,
+        }
+        for name in ("head0", "omega0", "torque_rated", "n11_0", "flow0", "torque0", "gate0"):
+            state[f"characteristics.{name}"] = getattr(characteristics, name)
+        if self.cavitation:
+            state["Qu"] = self.Qu
+            state["cavity"] = self.cavity
+            state["node_cavity"] = self.node_cavity
+            state["gas_constant"] = self.gas_constant
+        return state
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """Restore arrays produced by `state`, continuing from their time step."""
+        self.step_index = int(state["step_index"][0])
+        self.t = self.step_index * self.dt
+        # The grid arrays are updated in place, Qu may alias Q
+        self.H[:] = state["H"]
+        self.Q[:] = state["Q"]
+        for name in ("node_heads", "tank_level", "tank_flow", "link_flow", "link_cv", "turbine_cv_steady"):
+            setattr(self, name, np.array(state[name]))
+        for name in ("omega", "gate", "gate_initial", "integral", "error_prev", "power_rated", "power_mech"):
+            setattr(self.governors, name, np.array(state[name]))
+        for name in ("head0", "omega0", "torque_rated", "n11_0", "flow0", "torque0", "gate0"):
+            setattr(self.characteristics, name, np.array(state[f"characteristics.{name}"]))
+        if self.cavitation:
+            self.Qu[:] = state["Qu"]
+            self.cavity = np.array(state["cavity"])
+            self.node_cavity = np.array(state["node_cavity"])
+            self.gas_constant = np.array(state["gas_constant"])
+
+    def signature(self) -> Dict:
+        """Description of the network layout a checkpoint must match."""
+        return {
+            "nodes": self.network.node_names,
+            "conduits": [c["name"] for c in self.network.conduits],
+            "segments": self.segments.tolist(),
+            "dt": self.dt,
+            "cavitation": self.cavitation,
+        }
+
+    def run(self, t_max: Optional[float] = None, checkpoint_path: Optional[str] = None,
+            checkpoint_times: Optional[List[float]] = None, restart_path: Optional[str] = None,
+            restart_time: Optional[float] = None, history_path: Optional[str] = None,
+            history_channels: Optional[List[str]] = None, chunk_rows: int = 4096) -> SimulationResult:
+        """
+        Run the transient from the steady state, or from a checkpoint, up to t_max.
+
+        The channels of the HISTORY request (simulation_properties
+        "history_channels", all channels when empty) are streamed to a
+        columnar store every DTOUT ("dtout", default 0.1 s). Envelopes cover
+        all channels at every computational step.
+
+        Args:
+            t_max: End of the simulation [s], defaults to the project's simulation_time
+            checkpoint_path: .npy file receiving snapshots at checkpoint_times
+            checkpoint_times: Times at which to store the solver state [s]
+            restart_path: Checkpoint file to start from instead of the steady state
+            restart_time: Restart from the latest snapshot at or before this time [s]
+            history_path: Directory of the history store, a new one in the results directory by default
+            history_channels: Overrides the HISTORY request of the project, [] for envelopes only
+            chunk_rows: Output rows buffered in memory between two flushes
+
+        Returns:
+            SimulationResult reading the history store of this run
+        """
+        props = self.network.simulation_properties
+        t_max = self.network.t_max if t_max is None else t_max
+        n_steps = int(round(t_max / self.dt))
+        stride = max(1, int(round(safe_float(props.get("dtout"), 0.1) / self.dt)))
+
+        self.steady_state()
+        if restart_path:
+            restore(self, restart_path, restart_time)
+        start = self.step_index
+
+        checkpoints = None
+        targets = {}
+        if checkpoint_path and checkpoint_times:
+            checkpoints = CheckpointWriter(checkpoint_path, checkpoint_times, self.state(), self.signature())
+            targets = {int(round(t / self.dt)): i for i, t in enumerate(checkpoints.times)}
+
+        names = self.channel_names()
+        if history_channels is None:
+            selected = select_channels(names, props.get("history_channels"))
+        else:
+            # An explicit empty list keeps the envelopes only
+            selected = select_channels(names, history_channels) if history_channels else []
+        history = HistoryWriter(history_path or default_history_path(), names, selected, chunk_rows)
+        values = self.sample()
+        history.update_envelope(self.t, values)
+        history.record(self.t, values)
+        try:
+            for n in range(start + 1, n_steps + 1):
+                self.step()
+                values = self.sample()
+                history.update_envelope(self.t, values)
+                if n % stride == 0:
+                    history.record(self.t, values)
+                if n in targets:
+                    checkpoints.write(targets[n], self.state())
+        finally:
+            history.close()
+            if checkpoints:
+                checkpoints.close()
+
+        return SimulationResult(HistoryStore(history.path), list(self.network.warnings))
+
+
+def run_project_transient(project_data: Dict, t_max: Optional[float] = None, **run_options) -> SimulationResult:
+    """
+    Build the network of a loaded project and run the native transient solver
+
+    Args:
+        project_data: Project JSON content
+        t_max: Optional override of the simulation length [s]
+        **run_options: Checkpoint and restart options passed to MOCSolver.run
+
+    Returns:
+        SimulationResult of the run
+    """
+    elements, simulation_properties = project_elements(project_data)
+    network = Network(elements, simulation_properties)
+    return MOCSolver(network).run(t_max, **run_options)
+
+
+def run_project_file(file_path: str, t_max: Optional[float] = None, **run_options) -> SimulationResult:
+    """Load a project JSON file and run it through the native solver."""
+    with open(file_path, 'r') as file:
+        return run_project_transient(json.load(file), t_max, **run_options)
+
+
+def batch_elements(element_sets: List[List[Dict]]) -> List[Dict]:
+    """
+    Combine variants of a project into one network of disconnected copies
+
+    Element names become "<variant>|<name>", so one solver run integrates all
+    variants with the same vectorised step.
+
+    Args:
+        element_sets: Element lists of the variants (same topology)
+
+    Returns:
+        Combined element list
+    """
+    combined = []
+    for k, elements in enumerate(element_sets):
+        for element in elements:
+            variant = dict(element)
+            for field in ("name", "inlet_element", "outlet_element"):
+                if element.get(field):
+                    variant[field] = f"{k}{BATCH_SEPARATOR}{element[field]}"
+            combined.append(variant)
+    return combined
+
+
+def run_batch(element_sets: List[List[Dict]], simulation_properties: Dict,
+              t_max: Optional[float] = None, history_path: Optional[str] = None) -> List[Dict[str, tuple]]:
+    """
+    Run several variants of a project in one batched solver call
+
+    Args:
+        element_sets: Element lists of the variants
+        simulation_properties: Shared simulation properties
+        t_max: Optional simulation length override [s]
+        history_path: Optional directory for the (envelope only) history store
+
+    Returns:
+        Envelope of each variant, keyed by the original channel names
+    """
+    network = Network(batch_elements(element_sets), simulation_properties)
+    with tempfile.TemporaryDirectory(prefix="airavata_batch_") as temporary:
+        result = MOCSolver(network).run(t_max, history_path=history_path or temporary, history_channels=[])
+        envelope = result.envelope()
+
+    envelopes = [{} for _ in element_sets]
+    for name, values in envelope.items():
+        variant, channel = name.split(BATCH_SEPARATOR, 1)
+        envelopes[int(variant)][channel] = values
+    return envelopes
@@ -0,0 +1,200 @@
+import copy
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from Word_tasks import safe_float
+from moc_solver import project_elements, run_batch
+
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile for many channels at once (P-square
+    algorithm of Jain and Chlamtac).
+
+    Five markers per channel are adjusted as observations arrive, so memory
+    stays constant whatever the number of samples.
+    """
+
+    def __init__(self, p: float, channels: int):
+        self.p = p
+        self.count = 0
+        self.buffer = np.empty((5, channels))
+        self.q = None
+        self.n = None
+        self.desired = np.array([0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0])
+        self.increment = np.array([0.0, p / 2, p, (1 + p) / 2, 1.0])
+
+    def add(self, x: np.ndarray):
+        """Add one observation per channel."""
+        if self.count < 5:
+            self.buffer[self.count] = x
+            self.count += 1
+            if self.count == 5:
+                self.q = np.sort(self.buffer, axis=0).T.copy()
+                self.n = np.tile(np.arange(5.0), (self.q.shape[0], 1))
+            return
+
+        self.count += 1
+        q, n = self.q, self.n
+        q[:, 0] = np.minimum(q[:, 0], x)
+        q[:, 4] = np.maximum(q[:, 4], x)
+        k = (x[:, None] >= q[:, 1:4]).sum(axis=1)
+        n += np.arange(5)[None, :] > k[:, None]
+        self.desired += self.increment
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[:, i]
+            move = ((d >= 1) & (n[:, i + 1] - n[:, i] > 1)) | ((d <= -1) & (n[:, i - 1] - n[:, i] < -1))
+            if not move.any():
+                continue
+            step = np.sign(d)
+            parabolic = q[:, i] + step / (n[:, i + 1] - n[:, i - 1]) * (
+                (n[:, i] - n[:, i - 1] + step) * (q[:, i + 1] - q[:, i]) / (n[:, i + 1] - n[:, i])
+                + (n[:, i + 1] - n[:, i] - step) * (q[:, i] - q[:, i - 1]) / (n[:, i] - n[:, i - 1])
+            )
+            neighbour = np.where(step > 0, i + 1, i - 1)
+            rows = np.arange(len(q))
+            linear = q[:, i] + step * (q[rows, neighbour] - q[:, i]) / (n[rows, neighbour] - n[:, i])
+            inside = (q[:, i - 1] < parabolic) & (parabolic < q[:, i + 1])
+            q[:, i] = np.where(move, np.where(inside, parabolic, linear), q[:, i])
+            n[:, i] += np.where(move, step, 0.0)
+
+    def value(self) -> np.ndarray:
+        """Current quantile estimate of every channel."""
+        if self.count < 5:
+            return np.quantile(self.buffer[:self.count], self.p, axis=0)
+        return self.q[:, 2].copy()
+
+
+def latin_hypercube(samples: int, dimensions: int, rng: np.random.Generator) -> np.ndarray:
+    """Stratified uniform samples in [0, 1), shape (samples, dimensions)."""
+    strata = np.argsort(rng.random((samples, dimensions)), axis=0)
+    return (strata + rng.random((samples, dimensions))) / samples
+
+
+def _head_envelopes(element_sets: List[List[Dict]], simulation_properties: Dict,
+                    t_max: Optional[float]) -> List[Dict[str, tuple]]:
+    # Runs in a worker process; only the head channels travel back
+    envelopes = run_batch(element_sets, simulation_properties, t_max)
+    return [{k: v for k, v in env.items() if k.endswith(".HEAD")} for env in envelopes]
+
+
+class MonteCarloStudy:
+    """
+    Uncertainty propagation of conduit wave speed and friction.
+
+    Each conduit's celerity and Manning n are scaled by factors drawn with
+    Latin hypercube sampling within +/- the given spreads. Samples run in
+    groups through the batched solver, optionally spread over worker
+    processes, and the maximum and minimum head of every node are folded
+    into streaming quantile sketches as each group finishes. Groups are
+    built only when a worker is free for them, so memory does not grow with
+    the sample count beyond the stratum permutation of the design.
+    """
+
+    def __init__(self, project_data: Dict, samples: int = 64, celerity_spread: float = 0.15,
+                 friction_spread: float = 0.2, quantiles: Sequence[float] = (0.05, 0.5, 0.95),
+                 batch_size: int = 16, workers: Optional[int] = None, t_max: Optional[float] = None,
+                 seed: int = 0):
+        self.elements, self.simulation_properties = project_elements(project_data)
+        self.pipes = [e for e in self.elements if e.get("class") == "Pipe"]
+        self.samples = samples
+        self.celerity_spread = celerity_spread
+        self.friction_spread = friction_spread
+        self.quantiles = list(quantiles)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.t_max = t_max
+        self.rng = np.random.default_rng(seed)
+
+        self.channels = None
+        self.sketches = {}
+        self.completed = 0
+
+    def design_groups(self) -> Iterator[np.ndarray]:
+        """
+        Latin hypercube scale factors, generated one group of batch_size samples at a time
+
+        Only the stratum of every sample and dimension (int32) is drawn up
+        front; the factors themselves are made when a group is requested.
+
+        Yields:
+            Arrays of shape (group samples, conduits, 2) holding (celerity factor, friction factor)
+        """
+        dimensions = 2 * len(self.pipes)
+        strata = np.empty((self.samples, dimensions), dtype=np.int32)
+        for d in range(dimensions):
+            strata[:, d] = self.rng.permutation(self.samples)
+        spread = np.array([self.celerity_spread, self.friction_spread])
+        for start in range(0, self.samples, self.batch_size):
+            rows = strata[start:start + self.batch_size]
+            unit = (rows + self.rng.random(rows.shape)) / self.samples
+            yield 1.0 + (2.0 * unit.reshape(len(rows), len(self.pipes), 2) - 1.0) * spread
+
+    def design(self) -> np.ndarray:
+        """
+        Scale factors per sample and conduit, shape (samples, conduits, 2)
+        holding (celerity factor, friction factor).
+        """
+        return np.concatenate(list(self.design_groups()))
+
+    def variant(self, factors: np.ndarray) -> List[Dict]:
+        """Element list with the conduit properties scaled by one sample's factors."""
+        elements = copy.deepcopy(self.elements)
+        scaled = {pipe["name"]: f for pipe, f in zip(self.pipes, factors)}
+        for element in elements:
+            if element.get("name") in scaled and element.get("class") == "Pipe":
+                celerity_factor, friction_factor = scaled[element["name"]]
+                element["celerity"] = str(safe_float(element.get("celerity")) * celerity_factor)
+                element["manning_n"] = str(safe_float(element.get("manning_n"), 0.012) * friction_factor)
+        return elements
+
+    def _accumulate(self, envelopes: List[Dict[str, tuple]]):
+        for envelope in envelopes:
+            if self.channels is None:
+                self.channels = sorted(envelope)
+                for kind in ("max", "min"):
+                    for p in self.quantiles:
+                        self.sketches[(kind, p)] = P2Quantile(p, len(self.channels))
+            values = np.array([envelope[c] for c in self.channels])
+            for (kind, p), sketch in self.sketches.items():
+                sketch.add(values[:, 0] if kind == "max" else values[:, 2])
+            self.completed += 1
+
+    def run(self) -> Dict[str, Dict]:
+        """
+        Run all samples.
+
+        Returns:
+            dict of node head channel -> {"max": {p: value}, "min": {p: value}}
+        """
+        groups = ([self.variant(f) for f in factors] for factors in self.design_groups())
+
+        if self.workers and self.workers > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                # Keep every worker busy with one group queued behind it, no more
+                pending = set()
+                for group in groups:
+                    pending.add(pool.submit(_head_envelopes, group, self.simulation_properties, self.t_max))
+                    if len(pending) >= 2 * self.workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._accumulate(future.result())
+                for future in wait(pending).done:
+                    self._accumulate(future.result())
+        else:
+            for group in groups:
+                self._accumulate(_head_envelopes(group, self.simulation_properties, self.t_max))
+        return self.bands()
+
+    def bands(self) -> Dict[str, Dict]:
+        """Current percentile bands of the node head envelopes."""
+        if self.channels is None:
+            return {}
+        values = {key: sketch.value() for key, sketch in self.sketches.items()}
+        return {
+            channel: {kind: {p: float(values[(kind, p)][i]) for p in self.quantiles} for kind in ("max", "min")}
+            for i, channel in enumerate(self.channels)
+        }
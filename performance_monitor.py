@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from tkinter import ttk
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+# Samples kept per series, e.g. two minutes at the default rate
+HISTORY_SAMPLES = 120
+# Sampling periods offered in the panel [s]
+SAMPLE_INTERVALS = ("0.25", "0.5", "1", "2", "5")
+DEFAULT_INTERVAL = 1.0
+# Period of the panel redraw and of the event-loop latency probe [ms]
+REFRESH_MS = 500
+PROBE_MS = 100
+
+SERIES = (
+    ("cpu", "CPU %", "#4fc3f7"),
+    ("memory", "Memory %", "#81c784"),
+    ("app_memory", "App memory MB", "#ffb74d"),
+    ("children_cpu", "Jobs CPU %", "#e57373"),
+    ("latency", "Event loop ms", "#ba68c8"),
+)
+
+
+def sparkline_points(values: List[float], width: int, height: int, low: Optional[float] = None,
+                     high: Optional[float] = None) -> List[float]:
+    """
+    Canvas coordinates of a sparkline, newest value at the right edge
+
+    Args:
+        values: Series, oldest first
+        width, height: Drawing area [px]
+        low, high: Value range, the range of the values by default
+
+    Returns:
+        Flat list x0, y0, x1, y1, ... (at least two points)
+    """
+    if not values:
+        return [0, height, width, height]
+    low = min(values) if low is None else low
+    high = max(values) if high is None else high
+    span = (high - low) or 1.0
+    step = width / max(HISTORY_SAMPLES - 1, 1)
+    start = width - step * (len(values) - 1)
+    points = []
+    for k, value in enumerate(values):
+        points += [start + k * step, height - 2 - (height - 4) * (min(max(value, low), high) - low) / span]
+    if len(points) == 2:
+        points += points
+    return points
+
+
+class SystemSampler:
+    """
+    Background thread sampling system and process usage.
+
+    Records CPU and memory of the machine, the memory of this process and
+    the CPU and memory of its child processes (WHAMO runs, solver pools and
+    sweep workers). The Tk thread reads snapshots and adds its own
+    event-loop latency; nothing here blocks it. Sampling failures go to
+    on_error, which is called on the sampler thread (print by default).
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, on_error: Optional[Callable[[str], None]] = None):
+        self.interval = interval
+        self.on_error = on_error or print
+        self.process = psutil.Process(os.getpid())
+        self.lock = threading.Lock()
+        self.series: Dict[str, deque] = {name: deque(maxlen=HISTORY_SAMPLES) for name, _, _ in SERIES}
+        self.children: List[Dict] = []
+        self.tracked: Dict[int, psutil.Process] = {}
+        self.stopping = threading.Event()
+        psutil.cpu_percent(None)  # The first call only sets the reference point
+        self.thread = threading.Thread(target=self._run, name="performance-sampler", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:  # Keep sampling, one failed sample must not freeze the panel
+                self.on_error(f"Performance sampling failed: {type(e).__name__}: {e}")
+
+    def sample(self):
+        """Take one sample of every series except the event-loop latency."""
+        cpu = psutil.cpu_percent(None)
+        memory = psutil.virtual_memory().percent
+        app_memory = self.process.memory_info().rss / 1e6
+
+        children = []
+        alive = {}
+        for child in self.process.children(recursive=True):
+            # Keep the Process objects, cpu_percent measures since the previous call on the same object
+            tracked = self.tracked.get(child.pid, child)
+            try:
+                with tracked.oneshot():
+                    children.append({"pid": tracked.pid, "name": tracked.name(),
+                                     "cpu": tracked.cpu_percent(None), "memory": tracked.memory_info().rss / 1e6})
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            alive[child.pid] = tracked
+        self.tracked = alive
+
+        with self.lock:
+            self.series["cpu"].append(cpu)
+            self.series["memory"].append(memory)
+            self.series["app_memory"].append(app_memory)
+            self.series["children_cpu"].append(sum(c["cpu"] for c in children))
+            self.children = sorted(children, key=lambda c: -c["cpu"])
+
+    def record_latency(self, milliseconds: float):
+        """Add an event-loop latency measurement taken on the Tk thread."""
+        with self.lock:
+            self.series["latency"].append(milliseconds)
+
+    def snapshot(self) -> tuple:
+        """Copies of all series and the child process list."""
+        with self.lock:
+            return {name: list(values) for name, values in self.series.items()}, list(self.children)
+
+    def stop(self):
+        self.stopping.set()
+
+
+class PerformancePanel:
+    """
+    Live performance panel, docked at the side of the main window or floating.
+
+    The widgets only read the sampler's snapshots every REFRESH_MS, and the
+    event-loop latency is the lateness of a PROBE_MS timer.
+    """
+
+    def __init__(self, root, dock_parent=None, before=None, on_close=None, on_error=None):
+        self.root = root
+        self.dock_parent = dock_parent or root
+        self.before = before
+        self.on_close = on_close
+        self.sampler = SystemSampler(on_error=on_error)
+        self.docked = True
+        self.container = None
+        self.jobs = []
+        self.build()
+        self.probe_time = time.perf_counter()
+        self.jobs.append(self.root.after(PROBE_MS, self.probe))
+        self.jobs.append(self.root.after(REFRESH_MS, self.refresh))
+
+    def build(self):
+        """Create the panel widgets in the dock or in a separate window."""
+        if self.docked:
+            self.container = tk.Frame(self.dock_parent, bg="#222", bd=1, relief=tk.SUNKEN)
+            options = {"side": tk.RIGHT, "fill": tk.Y, "padx": 5, "pady": 5}
+            if self.before is not None:
+                options["before"] = self.before
+            self.container.pack(**options)
+        else:
+            self.container = tk.Toplevel(self.root, bg="#222")
+            self.container.title("Performance Monitor")
+            self.container.protocol("WM_DELETE_WINDOW", self.close)
+
+        header = tk.Frame(self.container, bg="#222")
+        header.pack(fill=tk.X)
+        tk.Label(header, text="Performance", bg="#222", fg="white", font=("Segoe UI", 11, "bold")).pack(side=tk.LEFT, padx=5)
+        tk.Button(header, text="x", command=self.close, bg="#444", fg="white").pack(side=tk.RIGHT, padx=2)
+        tk.Button(header, text="Float" if self.docked else "Dock", command=self.toggle_dock,
+                  bg="#444", fg="white").pack(side=tk.RIGHT, padx=2)
+
+        rate = tk.Frame(self.container, bg="#222")
+        rate.pack(fill=tk.X, padx=5)
+        tk.Label(rate, text="Sample every (s):", bg="#222", fg="white").pack(side=tk.LEFT)
+        self.interval_var = tk.StringVar(value=f"{self.sampler.interval:g}")
+        tk.OptionMenu(rate, self.interval_var, *SAMPLE_INTERVALS, command=self.set_interval).pack(side=tk.LEFT)
+
+        self.lines = {}
+        self.values = {}
+        for name, title, colour in SERIES:
+            row = tk.Frame(self.container, bg="#222")
+            row.pack(fill=tk.X, padx=5, pady=2)
+            self.values[name] = tk.Label(row, text=f"{title}: -", bg="#222", fg=colour, width=22, anchor="w")
+            self.values[name].pack(anchor="w")
+            canvas = tk.Canvas(row, width=220, height=36, bg="#111", highlightthickness=0)
+            canvas.pack(anchor="w")
+            self.lines[name] = (canvas, canvas.create_line(0, 36, 220, 36, fill=colour, width=1.5))
+
+        tk.Label(self.container, text="Running jobs", bg="#222", fg="white").pack(anchor="w", padx=5, pady=(8, 0))
+        self.jobs_view = ttk.Treeview(self.container, columns=("pid", "name", "cpu", "memory"), show="headings", height=8)
+        for column, title, width in (("pid", "PID", 60), ("name", "Process", 100), ("cpu", "CPU %", 60), ("memory", "MB", 60)):
+            self.jobs_view.heading(column, text=title)
+            self.jobs_view.column(column, width=width, anchor="e" if column != "name" else "w")
+        self.jobs_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def set_interval(self, value):
+        self.sampler.interval = float(value)
+
+    def toggle_dock(self):
+        """Move the panel between the main window and its own window; the history is kept."""
+        self.container.destroy()
+        self.docked = not self.docked
+        self.build()
+
+    def probe(self):
+        """Measure how late the Tk event loop runs a timer."""
+        now = time.perf_counter()
+        self.sampler.record_latency(max((now - self.probe_time) * 1000 - PROBE_MS, 0.0))
+        self.probe_time = time.perf_counter()
+        self.jobs[0] = self.root.after(PROBE_MS, self.probe)
+
+    def refresh(self):
+        """Redraw the sparklines and the job list from the latest samples."""
+        series, children = self.sampler.snapshot()
+        for name, title, _ in SERIES:
+            values = series[name]
+            canvas, line = self.lines[name]
+            bounded = name in ("cpu", "memory")
+            canvas.coords(line, *sparkline_points(values, int(canvas.cget("width")), int(canvas.cget("height")),
+                                                 0.0 if bounded else None, 100.0 if bounded else None))
+            self.values[name].config(text=f"{title}: {values[-1]:.1f}" if values else f"{title}: -")
+
+        self.jobs_view.delete(*self.jobs_view.get_children())
+        for child in children:
+            self.jobs_view.insert("", tk.END, values=(child["pid"], child["name"], f"{child['cpu']:.0f}",
+                                                      f"{child['memory']:.0f}"))
+        self.jobs[1] = self.root.after(REFRESH_MS, self.refresh)
+
+    def close(self):
+        """Stop sampling and remove the panel."""
+        for job in self.jobs:
+            self.root.after_cancel(job)
+        self.sampler.stop()
+        self.container.destroy()
+        if self.on_close:
+            self.on_close()
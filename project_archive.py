@@ -0,0 +1,334 @@
+import json
+import os
+import struct
+import sys
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from autosave import atomic_write_json
+
+# File extension of binary projects
+BINARY_EXTENSION = ".apb"
+MAGIC = b"AIRAVATA"
+VERSION = 1
+# Magic, then version and compressed header length as little-endian uint32
+PREAMBLE = struct.Struct("<8sII")
+
+
+def is_binary_project(path: str) -> bool:
+    """True when a path names a binary project (by extension)."""
+    return path.lower().endswith(BINARY_EXTENSION)
+
+
+def _column_kind(values: list) -> str:
+    """Storage of a column: float64, int64, interned string or interned JSON text."""
+    if all(type(v) is float for v in values):
+        return "f8"
+    if all(type(v) is int and -2 ** 63 <= v < 2 ** 63 for v in values):
+        return "i8"
+    if all(type(v) is str for v in values):
+        return "s"
+    return "j"
+
+
+class _Strings:
+    """Interned strings of one section, so repeated text such as image paths is stored once."""
+
+    def __init__(self):
+        self.index = {}
+        self.items = []
+
+    def add(self, text: str) -> int:
+        position = self.index.get(text)
+        if position is None:
+            position = self.index[text] = len(self.items)
+            self.items.append(text)
+        return position
+
+
+def _pack_class(elements: List[Dict]) -> tuple:
+    """Encode the elements of one class as a compressed column section and its header entry."""
+    layouts = []
+    layout_ids = {}
+    rows = np.empty(len(elements), dtype=np.uint16)
+    columns = {}
+    for row, element in enumerate(elements):
+        keys = tuple(element)
+        if keys not in layout_ids:
+            if len(layouts) == 65535:
+                raise ValueError("Too many different field layouts in one element class.")
+            layout_ids[keys] = len(layouts)
+            layouts.append(list(keys))
+        rows[row] = layout_ids[keys]
+        for key, value in element.items():
+            if key not in ("class", "name"):
+                columns.setdefault(key, []).append(value)
+
+    strings = _Strings()
+    chunks = [rows.tobytes()]
+    offset = len(chunks[0])
+    described = []
+    for field, values in columns.items():
+        kind = _column_kind(values)
+        if kind == "f8":
+            array = np.array(values, dtype="<f8")
+        elif kind == "i8":
+            array = np.array(values, dtype="<i8")
+        elif kind == "s":
+            array = np.array([strings.add(v) for v in values], dtype="<u4")
+        else:
+            array = np.array([strings.add(json.dumps(v, separators=(",", ":"))) for v in values], dtype="<u4")
+        described.append({"field": field, "kind": kind, "offset": offset, "count": len(values)})
+        chunks.append(array.tobytes())
+        offset += array.nbytes
+
+    encoded = [text.encode("utf-8") for text in strings.items]
+    lengths = np.array([len(text) for text in encoded], dtype="<u4")
+    string_table = {"offset": offset, "count": len(encoded), "blob_offset": offset + lengths.nbytes}
+    chunks.append(lengths.tobytes())
+    chunks.extend(encoded)
+
+    raw = b"".join(chunks)
+    entry = {"class": elements[0].get("class"), "names": [e.get("name") for e in elements],
+             "layouts": layouts, "columns": described, "strings": string_table, "raw_length": len(raw)}
+    return zlib.compress(raw, 6), entry
+
+
+def _unpack_class(raw: bytes, entry: Dict) -> List[Dict]:
+    """Decode a class section written by _pack_class."""
+    count = len(entry["names"])
+    rows = np.frombuffer(raw, dtype="<u2", count=count)
+    table = entry["strings"]
+    lengths = np.frombuffer(raw, dtype="<u4", count=table["count"], offset=table["offset"])
+    ends = np.cumsum(lengths, dtype=np.int64) + table["blob_offset"]
+    starts = ends - lengths
+    strings = [raw[s:e].decode("utf-8") for s, e in zip(starts.tolist(), ends.tolist())]
+
+    values = {}
+    for column in entry["columns"]:
+        dtype = {"f8": "<f8", "i8": "<i8"}.get(column["kind"], "<u4")
+        array = np.frombuffer(raw, dtype=dtype, count=column["count"], offset=column["offset"]).tolist()
+        if column["kind"] == "s":
+            array = [strings[i] for i in array]
+        elif column["kind"] == "j":
+            # One parse for the whole column; each element still gets its own objects
+            array = json.loads("[" + ",".join(strings[i] for i in array) + "]")
+        values[column["field"]] = iter(array)
+
+    def column(key):
+        if key == "class":
+            return [entry["class"]] * count
+        if key == "name":
+            return entry["names"]
+        return list(values[key])
+
+    if len(entry["layouts"]) == 1:
+        # Usual case, every element of the class has the same fields: build the dicts column-wise
+        keys = entry["layouts"][0]
+        return [dict(zip(keys, row)) for row in zip(*(column(key) for key in keys))]
+
+    elements = []
+    for row, layout in enumerate(rows.tolist()):
+        element = {}
+        for key in entry["layouts"][layout]:
+            if key == "class":
+                element[key] = entry["class"]
+            elif key == "name":
+                element[key] = entry["names"][row]
+            else:
+                element[key] = next(values[key])
+        elements.append(element)
+    return elements
+
+
+def _elements_path(document) -> Optional[List[str]]:
+    """Keys leading to the element list in a project document, see moc_solver.project_elements."""
+    if isinstance(document, dict):
+        content = document.get("elements")
+        if isinstance(content, list):
+            return ["elements"]
+        if isinstance(content, dict) and isinstance(content.get("elements"), list):
+            return ["elements", "elements"]
+    return None
+
+
+def pack_project(document: Dict) -> bytes:
+    """
+    Binary form of a project document (the content of a project JSON file)
+
+    Elements are grouped by class into column sections: floats and integers
+    as packed arrays, text and nested values interned so each distinct value
+    is stored once per class. A JSON header indexes the sections, so readers
+    decompress only the classes they need.
+    """
+    path = _elements_path(document)
+    elements = []
+    skeleton = json.loads(json.dumps(document))
+    if path:
+        parent = skeleton
+        for key in path[:-1]:
+            parent = parent[key]
+        elements = parent[path[-1]]
+        parent[path[-1]] = None
+    if not all(isinstance(e, dict) for e in elements):
+        raise ValueError("Every element of a project must be a JSON object.")
+
+    groups = {}
+    for element in elements:
+        groups.setdefault(element.get("class"), []).append(element)
+    class_ids = {cls: k for k, cls in enumerate(groups)}
+    if len(class_ids) > 255:
+        raise ValueError("Too many element classes for the binary format.")
+
+    sections = []
+    entries = []
+    offset = 0
+    order = zlib.compress(np.array([class_ids[e.get("class")] for e in elements], dtype=np.uint8).tobytes())
+    sections.append(order)
+    order_entry = {"offset": 0, "length": len(order)}
+    offset += len(order)
+    for group in groups.values():
+        data, entry = _pack_class(group)
+        entry.update(offset=offset, length=len(data))
+        sections.append(data)
+        entries.append(entry)
+        offset += len(data)
+
+    header = json.dumps({"document": skeleton, "elements_path": path, "count": len(elements),
+                         "order": order_entry, "classes": entries}, separators=(",", ":")).encode("utf-8")
+    header = zlib.compress(header, 6)
+    return b"".join([PREAMBLE.pack(MAGIC, VERSION, len(header)), header] + sections)
+
+
+def write_project(path: str, document: Dict):
+    """Write a binary project atomically (temporary file, fsync, rename)."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(pack_project(document))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+class ProjectArchive:
+    """
+    Read access to a binary project.
+
+    Opening reads only the header. Element classes are decompressed on first
+    use, so a tool interested in the turbines never decodes the pipes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            magic, version, header_length = PREAMBLE.unpack(file.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a binary Airavata project.")
+            if version > VERSION:
+                raise ValueError(f"{path} was written by a newer version (format {version}).")
+            self.header = json.loads(zlib.decompress(file.read(header_length)).decode("utf-8"))
+        self.data_offset = PREAMBLE.size + header_length
+        self.classes = {entry["class"]: entry for entry in self.header["classes"]}
+        self.by_name = {name: (entry["class"], row)
+                        for entry in self.header["classes"] for row, name in enumerate(entry["names"])}
+        self.decoded = {}
+
+    def _read(self, entry: Dict) -> bytes:
+        with open(self.path, 'rb') as file:
+            file.seek(self.data_offset + entry["offset"])
+            return zlib.decompress(file.read(entry["length"]))
+
+    def __len__(self) -> int:
+        return self.header["count"]
+
+    def class_names(self) -> List[str]:
+        """Element classes present in the project."""
+        return list(self.classes)
+
+    def names(self, class_name: Optional[str] = None) -> List[str]:
+        """Element names, of one class or all, without decoding any element."""
+        if class_name is not None:
+            return list(self.classes[class_name]["names"]) if class_name in self.classes else []
+        return list(self.by_name)
+
+    def elements(self, class_name: Optional[str] = None) -> List[Dict]:
+        """
+        Element dicts as in the JSON file
+
+        Args:
+            class_name: Only this class, e.g. "Turbine"; all elements in file order by default
+        """
+        if class_name is not None:
+            return self._class_elements(class_name) if class_name in self.classes else []
+
+        order = np.frombuffer(self._read(self.header["order"]), dtype=np.uint8)
+        # By section: elements without a "class" field form a section of class None
+        groups = [iter(self._class_elements(entry["class"])) for entry in self.header["classes"]]
+        return [next(groups[k]) for k in order.tolist()]
+
+    def _class_elements(self, class_name: Optional[str]) -> List[Dict]:
+        """Decoded elements of one class section, cached."""
+        if class_name not in self.decoded:
+            entry = self.classes[class_name]
+            self.decoded[class_name] = _unpack_class(self._read(entry), entry)
+        return self.decoded[class_name]
+
+    def element(self, name: str) -> Dict:
+        """One element by name; decodes only its class."""
+        class_name, row = self.by_name[name]
+        return self._class_elements(class_name)[row]
+
+    def simulation_properties(self) -> Dict:
+        """Simulation properties, read from the header alone."""
+        document = self.header["document"]
+        content = document.get("elements") if isinstance(document, dict) else None
+        if isinstance(content, dict):
+            return content.get("simulation_properties", {})
+        return document.get("simulation_properties", {}) if isinstance(document, dict) else {}
+
+    def document(self) -> Dict:
+        """The full project document, equal to the JSON it was converted from."""
+        document = json.loads(json.dumps(self.header["document"]))
+        path = self.header["elements_path"]
+        if path:
+            parent = document
+            for key in path[:-1]:
+                parent = parent[key]
+            parent[path[-1]] = self.elements()
+        return document
+
+
+def read_project(path: str) -> Dict:
+    """Project document of a binary project file."""
+    return ProjectArchive(path).document()
+
+
+def convert(source: str, target: str):
+    """Convert between JSON and binary projects, by the extensions of the paths."""
+    if is_binary_project(source):
+        document = read_project(source)
+    else:
+        with open(source, 'r') as file:
+            document = json.load(file)
+    if is_binary_project(target):
+        write_project(target, document)
+    else:
+        atomic_write_json(target, document)
+
+
+if __name__ == "__main__":
+    # python project_archive.py convert <source> <target>   (.json <-> .apb)
+    # python project_archive.py info <project.apb>
+    if len(sys.argv) == 4 and sys.argv[1] == "convert":
+        convert(sys.argv[2], sys.argv[3])
+        print(f"{sys.argv[2]} ({os.path.getsize(sys.argv[2])} bytes) -> {sys.argv[3]} ({os.path.getsize(sys.argv[3])} bytes)")
+    elif len(sys.argv) == 3 and sys.argv[1] == "info":
+        archive = ProjectArchive(sys.argv[2])
+        print(f"{len(archive)} elements")
+        for entry in archive.header["classes"]:
+            print(f"  {entry['class']}: {len(entry['names'])} elements, {entry['length']} bytes "
+                  f"({entry['raw_length']} uncompressed)")
+    else:
+        print("Usage: project_archive.py convert <source> <target> | info <project.apb>")
@@ -0,0 +1,353 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from autosave import atomic_write_json
+
+# Field kinds of the element records
+FLOAT = "float"
+TEXT = "text"
+TABLE = "table"
+
+Number = Optional[Union[float, str]]
+
+
+def parse_number(value: Any) -> Number:
+    """
+    Typed value of a numeric field, for use in calculations; records keep the value as entered
+
+    Returns:
+        float, None for a blank entry, or the original text when it is not a
+        number (kept so that a record never loses what the user typed)
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class ElementRecord:
+    """
+    Hydraulic data of one element, without any canvas or widget state.
+
+    Subclasses list their fields in FIELDS (name -> kind) and store them in
+    __slots__, so a record costs a few hundred bytes. Fields hold the values
+    as they were loaded or set ("01" stays "01"), so opening and saving a
+    project does not rewrite it; `number` gives the float of a numeric field
+    where it is used. Keys a record does not know are kept in `extra` and
+    written back unchanged, and fields missing from the loaded data are left
+    out again on saving unless they have been set since.
+    """
+
+    __slots__ = ("name", "x", "y", "extra", "absent")
+    CLASS = "Element"
+    FIELDS: Dict[str, str] = {}
+    DEFAULTS: Dict[str, Any] = {}
+    # Alternative keys accepted when loading, e.g. older file layouts
+    ALIASES: Dict[str, str] = {}
+
+    def __init__(self, name: str, x: float = 90, y: float = 70, **values):
+        self.name = name
+        self.x = x
+        self.y = y
+        self.extra = None
+        self.absent = ()
+        for field, kind in self.FIELDS.items():
+            value = values.get(field, self.DEFAULTS.get(field))
+            if kind == TABLE:
+                value = [list(row) if isinstance(row, (list, tuple)) else row for row in (value or [])]
+            elif kind == TEXT and value is None:
+                value = ""
+            setattr(self, field, value)
+
+    def number(self, field: str) -> Number:
+        """Value of a numeric field as a float, see parse_number."""
+        return parse_number(getattr(self, field))
+
+    @classmethod
+    def from_data(cls, data: Dict) -> "ElementRecord":
+        """Record from a saved element dict (the output of Element.to_data)."""
+        values = {field: None for field in cls.FIELDS}
+        given = set()
+        extra = {}
+        for key, value in data.items():
+            field = cls.ALIASES.get(key, key)
+            if field in cls.FIELDS:
+                if key == field or field not in given:
+                    values[field] = value
+                    given.add(field)
+            elif key not in ("class", "name", "x", "y"):
+                extra[key] = value
+        record = cls(data.get("name", ""), data.get("x", 90), data.get("y", 70), **values)
+        record.extra = extra or None
+        record.absent = tuple(field for field in cls.FIELDS if field not in given)
+        return record
+
+    def to_data(self) -> Dict:
+        """Element dict in the project file layout; blank numbers are written as ""."""
+        data = {"class": self.CLASS, "name": self.name, "x": self.x, "y": self.y}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            data[field] = "" if value is None else value
+        for field in self.absent:
+            if data[field] in ("", []):
+                del data[field]
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class InletReservoirRecord(ElementRecord):
+    __slots__ = ("level_h", "pipe_z")
+    CLASS = "InletReservoir"
+    FIELDS = {"level_h": FLOAT, "pipe_z": FLOAT}
+
+
+class OutletReservoirRecord(ElementRecord):
+    __slots__ = ("level_h", "level_z")
+    CLASS = "OutletReservoir"
+    FIELDS = {"level_h": FLOAT, "level_z": FLOAT}
+
+
+class PipeRecord(ElementRecord):
+    __slots__ = ("diameter", "length", "celerity", "manning_n", "inlet_h1", "inlet_q1", "nodes_n", "dt_max",
+                 "inlet_element", "outlet_element")
+    CLASS = "Pipe"
+    FIELDS = {
+        "diameter": FLOAT, "length": FLOAT, "celerity": FLOAT, "manning_n": FLOAT,
+        "inlet_h1": FLOAT, "inlet_q1": FLOAT, "nodes_n": FLOAT, "dt_max": FLOAT,
+        "inlet_element": TEXT, "outlet_element": TEXT,
+    }
+
+
+class ValveRecord(ElementRecord):
+    __slots__ = ("diameter", "loss_coefficient", "loss_factor", "elevation_z", "custom_values", "O_C", "P_drop")
+    CLASS = "Valve"
+    FIELDS = {
+        "diameter": FLOAT, "loss_coefficient": FLOAT, "loss_factor": FLOAT, "elevation_z": FLOAT,
+        "custom_values": TABLE, "O_C": FLOAT, "P_drop": FLOAT,
+    }
+    DEFAULTS = {"diameter": 0.0, "loss_coefficient": 0.0, "loss_factor": 0.0, "elevation_z": 0.0,
+                "O_C": 0.0, "P_drop": 0.0}
+
+
+class ManifoldRecord(ElementRecord):
+    __slots__ = ("elev_z", "No_of_sub_pipes", "D_of_Subpipe")
+    CLASS = "Manifold"
+    FIELDS = {"elev_z": FLOAT, "No_of_sub_pipes": FLOAT, "D_of_Subpipe": FLOAT}
+
+
+class SurgeTankRecord(ElementRecord):
+    __slots__ = ("throttle_ao", "stank_a", "throttle_kin", "throttle_kout", "throttle_el_zo",
+                 "Diameter_surge_tank", "Current_Water_level")
+    CLASS = "SurgeTank"
+    FIELDS = {
+        "throttle_ao": FLOAT, "stank_a": FLOAT, "throttle_kin": FLOAT, "throttle_kout": FLOAT,
+        "throttle_el_zo": FLOAT, "Diameter_surge_tank": FLOAT, "Current_Water_level": FLOAT,
+    }
+    ALIASES = {"D_ST": "Diameter_surge_tank", "C_W_L": "Current_Water_level"}
+
+
+class TurbineRecord(ElementRecord):
+    __slots__ = ("ho", "qo", "do", "no", "jh", "efficiency", "z_elev", "turbine_type", "delta_p", "t_load_rej",
+                 "dt_ramp", "table_data", "tg", "tr", "td", "bp", "governor_mode")
+    CLASS = "Turbine"
+    FIELDS = {
+        "ho": FLOAT, "qo": FLOAT, "do": FLOAT, "no": FLOAT, "jh": FLOAT, "efficiency": FLOAT, "z_elev": FLOAT,
+        "turbine_type": TEXT,
+        # delta_p is entered as a percentage such as "-100%"
+        "delta_p": TEXT, "t_load_rej": FLOAT, "dt_ramp": FLOAT, "table_data": TABLE,
+        "tg": FLOAT, "tr": FLOAT, "td": FLOAT, "bp": FLOAT, "governor_mode": TEXT,
+    }
+    DEFAULTS = {"ho": 0.0, "qo": 0.0, "do": 0.0, "no": 0.0, "jh": 0.0, "efficiency": 0.9, "z_elev": 0.0,
+                "turbine_type": "Francis 23", "delta_p": "-100%", "t_load_rej": 0.0, "dt_ramp": 0.0,
+                "table_data": [(0.0, 0.0)] * 7, "tg": 0.0, "tr": 0.0, "td": 0.0, "bp": 0.0,
+                "governor_mode": "Emergency"}
+
+
+RECORD_CLASSES = {cls.CLASS: cls for cls in (
+    InletReservoirRecord, OutletReservoirRecord, PipeRecord, ValveRecord,
+    ManifoldRecord, SurgeTankRecord, TurbineRecord,
+)}
+
+
+def record_from_data(data: Dict) -> ElementRecord:
+    """Record of the right class for a saved element dict."""
+    cls = RECORD_CLASSES.get(data.get("class"))
+    if cls is None:
+        raise ValueError(f"Unknown element class {data.get('class')!r} for {data.get('name')!r}.")
+    return cls.from_data(data)
+
+
+class Project:
+    """
+    Headless project: element records, simulation properties and the
+    indexes needed to navigate the network.
+
+    Elements are indexed by name, and pipes by the elements at their ends,
+    so neighbours are found without scanning the element list. Nothing here
+    imports tkinter or PIL.
+    """
+
+    def __init__(self, records: Optional[List[ElementRecord]] = None,
+                 simulation_properties: Optional[Dict] = None):
+        self.records: List[ElementRecord] = []
+        self.by_name: Dict[str, ElementRecord] = {}
+        self.pipes_at: Dict[str, List[PipeRecord]] = {}
+        self.simulation_properties = dict(simulation_properties or {})
+        # Problems found while reading a project file, for the caller to report
+        self.warnings: List[str] = []
+        for record in records or []:
+            self.add(record)
+
+    @classmethod
+    def from_data(cls, data: Dict) -> "Project":
+        """
+        Project from the content of a project file
+
+        Accepts the saved layout {"elements": {"elements": [...], "simulation_properties": {...}}}
+        as well as a bare {"elements": [...]} or element list. Elements with
+        a name already taken are kept under a unique name, and elements of
+        unknown classes are left out; both are listed in `warnings`.
+        """
+        content = data.get("elements", data) if isinstance(data, dict) else data
+        if isinstance(content, dict):
+            elements = content.get("elements", [])
+            properties = content.get("simulation_properties", {})
+        else:
+            elements = content
+            properties = data.get("simulation_properties", {}) if isinstance(data, dict) else {}
+
+        project = cls(simulation_properties=properties)
+        for element in elements:
+            try:
+                record = record_from_data(element)
+            except ValueError as e:
+                project.warnings.append(f"Skipping element: {e}")
+                continue
+            if record.name in project.by_name:
+                name = project.unique_name(record.name)
+                project.warnings.append(f"Duplicate element name {record.name}, renamed to {name}.")
+                record.name = name
+            project.add(record)
+        return project
+
+    @classmethod
+    def load(cls, path: str) -> "Project":
+        """Read a project JSON file, or a binary one (.apb, see project_archive)."""
+        if path.lower().endswith(".apb"):
+            from project_archive import read_project
+            return cls.from_data(read_project(path))
+        with open(path, 'r') as file:
+            return cls.from_data(json.load(file))
+
+    def to_data(self) -> Dict:
+        """Content of a project file, in the layout the application saves."""
+        return {"elements": {"elements": [record.to_data() for record in self.records],
+                             "simulation_properties": dict(self.simulation_properties)}}
+
+    def save(self, path: str):
+        """Write the project as JSON, or binary when the path ends in .apb."""
+        if path.lower().endswith(".apb"):
+            from project_archive import write_project
+            write_project(path, self.to_data())
+            return
+        atomic_write_json(path, self.to_data())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[ElementRecord]:
+        return iter(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.by_name
+
+    def __getitem__(self, name: str) -> ElementRecord:
+        return self.by_name[name]
+
+    def _link(self, record: ElementRecord):
+        if isinstance(record, PipeRecord):
+            for end in (record.inlet_element, record.outlet_element):
+                if end:
+                    self.pipes_at.setdefault(end, []).append(record)
+
+    def _unlink(self, record: ElementRecord):
+        if isinstance(record, PipeRecord):
+            for end in (record.inlet_element, record.outlet_element):
+                if record in self.pipes_at.get(end, ()):
+                    self.pipes_at[end].remove(record)
+
+    def unique_name(self, name: str) -> str:
+        """The name itself when it is free, otherwise the first free "<name>_<n>"."""
+        candidate, count = name, 1
+        while candidate in self.by_name:
+            count += 1
+            candidate = f"{name}_{count}"
+        return candidate
+
+    def add(self, record: ElementRecord):
+        """Add an element; names must be unique."""
+        if record.name in self.by_name:
+            raise ValueError(f"An element named {record.name} already exists.")
+        self.records.append(record)
+        self.by_name[record.name] = record
+        self._link(record)
+
+    def remove(self, name: str) -> ElementRecord:
+        """Remove an element by name and return it."""
+        record = self.by_name.pop(name)
+        self.records.remove(record)
+        self._unlink(record)
+        return record
+
+    def update(self, element: str, **values):
+        """
+        Change fields of an element, keeping the indexes current
+
+        Args:
+            element: Name of the element
+            values: New field values; "name" renames the element and the pipe ends referring to it
+        """
+        record = self.by_name[element]
+        new_name = values.pop("name", element)
+        if new_name != element and new_name in self.by_name:
+            raise ValueError(f"An element named {new_name} already exists.")
+
+        self._unlink(record)
+        for field, value in values.items():
+            if field in ("x", "y") or field in record.FIELDS:
+                setattr(record, field, value)
+            else:
+                record.extra = dict(record.extra or {}, **{field: value})
+        if new_name != element:
+            del self.by_name[element]
+            record.name = new_name
+            self.by_name[new_name] = record
+            for pipe in self.pipes_at.pop(element, []):
+                if pipe.inlet_element == element:
+                    pipe.inlet_element = new_name
+                if pipe.outlet_element == element:
+                    pipe.outlet_element = new_name
+                self.pipes_at.setdefault(new_name, []).append(pipe)
+        self._link(record)
+
+    def of_class(self, class_name: str) -> List[ElementRecord]:
+        """Records of one element class, e.g. "Pipe"."""
+        return [record for record in self.records if record.CLASS == class_name]
+
+    def downstream(self, name: str) -> List[str]:
+        """Elements fed by `name` through a pipe (pipes run from outlet_element to inlet_element)."""
+        return [pipe.inlet_element for pipe in self.pipes_at.get(name, ())
+                if pipe.outlet_element == name and pipe.inlet_element]
+
+    def upstream(self, name: str) -> List[str]:
+        """Elements feeding `name` through a pipe."""
+        return [pipe.outlet_element for pipe in self.pipes_at.get(name, ())
+                if pipe.inlet_element == name and pipe.outlet_element]
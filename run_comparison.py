@@ -0,0 +1,248 @@
+import os
+import tkinter as tk
+from tkinter import messagebox, ttk
+from typing import Dict, List, Optional, Sequence
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+from history_writer import HistoryStore
+from run_database import RunDatabase
+
+# Grid points interpolated per chunk, bounds the working memory per run
+CHUNK_POINTS = 65536
+# Points drawn per curve in the comparison window
+PLOT_POINTS = 2000
+
+
+def interpolate_channel(store: HistoryStore, channel: str, grid: np.ndarray,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Linear interpolation of a stored channel onto a time grid, chunk by chunk
+
+    Only the slice of the memory-mapped history spanning each chunk of the
+    grid is read, so long histories are never loaded whole.
+
+    Args:
+        store: History store of the run
+        channel: Channel name
+        grid: Increasing output times [s]
+        out: Optional output array (e.g. a memmap row) of len(grid)
+
+    Returns:
+        Interpolated values
+    """
+    times = store.times
+    values = store.channel(channel)
+    out = np.empty(len(grid)) if out is None else out
+    for start in range(0, len(grid), CHUNK_POINTS):
+        chunk = grid[start:start + CHUNK_POINTS]
+        first = max(int(np.searchsorted(times, chunk[0], side="right")) - 1, 0)
+        last = min(int(np.searchsorted(times, chunk[-1], side="left")) + 1, len(times))
+        out[start:start + len(chunk)] = np.interp(chunk, times[first:last], values[first:last])
+    return out
+
+
+class RunComparison:
+    """
+    Side-by-side comparison of several stored runs.
+
+    Histories may have different output steps and start times; they are
+    interpolated onto a common grid over the time span all runs share.
+    Differences are taken against a reference run, and envelope deltas come
+    straight from the stored envelopes without touching the histories.
+    """
+
+    def __init__(self, stores: Dict[str, HistoryStore], reference: Optional[str] = None):
+        if len(stores) < 2:
+            raise ValueError("At least two runs are needed for a comparison.")
+        self.stores = stores
+        self.labels = list(stores)
+        self.reference = reference or self.labels[0]
+
+    @classmethod
+    def from_paths(cls, paths: Sequence[str]) -> "RunComparison":
+        """Compare history store directories, labelled by directory name."""
+        return cls({os.path.basename(os.path.normpath(p)): HistoryStore(p) for p in paths})
+
+    @classmethod
+    def from_database(cls, run_ids: Sequence[int], database: Optional[RunDatabase] = None) -> "RunComparison":
+        """Compare runs recorded in the run database."""
+        database = database or RunDatabase()
+        runs = database.get_runs(run_ids)
+        stores = {}
+        for run_id in run_ids:
+            path = runs.get(run_id, {}).get("history_path")
+            if not path or not os.path.exists(path):
+                raise ValueError(f"The history of run {run_id} is no longer available.")
+            stores[f"run {run_id}"] = HistoryStore(path)
+        return cls(stores)
+
+    def channels(self) -> List[str]:
+        """Channels recorded in every run."""
+        common = set(self.stores[self.labels[0]].channel_names)
+        for label in self.labels[1:]:
+            common &= set(self.stores[label].channel_names)
+        return [c for c in self.stores[self.labels[0]].channel_names if c in common]
+
+    def time_grid(self, dt: Optional[float] = None, start: Optional[float] = None, end: Optional[float] = None,
+                  max_points: Optional[int] = None) -> np.ndarray:
+        """
+        Common time grid over the span shared by all runs
+
+        Args:
+            dt: Grid step [s], the finest output step of the runs by default
+            start, end: Optional narrower window [s]
+            max_points: Coarsen the grid to at most this many points
+
+        Returns:
+            Increasing times [s]
+        """
+        spans = []
+        steps = []
+        for store in self.stores.values():
+            times = store.times
+            if len(times) < 2:
+                raise ValueError(f"Run {store.path} has no stored history.")
+            spans.append((float(times[0]), float(times[-1])))
+            steps.append((float(times[-1]) - float(times[0])) / (len(times) - 1))
+        low = max(s[0] for s in spans) if start is None else max(start, max(s[0] for s in spans))
+        high = min(s[1] for s in spans) if end is None else min(end, min(s[1] for s in spans))
+        if high <= low:
+            raise ValueError("The runs share no common time span.")
+
+        count = int(np.floor((high - low) / (dt or min(steps)) + 1e-9)) + 1
+        if max_points:
+            count = min(count, max_points)
+        return np.linspace(low, high, max(count, 2))
+
+    def aligned(self, channel: str, grid: np.ndarray, out_path: Optional[str] = None) -> np.ndarray:
+        """
+        One channel of every run on a common grid
+
+        Args:
+            channel: Channel name
+            grid: Output times, see time_grid
+            out_path: Optional .npy file receiving the result as a memmap,
+                for grids too large to hold in memory
+
+        Returns:
+            Array of shape (runs, len(grid)), in label order
+        """
+        shape = (len(self.labels), len(grid))
+        out = np.lib.format.open_memmap(out_path, mode="w+", shape=shape) if out_path else np.empty(shape)
+        for k, label in enumerate(self.labels):
+            interpolate_channel(self.stores[label], channel, grid, out[k])
+        return out
+
+    def differences(self, channel: str, grid: np.ndarray) -> Dict[str, np.ndarray]:
+        """Channel of every other run minus the reference run, on the grid."""
+        values = self.aligned(channel, grid)
+        reference = values[self.labels.index(self.reference)]
+        return {label: values[k] - reference for k, label in enumerate(self.labels) if label != self.reference}
+
+    def envelope_deltas(self) -> Dict[str, Dict[str, tuple]]:
+        """
+        Change of the envelope extremes against the reference run
+
+        Returns:
+            dict of run label -> {channel: (delta max, delta min)}
+        """
+        reference = self.stores[self.reference].envelope()
+        deltas = {}
+        for label in self.labels:
+            if label == self.reference:
+                continue
+            envelope = self.stores[label].envelope()
+            deltas[label] = {channel: (envelope[channel][0] - values[0], envelope[channel][2] - values[2])
+                             for channel, values in reference.items() if channel in envelope}
+        return deltas
+
+
+def show_comparison(root, comparison: RunComparison):
+    """
+    Window overlaying a channel of all runs above its difference to the reference run.
+
+    Both plots share the time axis, so zooming or panning one moves the
+    other. The visible window is re-interpolated at screen resolution after
+    each zoom, which keeps detail without reading the full histories.
+    """
+    channels = comparison.channels()
+    if not channels:
+        messagebox.showerror("Error", "The selected runs have no recorded channel in common.")
+        return
+
+    window = tk.Toplevel(root)
+    window.title("Run Comparison")
+    window.geometry("1200x800")
+
+    fig, (ax_values, ax_delta) = plt.subplots(2, 1, sharex=True, figsize=(12, 7), dpi=100)
+    canvas = FigureCanvasTkAgg(fig, master=window)
+    toolbar = NavigationToolbar2Tk(canvas, window)
+    toolbar.update()
+    canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+    selection_frame = tk.Frame(window, bg='#f0f0f0')
+    selection_frame.pack(fill=tk.X, padx=20, pady=10)
+    tk.Label(selection_frame, text="Select Channel:", font=('Arial', 12), bg='#f0f0f0').pack(side=tk.LEFT, padx=10)
+    channel_dropdown = ttk.Combobox(selection_frame, values=channels, width=30, state="readonly")
+    channel_dropdown.set(channels[0])
+    channel_dropdown.pack(side=tk.LEFT, padx=10)
+    envelope_label = tk.Label(selection_frame, text="", font=('Arial', 10), bg='#f0f0f0', justify=tk.LEFT)
+    envelope_label.pack(side=tk.LEFT, padx=20)
+
+    deltas = comparison.envelope_deltas()
+    lines = {}
+    redrawing = [False]
+
+    def draw(start=None, end=None):
+        channel = channel_dropdown.get()
+        grid = comparison.time_grid(start=start, end=end, max_points=PLOT_POINTS)
+        values = comparison.aligned(channel, grid)
+        reference = values[comparison.labels.index(comparison.reference)]
+        for k, label in enumerate(comparison.labels):
+            lines[("values", label)].set_data(grid, values[k])
+            if ("delta", label) in lines:
+                lines[("delta", label)].set_data(grid, values[k] - reference)
+
+    def select_channel(event=None):
+        channel = channel_dropdown.get()
+        redrawing[0] = True
+        ax_values.clear()
+        ax_delta.clear()
+        ax_values.callbacks.connect("xlim_changed", on_zoom)
+        lines.clear()
+        for label in comparison.labels:
+            lines[("values", label)], = ax_values.plot([], [], label=label, linewidth=1)
+            if label != comparison.reference:
+                lines[("delta", label)], = ax_delta.plot([], [], label=f"{label} - {comparison.reference}", linewidth=1)
+        draw()
+        for ax in (ax_values, ax_delta):
+            ax.relim()
+            ax.autoscale_view()
+            ax.grid(True, linestyle='--', alpha=0.7)
+            ax.legend(loc='best')
+        ax_values.set_title(channel, fontsize=15, fontweight='bold')
+        ax_delta.set_ylabel("Difference")
+        ax_delta.set_xlabel("Time (s)", fontsize=12)
+        envelope_label.config(text="\n".join(
+            f"{label}: max {d[channel][0]:+.3f}, min {d[channel][1]:+.3f}"
+            for label, d in deltas.items() if channel in d))
+        redrawing[0] = False
+        canvas.draw()
+
+    def on_zoom(ax):
+        if redrawing[0]:
+            return
+        redrawing[0] = True
+        start, end = ax.get_xlim()
+        try:
+            draw(start, end)
+        except ValueError:
+            pass
+        redrawing[0] = False
+        canvas.draw_idle()
+
+    channel_dropdown.bind("<<ComboboxSelected>>", select_channel)
+    select_channel()
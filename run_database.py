@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Location of the run database, overridable with the AIRAVATA_RUN_DB environment variable
+DEFAULT_DATABASE = os.path.join(os.path.expanduser("~"), ".airavata", "runs.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    project_path TEXT,
+    project_hash TEXT NOT NULL,
+    inp_hash TEXT,
+    started REAL NOT NULL,
+    wall_time REAL,
+    t_max REAL,
+    dt REAL,
+    history_path TEXT,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    element TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value REAL,
+    text TEXT
+);
+CREATE TABLE IF NOT EXISTS envelopes (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    channel TEXT NOT NULL,
+    max REAL,
+    time_max REAL,
+    min REAL,
+    time_min REAL,
+    PRIMARY KEY (run_id, channel)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_project ON runs(project_hash, started);
+CREATE INDEX IF NOT EXISTS runs_path ON runs(project_path, started);
+CREATE INDEX IF NOT EXISTS parameters_field ON parameters(field, value, run_id);
+CREATE INDEX IF NOT EXISTS parameters_element ON parameters(element, field, value, run_id);
+CREATE INDEX IF NOT EXISTS parameters_run ON parameters(run_id);
+CREATE INDEX IF NOT EXISTS envelopes_max ON envelopes(channel, max);
+CREATE INDEX IF NOT EXISTS envelopes_min ON envelopes(channel, min);
+"""
+
+def default_database_path() -> str:
+    """Path of the run database used when none is given."""
+    return os.environ.get("AIRAVATA_RUN_DB", DEFAULT_DATABASE)
+
+
+def content_hash(content) -> str:
+    """SHA-256 of a JSON-serialisable object or a string."""
+    text = content if isinstance(content, str) else json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parse_filter(text: str) -> Tuple[Optional[str], str, str, float]:
+    """
+    Parse a parameter filter such as "stank_a<60" or "ST.stank_a<=60"
+
+    Returns:
+        tuple: (element name or None, field, operator, value)
+    """
+    match = re.fullmatch(r"\s*(?:([^.<>=!]+)\.)?([^.<>=!\s]+)\s*(<=|>=|!=|<|>|=)\s*(\S+)\s*", text)
+    if not match:
+        raise ValueError(f"Filter {text} must look like 'field<value' or 'element.field<value'.")
+    element, field, operator, value = match.groups()
+    return element, field, operator, float(value)
+
+
+class RunDatabase:
+    """
+    SQLite record of solver runs.
+
+    Each run stores the project and INP hashes, timing, the numeric element
+    parameters it was run with, the envelope of every channel and the path
+    of its history store. Parameters and envelopes are indexed so that
+    queries across runs, such as the highest head at one node over all runs
+    with a small surge tank, never have to open result files.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_database_path()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, elements: List[Dict], simulation_properties: Dict, envelope: Dict[str, tuple],
+               project_path: Optional[str] = None, inp_text: Optional[str] = None,
+               wall_time: Optional[float] = None, history_path: Optional[str] = None,
+               label: Optional[str] = None) -> int:
+        """
+        Record one run
+
+        Args:
+            elements: Element list the run was made with
+            simulation_properties: Simulation properties of the run
+            envelope: channel -> (max, time of max, min, time of min)
+            project_path: Project JSON file, if the run came from one
+            inp_text: WHAMO input deck generated for the project
+            wall_time: Solver wall time [s]
+            history_path: Directory of the run's history store
+            label: Free text, e.g. the sweep the run belongs to
+
+        Returns:
+            Id of the new run
+        """
+        from Word_tasks import safe_float  # Pulls in numpy, keep it off the dashboard's startup path
+
+        project = {"elements": elements, "simulation_properties": simulation_properties}
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (project_path, project_hash, inp_hash, started, wall_time, t_max, dt, history_path, label)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(project_path) if project_path else None, content_hash(project),
+                 content_hash(inp_text) if inp_text else None, time.time(), wall_time,
+                 safe_float(simulation_properties.get("simulation_time"), None),
+                 safe_float(simulation_properties.get("time_step"), None),
+                 os.path.abspath(history_path) if history_path else None, label))
+            run_id = cursor.lastrowid
+
+            parameters = []
+            for element in elements:
+                for field, value in element.items():
+                    if field in ("name", "class", "x", "y") or isinstance(value, (list, dict)):
+                        continue
+                    number = safe_float(value, None)
+                    parameters.append((run_id, element.get("name", ""), field, number, None if number is not None else str(value)))
+            self.connection.executemany("INSERT INTO parameters VALUES (?, ?, ?, ?, ?)", parameters)
+            self.connection.executemany(
+                "INSERT INTO envelopes VALUES (?, ?, ?, ?, ?, ?)",
+                [(run_id, channel, *(float(x) for x in values)) for channel, values in envelope.items()])
+        return run_id
+
+    def record_result(self, project_data: Dict, result, project_path: Optional[str] = None,
+                      inp_text: Optional[str] = None, wall_time: Optional[float] = None,
+                      label: Optional[str] = None) -> int:
+        """
+        Record a moc_solver.SimulationResult of a project
+
+        The history store is copied into the managed results directory first
+        when it lives elsewhere (e.g. a temporary directory), so the recorded
+        path stays valid; it is recorded as None when that fails.
+        """
+        from history_writer import persist_history
+
+        project = project_data.get("elements", {})
+        try:
+            history_path = persist_history(result.store.path)
+        except OSError as e:
+            print(f"History of the run not kept: {e}")
+            history_path = None
+        return self.record(project.get("elements", []), project.get("simulation_properties", {}),
+                           result.envelope(), project_path, inp_text, wall_time, history_path, label)
+
+    def runs(self, project_path: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Most recent runs, optionally of one project file."""
+        query = "SELECT * FROM runs"
+        arguments = []
+        if project_path:
+            query += " WHERE project_path = ?"
+            arguments.append(os.path.abspath(project_path))
+        query += " ORDER BY started DESC LIMIT ?"
+        arguments.append(limit)
+        cursor = self.connection.execute(query, arguments)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def get_runs(self, run_ids: Sequence[int]) -> Dict[int, Dict]:
+        """Runs with the given ids, by id; unknown ids are left out."""
+        ids = list(dict.fromkeys(int(run_id) for run_id in run_ids))
+        if not ids:
+            return {}
+        cursor = self.connection.execute(
+            f"SELECT * FROM runs WHERE id IN ({', '.join('?' * len(ids))})", ids)
+        names = [column[0] for column in cursor.description]
+        runs = [dict(zip(names, row)) for row in cursor.fetchall()]
+        return {run["id"]: run for run in runs}
+
+    def forget_histories(self, paths: Sequence[str]):
+        """Clear the history path of the runs whose store is about to be removed; their envelopes stay."""
+        with self.connection:
+            self.connection.executemany("UPDATE runs SET history_path = NULL WHERE history_path = ?",
+                                        [(os.path.abspath(path),) for path in paths])
+
+    def latest_history(self, project_data: Dict) -> Optional[str]:
+        """
+        History store of the most recent run of exactly this project content, if it still exists.
+        """
+        project = project_data.get("elements", {})
+        project_hash = content_hash({"elements": project.get("elements", []),
+                                     "simulation_properties": project.get("simulation_properties", {})})
+        rows = self.connection.execute(
+            "SELECT history_path FROM runs WHERE project_hash = ? AND history_path IS NOT NULL"
+            " ORDER BY started DESC", (project_hash,))
+        for (path,) in rows:
+            if os.path.exists(path):
+                return path
+        return None
+
+    def project_summaries(self, limit: int = 20) -> List[Dict]:
+        """
+        Recently run project files with their run count and the peak head of their latest run.
+        """
+        rows = self.connection.execute(
+            "SELECT project_path, COUNT(*), MAX(started), MAX(id) FROM runs WHERE project_path IS NOT NULL"
+            " GROUP BY project_path ORDER BY MAX(started) DESC LIMIT ?", (limit,)).fetchall()
+        summaries = []
+        for project_path, count, started, run_id in rows:
+            peak = self.connection.execute(
+                "SELECT channel, max FROM envelopes WHERE run_id = ? AND channel LIKE '%.HEAD'"
+                " ORDER BY max DESC LIMIT 1", (run_id,)).fetchone()
+            summaries.append({"project_path": project_path, "runs": count, "started": started, "run_id": run_id,
+                              "peak_channel": peak[0] if peak else None, "peak_head": peak[1] if peak else None})
+        return summaries
+
+    def envelope(self, run_id: int) -> Dict[str, tuple]:
+        """Envelope of one run, as written by the solver."""
+        rows = self.connection.execute(
+            "SELECT channel, max, time_max, min, time_min FROM envelopes WHERE run_id = ?", (run_id,))
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def query(self, channel: str, filters: Sequence[str] = (), kind: str = "max", limit: int = 50) -> List[Dict]:
+        """
+        Envelope extreme of one channel across runs
+
+        Args:
+            channel: Channel name, e.g. "51.HEAD"
+            filters: Parameter filters, see parse_filter, all of which must hold
+            kind: "max" (highest first) or "min" (lowest first)
+            limit: Maximum number of runs returned
+
+        Returns:
+            List of dicts with run_id, value, time, project_path and started
+        """
+        if kind not in ("max", "min"):
+            raise ValueError("kind must be 'max' or 'min'.")
+        query = (f"SELECT e.run_id, e.{kind}, e.time_{kind}, r.project_path, r.started"
+                 " FROM envelopes e JOIN runs r ON r.id = e.run_id WHERE e.channel = ?")
+        arguments = [channel]
+        for text in filters:
+            element, field, operator, value = parse_filter(text)
+            query += f" AND e.run_id IN (SELECT run_id FROM parameters WHERE field = ? AND value {operator} ?"
+            arguments += [field, value]
+            if element:
+                query += " AND element = ?"
+                arguments.append(element)
+            query += ")"
+        query += f" ORDER BY e.{kind} {'DESC' if kind == 'max' else 'ASC'} LIMIT ?"
+        arguments.append(limit)
+        return [dict(zip(("run_id", "value", "time", "project_path", "started"), row))
+                for row in self.connection.execute(query, arguments)]
+
+
+def _print_rows(rows: List[Dict]):
+    for row in rows:
+        print("  ".join(f"{k}={time.strftime('%Y-%m-%d %H:%M', time.localtime(v)) if k == 'started' else v}"
+                        for k, v in row.items()))
+
+
+if __name__ == "__main__":
+    # python run_database.py runs [project.json]
+    # python run_database.py max <channel> [filter ...]     e.g. max 51.HEAD stank_a<60
+    # python run_database.py min <channel> [filter ...]
+    command = sys.argv[1] if len(sys.argv) > 1 else "runs"
+    database = RunDatabase()
+    if command == "runs":
+        _print_rows(database.runs(sys.argv[2] if len(sys.argv) > 2 else None))
+    elif command in ("max", "min") and len(sys.argv) > 2:
+        _print_rows(database.query(sys.argv[2], sys.argv[3:], command))
+    else:
+        print("Usage: run_database.py runs [project] | max|min <channel> [filter ...]")
+    database.close()
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from autosave import atomic_write_json
+from moc_solver import run_batch
+
+
+def scenario_key(elements: List[Dict], simulation_properties: Dict, t_max: Optional[float] = None) -> str:
+    """
+    Content hash of a scenario, identical for identical inputs
+
+    Args:
+        elements: Element list of the scenario
+        simulation_properties: Simulation properties
+        t_max: Simulation length override [s]
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    # Canvas positions do not change the hydraulics
+    content = [{k: v for k, v in e.items() if k not in ("x", "y")} for e in elements]
+    text = json.dumps({"elements": content, "properties": simulation_properties, "t_max": t_max},
+                      sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _run_group(element_sets: List[List[Dict]], simulation_properties: Dict,
+               t_max: Optional[float]) -> List[Dict[str, tuple]]:
+    return run_batch(element_sets, simulation_properties, t_max)
+
+
+class ScenarioRunner:
+    """
+    Runs scenario variants of one project and returns their envelopes.
+
+    Results are cached by content hash, in memory and optionally as one JSON
+    file per scenario in `cache_dir`, so a scenario is only simulated once.
+    Uncached scenarios are grouped for the batched solver and the groups are
+    spread over worker processes.
+    """
+
+    def __init__(self, simulation_properties: Dict, t_max: Optional[float] = None, batch_size: int = 16,
+                 workers: Optional[int] = None, cache_dir: Optional[str] = None):
+        self.simulation_properties = simulation_properties
+        self.t_max = t_max
+        self.batch_size = batch_size
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.cache = {}
+        self.solver_runs = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _load(self, key: str) -> Optional[Dict[str, tuple]]:
+        if key in self.cache:
+            return self.cache[key]
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r') as file:
+                        self.cache[key] = {k: tuple(v) for k, v in json.load(file).items()}
+                except (OSError, ValueError) as e:
+                    # Unreadable entry (e.g. left by an older, non-atomic write): simulate it again
+                    print(f"Ignoring cache entry {os.path.basename(path)}: {e}")
+                    return None
+                return self.cache[key]
+        return None
+
+    def _store(self, key: str, envelope: Dict[str, tuple]):
+        self.cache[key] = envelope
+        if self.cache_dir:
+            # Atomic, so a concurrent _load never sees a partly written entry
+            atomic_write_json(os.path.join(self.cache_dir, f"{key}.json"),
+                              {k: [float(x) for x in v] for k, v in envelope.items()}, indent=None)
+
+    def _execute(self, pending: Dict[str, List[Dict]]):
+        # Simulate the uncached scenarios and store their envelopes
+        keys = list(pending)
+        groups = [keys[i:i + self.batch_size] for i in range(0, len(keys), self.batch_size)]
+        if self.workers and self.workers > 1 and len(groups) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(_run_group, [pending[k] for k in group], self.simulation_properties, self.t_max)
+                           for group in groups]
+                for group, future in zip(groups, futures):
+                    for key, envelope in zip(group, future.result()):
+                        self._store(key, envelope)
+        else:
+            for group in groups:
+                for key, envelope in zip(group, _run_group([pending[k] for k in group],
+                                                           self.simulation_properties, self.t_max)):
+                    self._store(key, envelope)
+
+    def run(self, element_sets: List[List[Dict]]) -> List[Dict[str, tuple]]:
+        """
+        Envelopes of a list of scenarios, in the same order.
+
+        Args:
+            element_sets: Element lists of the scenarios
+
+        Returns:
+            List of channel -> (max, time of max, min, time of min) dicts
+        """
+        keys = [scenario_key(e, self.simulation_properties, self.t_max) for e in element_sets]
+        pending = {}
+        for key, elements in zip(keys, element_sets):
+            if key not in pending and self._load(key) is None:
+                pending[key] = elements
+
+        self._execute(pending)
+        self.solver_runs += len(pending)
+
+        return [self.cache[key] for key in keys]
@@ -0,0 +1,164 @@
+import copy
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Word_tasks import safe_float
+from moc_solver import project_elements
+from monte_carlo import latin_hypercube
+from scenario_runner import ScenarioRunner
+
+# Numeric fields considered by default, per element class
+SENSITIVITY_FIELDS = {
+    "Pipe": ("diameter", "length", "celerity", "manning_n"),
+    "SurgeTank": ("stank_a", "throttle_ao", "throttle_kin", "throttle_kout"),
+    "Turbine": ("jh", "tg", "tr", "td", "bp"),
+    "Valve": ("diameter", "loss_coefficient"),
+}
+
+# Envelope entries an output can refer to
+ENVELOPE_FIELDS = {"max": 0, "min": 2}
+
+
+def default_parameters(elements: List[Dict]) -> List[Tuple[str, str]]:
+    """
+    (element name, field) pairs of all non-zero SENSITIVITY_FIELDS in a project.
+    """
+    parameters = []
+    for element in elements:
+        for field in SENSITIVITY_FIELDS.get(element.get("class"), ()):
+            if safe_float(element.get(field)) != 0.0:
+                parameters.append((element["name"], field))
+    return parameters
+
+
+def parse_output(output: str) -> Tuple[str, int]:
+    """
+    Split an output such as "ST.ELEV:max" into its channel and envelope index.
+    """
+    channel, _, kind = output.rpartition(":")
+    if not channel or kind not in ENVELOPE_FIELDS:
+        raise ValueError(f"Output {output} must look like '<channel>:max' or '<channel>:min'.")
+    return channel, ENVELOPE_FIELDS[kind]
+
+
+class SensitivityAnalysis:
+    """
+    Ranks element parameters by their effect on envelope outputs.
+
+    Parameters are scaled by factors within +/- `spread` of their project
+    value. Two designs are available:
+
+    - one-at-a-time: a single shared baseline plus one run above and one
+      below per parameter (2k + 1 runs), giving central-difference
+      elasticities;
+    - Sobol: Saltelli's scheme with shared sample matrices A and B plus one
+      mixed matrix per parameter (N (k + 2) runs), giving first-order and
+      total indices (Saltelli 2010 / Jansen estimators).
+
+    All runs go through a ScenarioRunner (or a given subclass such as
+    distributed_sweep.DistributedRunner), so duplicated scenarios and those
+    cached from earlier analyses are not simulated again.
+    """
+
+    def __init__(self, project_data: Dict, outputs: Sequence[str],
+                 parameters: Optional[Sequence[Tuple[str, str]]] = None, spread: float = 0.1,
+                 t_max: Optional[float] = None, batch_size: int = 16, workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None, seed: int = 0, runner: Optional[ScenarioRunner] = None):
+        self.elements, self.simulation_properties = project_elements(project_data)
+        self.outputs = list(outputs)
+        self.targets = [parse_output(o) for o in self.outputs]
+        self.parameters = list(parameters) if parameters is not None else default_parameters(self.elements)
+        if not self.parameters:
+            raise ValueError("No parameters to analyse.")
+
+        by_name = {e.get("name"): e for e in self.elements}
+        for name, field in self.parameters:
+            if name not in by_name:
+                raise ValueError(f"No element named {name} in the project.")
+        self.nominal = np.array([safe_float(by_name[name].get(field)) for name, field in self.parameters])
+        self.spread = spread
+        self.rng = np.random.default_rng(seed)
+        self.runner = runner or ScenarioRunner(self.simulation_properties, t_max, batch_size, workers, cache_dir)
+
+    def variant(self, factors: np.ndarray) -> List[Dict]:
+        """Element list with every parameter scaled by its factor."""
+        elements = copy.deepcopy(self.elements)
+        by_name = {e.get("name"): e for e in elements}
+        for (name, field), value, factor in zip(self.parameters, self.nominal, factors):
+            # Rounded so that equal designs hash to the same cached scenario
+            by_name[name][field] = f"{value * factor:.6g}"
+        return elements
+
+    def evaluate(self, factors: np.ndarray) -> np.ndarray:
+        """
+        Outputs for a set of factor rows.
+
+        Args:
+            factors: Scale factors, shape (runs, parameters)
+
+        Returns:
+            Array of shape (runs, outputs)
+        """
+        envelopes = self.runner.run([self.variant(row) for row in factors])
+        return np.array([[env[channel][index] for channel, index in self.targets] for env in envelopes])
+
+    def one_at_a_time(self) -> Dict[str, List[Dict]]:
+        """
+        Central-difference elasticities around the project values.
+
+        Returns:
+            dict of output -> list of {"element", "field", "elasticity", "low", "high"}
+            sorted by decreasing |elasticity|
+        """
+        k = len(self.parameters)
+        factors = np.ones((2 * k + 1, k))
+        factors[1:k + 1][np.arange(k), np.arange(k)] = 1.0 + self.spread
+        factors[k + 1:][np.arange(k), np.arange(k)] = 1.0 - self.spread
+        values = self.evaluate(factors)
+
+        baseline, high, low = values[0], values[1:k + 1], values[k + 1:]
+        scale = np.where(np.abs(baseline) > 0.0, np.abs(baseline), 1.0)
+        elasticity = (high - low) / (2.0 * self.spread * scale)
+
+        ranking = {}
+        for j, output in enumerate(self.outputs):
+            rows = [{"element": name, "field": field, "elasticity": float(elasticity[i, j]),
+                     "low": float(low[i, j]), "high": float(high[i, j])}
+                    for i, (name, field) in enumerate(self.parameters)]
+            ranking[output] = sorted(rows, key=lambda row: -abs(row["elasticity"]))
+        return ranking
+
+    def sobol(self, samples: int = 64) -> Dict[str, List[Dict]]:
+        """
+        First-order and total Sobol indices.
+
+        Args:
+            samples: Base sample size N
+
+        Returns:
+            dict of output -> list of {"element", "field", "first", "total"}
+            sorted by decreasing total index
+        """
+        k = len(self.parameters)
+        unit = latin_hypercube(samples, 2 * k, self.rng)
+        factors = 1.0 + (2.0 * unit - 1.0) * self.spread
+        A, B = factors[:, :k], factors[:, k:]
+        mixed = np.repeat(A[None], k, axis=0)
+        mixed[np.arange(k), :, np.arange(k)] = B.T
+
+        values = self.evaluate(np.concatenate([A, B, mixed.reshape(-1, k)]))
+        fA, fB = values[:samples], values[samples:2 * samples]
+        fAB = values[2 * samples:].reshape(k, samples, -1)
+
+        variance = np.var(np.concatenate([fA, fB]), axis=0)
+        variance = np.where(variance > 0.0, variance, np.inf)
+        first = np.mean(fB[None] * (fAB - fA[None]), axis=1) / variance
+        total = 0.5 * np.mean((fA[None] - fAB) ** 2, axis=1) / variance
+
+        ranking = {}
+        for j, output in enumerate(self.outputs):
+            rows = [{"element": name, "field": field, "first": float(first[i, j]), "total": float(total[i, j])}
+                    for i, (name, field) in enumerate(self.parameters)]
+            ranking[output] = sorted(rows, key=lambda row: -row["total"])
+        return ranking
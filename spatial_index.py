@@ -0,0 +1,91 @@
+from typing import Dict, Hashable, List, Set, Tuple
+
+# Side of a grid cell in canvas pixels, about one element icon with its ports
+CELL_SIZE = 128
+
+BBox = Tuple[float, float, float, float]
+
+
+class SpatialIndex:
+    """
+    Uniform grid of bounding boxes for point and rectangle queries.
+
+    Each key is stored in every cell its box overlaps, so a query only looks
+    at the keys in the cells it touches and its cost depends on the number of
+    nearby items rather than on the total count.
+    """
+
+    def __init__(self, cell_size: float = CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self.boxes: Dict[Hashable, BBox] = {}
+        self.order: Dict[Hashable, int] = {}
+        self.counter = 0
+
+    def _cells(self, box: BBox):
+        x0, y0, x1, y1 = box
+        size = self.cell_size
+        for cx in range(int(x0 // size), int(x1 // size) + 1):
+            for cy in range(int(y0 // size), int(y1 // size) + 1):
+                yield cx, cy
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.boxes
+
+    def insert(self, key: Hashable, box: BBox):
+        """Add a key or move it to a new bounding box (x0, y0, x1, y1)."""
+        if key in self.boxes:
+            self.remove(key)
+        box = (min(box[0], box[2]), min(box[1], box[3]), max(box[0], box[2]), max(box[1], box[3]))
+        self.boxes[key] = box
+        self.counter += 1
+        self.order[key] = self.counter
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: Hashable):
+        """Drop a key, if present."""
+        box = self.boxes.pop(key, None)
+        if box is None:
+            return
+        self.order.pop(key, None)
+        for cell in self._cells(box):
+            members = self.cells.get(cell)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self.cells[cell]
+
+    def clear(self):
+        self.cells.clear()
+        self.boxes.clear()
+        self.order.clear()
+
+    def query_point(self, x: float, y: float) -> List[Hashable]:
+        """Keys whose box contains the point, most recently inserted first."""
+        cell = (int(x // self.cell_size), int(y // self.cell_size))
+        hits = [key for key in self.cells.get(cell, ())
+                if self.boxes[key][0] <= x <= self.boxes[key][2] and self.boxes[key][1] <= y <= self.boxes[key][3]]
+        return sorted(hits, key=lambda key: -self.order[key])
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> Set[Hashable]:
+        """Keys whose box intersects the rectangle."""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        size = self.cell_size
+        area = (int(x1 // size) - int(x0 // size) + 1) * (int(y1 // size) - int(y0 // size) + 1)
+        if area > len(self.cells):
+            # Large sparse rectangle, walking the occupied cells is cheaper
+            cells = [c for c in self.cells if x0 // size <= c[0] <= x1 // size and y0 // size <= c[1] <= y1 // size]
+        else:
+            cells = self._cells((x0, y0, x1, y1))
+        hits = set()
+        for cell in cells:
+            for key in self.cells.get(cell, ()):
+                box = self.boxes[key]
+                if box[0] <= x1 and box[2] >= x0 and box[1] <= y1 and box[3] >= y0:
+                    hits.add(key)
+        return hits
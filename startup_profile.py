@@ -0,0 +1,64 @@
+import builtins
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Modules listed in the report, slowest first
+REPORT_MODULES = 25
+
+_original_import = builtins.__import__
+_start = None
+_imports: Dict[str, List[float]] = {}  # module -> [total seconds, self seconds]
+_stack: List[List[float]] = []
+_marks: List[Tuple[str, float]] = []
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    frame = [0.0]  # Time spent in nested imports
+    _stack.append(frame)
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - started
+        _stack.pop()
+        if _stack:
+            _stack[-1][0] += elapsed
+        if name not in _imports:
+            _imports[name] = [elapsed, elapsed - frame[0]]
+
+
+def install():
+    """Start timing module imports and startup phases; call before the heavy imports."""
+    global _start
+    if _start is None:
+        _start = time.perf_counter()
+        builtins.__import__ = _timed_import
+
+
+def active() -> bool:
+    return _start is not None
+
+
+def mark(label: str):
+    """Record the time a startup phase finished; does nothing unless profiling."""
+    if _start is not None:
+        _marks.append((label, time.perf_counter() - _start))
+
+
+def report() -> str:
+    """
+    Startup timings as text: phases since install, then the slowest imports
+
+    Imports are listed with their total time and their self time, which
+    excludes the modules they imported in turn.
+    """
+    builtins.__import__ = _original_import
+    lines = ["Startup profile", "  Phases (seconds since start):"]
+    lines += [f"    {seconds:8.3f}  {label}" for label, seconds in _marks]
+    lines.append(f"  Slowest imports (of {len(_imports)}):        total      self")
+    slowest = sorted(_imports.items(), key=lambda item: -item[1][0])[:REPORT_MODULES]
+    lines += [f"    {name:<30} {total:8.3f}  {own:8.3f}" for name, (total, own) in slowest]
+    return "\n".join(lines)
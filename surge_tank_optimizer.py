@@ -0,0 +1,213 @@
+import copy
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from autosave import atomic_write_json
+from moc_solver import project_elements, run_project_transient
+from monte_carlo import latin_hypercube
+from run_database import content_hash
+
+# Design variables of a surge tank and their default search bounds
+DESIGN_FIELDS = ("stank_a", "throttle_ao", "throttle_kin", "throttle_kout")
+DEFAULT_BOUNDS = {
+    "stank_a": (5.0, 500.0),
+    "throttle_ao": (0.5, 20.0),
+    "throttle_kin": (0.0, 5.0),
+    "throttle_kout": (0.0, 5.0),
+}
+
+
+def evaluate_design(project_data: Dict, tank_name: str, design: Tuple[float, ...],
+                    t_max: Optional[float] = None) -> Tuple[float, float]:
+    """
+    Run the native solver for one surge tank design
+
+    Args:
+        project_data: Project JSON content
+        tank_name: Name of the SurgeTank element being designed
+        design: Values of DESIGN_FIELDS
+        t_max: Optional simulation length override [s]
+
+    Returns:
+        tuple: (maximum, minimum) water level in the tank [m]
+    """
+    data = copy.deepcopy(project_data)
+    tank = find_tank(data, tank_name)
+    for field, value in zip(DESIGN_FIELDS, design):
+        tank[field] = str(value)
+
+    with tempfile.TemporaryDirectory(prefix="airavata_design_") as history_path:
+        result = run_project_transient(data, t_max, history_path=history_path,
+                                       history_channels=[f"{tank_name}.ELEV"])
+        level_max, _, level_min, _ = result.envelope()[f"{tank_name}.ELEV"]
+    return float(level_max), float(level_min)
+
+
+def find_tank(project_data: Dict, tank_name: str) -> Dict:
+    """SurgeTank element of a project by name; raises ValueError when there is none."""
+    elements, _ = project_elements(project_data)
+    for element in elements:
+        if element.get("name") == tank_name and element.get("class") == "SurgeTank":
+            return element
+    raise ValueError(f"The project has no surge tank named {tank_name}.")
+
+
+def pareto_front(objectives: np.ndarray) -> np.ndarray:
+    """
+    Indices of the non-dominated rows of an (n, k) objective array (all minimised).
+    """
+    dominated = np.zeros(len(objectives), dtype=bool)
+    for i, row in enumerate(objectives):
+        better_or_equal = (objectives <= row).all(axis=1)
+        strictly_better = (objectives < row).any(axis=1)
+        dominated[i] = (better_or_equal & strictly_better).any()
+    return np.flatnonzero(~dominated)
+
+
+class SurgeTankOptimizer:
+    """
+    Searches surge tank area and throttle coefficients for the smallest tank
+    whose level stays between `el_bottom` and `el_top`.
+
+    Candidates are drawn in batches (Latin hypercube, then around the current
+    Pareto set) and evaluated in parallel worker processes. Every evaluated
+    design is memoised, optionally in a JSON file, so repeated or resumed
+    searches never run the same design twice. Persisted entries are keyed by
+    a hash of the project content and t_max, so a cache file never returns
+    envelopes of a different scenario. The result is the Pareto set of
+    feasible designs trading tank area against surge amplitude.
+    """
+
+    def __init__(self, project_data: Dict, tank_name: str, el_top: float, el_bottom: float,
+                 bounds: Optional[Dict[str, Tuple[float, float]]] = None, t_max: Optional[float] = None,
+                 workers: Optional[int] = None, cache_path: Optional[str] = None, seed: int = 0):
+        find_tank(project_data, tank_name)
+        self.project_data = project_data
+        self.tank_name = tank_name
+        self.el_top = el_top
+        self.el_bottom = el_bottom
+        self.bounds = dict(DEFAULT_BOUNDS, **(bounds or {}))
+        self.t_max = t_max
+        self.workers = workers
+        self.cache_path = cache_path
+        self.rng = np.random.default_rng(seed)
+        # Everything besides the design that decides the envelopes
+        self.scenario = content_hash({"project": project_data, "tank": tank_name, "t_max": t_max})
+
+        self.cache = {}
+        if cache_path and os.path.exists(cache_path):
+            entries = self._read_cache().get(self.scenario, {})
+            self.cache = {tuple(json.loads(key)): tuple(value) for key, value in entries.items()}
+
+    def _key(self, design) -> Tuple[float, ...]:
+        # Rounded so that designs differing only by float noise share a cache entry
+        return tuple(float(f"{value:.4g}") for value in design)
+
+    def _lower_upper(self) -> Tuple[np.ndarray, np.ndarray]:
+        lower = np.array([self.bounds[f][0] for f in DESIGN_FIELDS])
+        upper = np.array([self.bounds[f][1] for f in DESIGN_FIELDS])
+        return lower, upper
+
+    def latin_hypercube(self, count: int) -> np.ndarray:
+        """Stratified random designs spanning the bounds."""
+        lower, upper = self._lower_upper()
+        return lower + latin_hypercube(count, len(DESIGN_FIELDS), self.rng) * (upper - lower)
+
+    def perturb(self, designs: np.ndarray, count: int, scale: float) -> np.ndarray:
+        """Random designs around the given ones, clipped to the bounds."""
+        lower, upper = self._lower_upper()
+        parents = designs[self.rng.integers(len(designs), size=count)]
+        children = parents + self.rng.normal(0.0, scale, parents.shape) * (upper - lower)
+        return np.clip(children, lower, upper)
+
+    def evaluate(self, designs: np.ndarray) -> Dict[Tuple[float, ...], Tuple[float, float]]:
+        """
+        Evaluate a batch of designs, in parallel for the ones not yet cached.
+
+        Returns:
+            Mapping of design key -> (maximum level, minimum level)
+        """
+        keys = list(dict.fromkeys(self._key(d) for d in designs))
+        missing = [k for k in keys if k not in self.cache]
+        if missing:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(evaluate_design, self.project_data, self.tank_name, k, self.t_max)
+                           for k in missing]
+                for key, future in zip(missing, futures):
+                    try:
+                        self.cache[key] = future.result()
+                    except (ValueError, ArithmeticError) as e:
+                        # The solver rejected the design: infeasible, the search goes on
+                        print(f"Design {key} could not be simulated: {e}")
+                        self.cache[key] = (np.inf, -np.inf)
+                    except Exception as e:
+                        # Not a property of the design (worker crash, I/O...), keep it out of the cache
+                        self._save_cache()
+                        raise RuntimeError(f"Surge tank design {key} failed: {type(e).__name__}: {e}") from e
+            self._save_cache()
+        return {k: self.cache[k] for k in keys}
+
+    def _read_cache(self) -> Dict:
+        """Persisted cache, scenario hash -> {design: envelope}; empty when unreadable."""
+        try:
+            with open(self.cache_path, 'r') as file:
+                content = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        # Files of other layouts (or older versions) have no scenario sections
+        return {key: value for key, value in content.items() if isinstance(value, dict)}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        content = self._read_cache() if os.path.exists(self.cache_path) else {}
+        content[self.scenario] = {json.dumps(list(k)): list(v) for k, v in self.cache.items()}
+        atomic_write_json(self.cache_path, content)
+
+    def feasible(self) -> List[Tuple[Tuple[float, ...], Tuple[float, float]]]:
+        """Cached designs whose level envelope stays within el_bottom and el_top."""
+        return [(k, v) for k, v in self.cache.items() if v[0] <= self.el_top and v[1] >= self.el_bottom]
+
+    def pareto_set(self) -> List[Dict]:
+        """
+        Non-dominated feasible designs for (tank area, surge amplitude).
+
+        Returns:
+            List of dicts with the design fields, level_max and level_min, smallest area first
+        """
+        candidates = self.feasible()
+        if not candidates:
+            return []
+        objectives = np.array([(k[0], v[0] - v[1]) for k, v in candidates])
+        front = [candidates[i] for i in pareto_front(objectives)]
+        front.sort(key=lambda item: item[0][0])
+        return [dict(zip(DESIGN_FIELDS, k), level_max=v[0], level_min=v[1]) for k, v in front]
+
+    def run(self, generations: int = 5, batch_size: int = 16) -> List[Dict]:
+        """
+        Run the batched search.
+
+        Args:
+            generations: Number of candidate batches after the initial one
+            batch_size: Designs evaluated per batch
+
+        Returns:
+            Pareto set, see `pareto_set`
+        """
+        self.evaluate(self.latin_hypercube(batch_size))
+        for generation in range(generations):
+            front = self.pareto_set()
+            if front:
+                parents = np.array([[d[f] for f in DESIGN_FIELDS] for d in front])
+                scale = 0.1 / (generation + 1)
+                batch = self.perturb(parents, batch_size, scale)
+            else:
+                # Nothing feasible yet, keep exploring the whole box
+                batch = self.latin_hypercube(batch_size)
+            self.evaluate(batch)
+        return self.pareto_set()
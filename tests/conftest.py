@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# The application modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_user_data(tmp_path, monkeypatch):
+    """Keep the run database and the managed results directory of every test in its own temporary directory."""
+    monkeypatch.setenv("AIRAVATA_RUN_DB", str(tmp_path / "user" / "runs.sqlite"))
+    monkeypatch.setenv("AIRAVATA_RESULTS", str(tmp_path / "user" / "results"))
@@ -0,0 +1,112 @@
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+import autosave
+from autosave import ProjectAutosave, atomic_write_json, journal_path, recover, snapshot_path
+
+PROPERTIES = {"time_step": "0.01"}
+
+
+def element(name: str, **values) -> dict:
+    return dict({"class": "Pipe", "name": name}, **values)
+
+
+def content(elements: list, properties: dict = PROPERTIES) -> dict:
+    return {"elements": {"elements": elements, "simulation_properties": properties}}
+
+
+@pytest.fixture
+def project(tmp_path) -> str:
+    path = str(tmp_path / "project.json")
+    atomic_write_json(path, content([element("P1", length="100"), element("P2")]))
+    return path
+
+
+def test_atomic_write_keeps_the_file_mode_and_leaves_no_temporary_files(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("{}")
+    os.chmod(path, 0o600)
+    atomic_write_json(str(path), {"a": 1})
+    assert json.loads(path.read_text()) == {"a": 1}
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    threads = [threading.Thread(target=atomic_write_json, args=(str(path), {"a": k})) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert json.loads(path.read_text())["a"] in range(8)
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_journal_holds_only_the_changes_and_recovers_them(project):
+    saver = ProjectAutosave(project)
+    saver.update([element("P1", length="100"), element("P2"), element("P3")], PROPERTIES)
+    saver.update([element("P3"), element("P1", length="250")], {"time_step": "0.02"})
+    saver.update([element("P3"), element("P1", length="250")], {"time_step": "0.02"})
+    saver.close()
+
+    entries = [json.loads(line) for line in open(journal_path(project))]
+    assert len(entries) == 2
+    assert entries[0]["set"] == [element("P3")]
+    assert entries[1]["set"] == [element("P1", length="250")] and entries[1]["remove"] == ["P2"]
+    assert recover(project) == content([element("P3"), element("P1", length="250")], {"time_step": "0.02"})
+    # The project file itself is untouched until saved
+    assert json.load(open(project)) == content([element("P1", length="100"), element("P2")])
+
+
+def test_truncated_last_entry_is_ignored(project):
+    saver = ProjectAutosave(project)
+    saver.update([element("P1", length="200"), element("P2")], PROPERTIES)
+    saver.close()
+    with open(journal_path(project), 'a') as file:
+        file.write('{"set": [{"class": "Pipe", "name": "P1", "len')
+    assert recover(project) == content([element("P1", length="200"), element("P2")])
+
+
+def test_compaction_writes_a_snapshot_and_empties_the_journal(project, monkeypatch):
+    monkeypatch.setattr(autosave, "COMPACT_ENTRIES", 3)
+    saver = ProjectAutosave(project)
+    for k in range(4):
+        saver.update([element("P1", length=str(k))], PROPERTIES)
+    saver.close()
+    assert json.load(open(snapshot_path(project))) == content([element("P1", length="2")])
+    assert len(open(journal_path(project)).readlines()) == 1
+    assert recover(project) == content([element("P1", length="3")])
+
+    # A new session continues from the recovered state
+    again = ProjectAutosave(project)
+    again.update([element("P1", length="3")], PROPERTIES)
+    again.close()
+    assert len(open(journal_path(project)).readlines()) == 1
+
+
+def test_save_writes_the_project_and_discards_the_autosave(project):
+    results = []
+    saver = ProjectAutosave(project)
+    saver.update([element("P1", length="300")], PROPERTIES)
+    saver.save([element("P1", length="300")], PROPERTIES, done=results.append)
+    saver.close()
+    assert results == [None]
+    assert json.load(open(project)) == content([element("P1", length="300")])
+    assert recover(project) is None
+
+
+def test_failed_save_is_reported_and_the_worker_goes_on(project, monkeypatch):
+    def broken(path, data):
+        raise OSError("disk full")
+
+    results, errors = [], []
+    monkeypatch.setattr(autosave, "save_project_file", broken)
+    saver = ProjectAutosave(project, on_error=errors.append)
+    saver.save([element("P1")], PROPERTIES, done=results.append)
+    saver.save([element("P1")], PROPERTIES)
+    saver.update([element("P1", length="5")], PROPERTIES)
+    saver.close()
+    assert results == ["Saving project.json failed: disk full"]
+    assert errors == ["Saving project.json failed: disk full"]
+    assert recover(project) == content([element("P1", length="5")])
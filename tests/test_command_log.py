@@ -0,0 +1,109 @@
+from command_log import AddCommand, CommandLog, DeleteCommand, EditCommand, MoveCommand, data_changes
+
+
+class FakeElement:
+    def __init__(self, name: str, **data):
+        self.name = name
+        self.x, self.y = 0.0, 0.0
+        self.data = dict(data, name=name)
+
+    def to_data(self) -> dict:
+        return dict(self.data, x=self.x, y=self.y)
+
+
+class FakeWhiteboard:
+    """The whiteboard operations the commands call, recording into the log as the real one does."""
+
+    def __init__(self, log: CommandLog):
+        self.log = log
+        self.elements = []
+
+    def remove_element(self, element):
+        self.elements.remove(element)
+        self.log.record(DeleteCommand(self, element))
+
+    def restore_element(self, element):
+        self.elements.append(element)
+        self.log.record(AddCommand(self, element))
+
+    def move_element(self, element, x, y):
+        element.x, element.y = x, y
+
+    def update_element(self, element, values):
+        element.data.update(values)
+
+
+def test_undo_and_redo_of_add_and_delete_are_not_recorded_again():
+    log = CommandLog()
+    board = FakeWhiteboard(log)
+    valve = FakeElement("V1")
+    board.elements.append(valve)
+    log.record(AddCommand(board, valve))
+
+    assert log.undo().label == "Add V1"
+    assert board.elements == [] and not log.can_undo() and log.can_redo()
+    log.redo()
+    assert board.elements == [valve] and len(log.undo_stack) == 1 and not log.can_redo()
+
+    board.elements.remove(valve)
+    log.record(DeleteCommand(board, valve))
+    log.undo()
+    assert board.elements == [valve]
+    assert log.undo() is not None and log.undo() is None
+    assert board.elements == []
+
+
+def test_drag_events_merge_until_the_button_is_released():
+    log = CommandLog()
+    board = FakeWhiteboard(log)
+    pipe, valve = FakeElement("P1"), FakeElement("V1")
+    for x in (1.0, 2.0, 3.0):
+        log.record(MoveCommand(board, valve, (0.0, 0.0), (x, x)))
+    log.close_move()
+    log.record(MoveCommand(board, valve, (3.0, 3.0), (5.0, 5.0)))
+    log.record(MoveCommand(board, pipe, (0.0, 0.0), (1.0, 1.0)))
+    assert len(log.undo_stack) == 3
+
+    log.undo()
+    log.undo()
+    assert (valve.x, valve.y) == (3.0, 3.0)
+    log.undo()
+    assert (valve.x, valve.y) == (0.0, 0.0)
+    # An undone drag never absorbs a later one
+    log.redo()
+    log.record(MoveCommand(board, valve, (3.0, 3.0), (4.0, 4.0)))
+    assert len(log.undo_stack) == 2 and not log.can_redo()
+
+
+def test_edits_restore_the_changed_fields_only():
+    log = CommandLog()
+    board = FakeWhiteboard(log)
+    valve = FakeElement("V1", diameter="2", loss_coefficient="1")
+    before = valve.to_data()
+    after = dict(before, diameter="3", x=50.0)
+    changes = data_changes(before, after)
+    assert changes == {"diameter": ("2", "3")}
+    valve.data.update(diameter="3")
+    log.record(EditCommand(board, valve, changes))
+    log.undo()
+    assert valve.data["diameter"] == "2" and valve.data["loss_coefficient"] == "1"
+    log.redo()
+    assert valve.data["diameter"] == "3"
+
+
+def test_history_is_capped_by_memory_and_every_change_bumps_the_version():
+    log = CommandLog(max_bytes=3000)
+    board = FakeWhiteboard(log)
+    elements = [FakeElement(f"E{k}", table=[[float(i), 1.0] for i in range(10)]) for k in range(20)]
+    for element in elements:
+        board.elements.append(element)
+        log.record(AddCommand(board, element))
+    assert 1 <= len(log.undo_stack) < 20
+    assert log.bytes == sum(command.size() for command in log.undo_stack) <= 3000
+    assert log.undo_stack[-1].element is elements[-1]
+
+    version = log.version
+    log.undo()
+    log.redo()
+    log.clear()
+    assert log.version == version + 3 and log.bytes == 0 and not log.can_undo()
@@ -0,0 +1,39 @@
+import pytest
+
+from discretisation import DiscretisationPlan, max_stable_time_step, plan_discretisation, suggest_time_step
+
+CONDUITS = [
+    {"name": "P1", "length": 1000.0, "celerity": 1000.0},
+    {"name": "P2", "length": 330.0, "celerity": 1100.0},
+    {"name": "P3", "length": 2470.0, "celerity": 950.0},
+]
+
+
+def test_suggested_time_step_holds_courant_one_within_tolerance():
+    tolerance = 0.02
+    dt = suggest_time_step(CONDUITS, tolerance)
+    assert dt <= max_stable_time_step(CONDUITS) == pytest.approx(0.3)
+
+    plan = DiscretisationPlan(CONDUITS, dt, tolerance)
+    assert plan.within_tolerance
+    for conduit in CONDUITS:
+        planned = plan.conduits[conduit["name"]]
+        # Adjusted celerity gives Courant = 1 exactly on the planned mesh
+        assert conduit["length"] / (planned["segments"] * dt) == pytest.approx(planned["celerity_adjusted"])
+        assert abs(planned["celerity_adjusted"] / conduit["celerity"] - 1.0) <= tolerance + 1e-12
+
+
+def test_requested_step_outside_tolerance_falls_back_to_a_smaller_one():
+    plan = plan_discretisation(CONDUITS, {"time_step": 0.2, "celerity_tolerance": 0.01})
+    assert not plan.within_tolerance
+    assert plan.dt < 0.2
+    assert max(c["celerity_error"] for c in plan.conduits.values()) <= 0.01 + 1e-12
+    assert "using" in plan.report()
+
+
+def test_time_step_within_tolerance_is_kept():
+    plan = plan_discretisation(CONDUITS[:1], {"time_step": 0.01})
+    assert plan.within_tolerance
+    assert plan.dt == 0.01
+    assert plan.segments("P1") == 100
+    assert plan.segments("unknown", default=7) == 7
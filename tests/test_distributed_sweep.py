@@ -0,0 +1,97 @@
+import json
+import threading
+
+import pytest
+
+from distributed_sweep import DistributedRunner, SweepBroker, SweepWorker, pack_bundle, unpack_bundle
+from scenario_runner import ScenarioRunner
+
+ELEMENTS = [
+    {"class": "InletReservoir", "name": "R1", "level_h": 100.0, "pipe_z": 0.0},
+    {"class": "Pipe", "name": "P1", "outlet_element": "R1", "inlet_element": "V1", "length": 1000.0,
+     "diameter": 2.0, "celerity": 1000.0, "manning_n": 0.012},
+    {"class": "Valve", "name": "V1", "diameter": 2.0, "loss_coefficient": 2.0, "elevation_z": 0.0,
+     "custom_values": [["0", "1"], ["1", "0"]]},
+]
+PROPERTIES = {"simulation_time": 4.0, "time_step": 0.01, "dtout": 0.1, "gravity": 9.81}
+ENVELOPE = {"V1.HEAD": (150.0, 2.0, 60.0, 4.0)}
+
+
+def job(name: str) -> dict:
+    return {"elements": [{"class": "Valve", "name": name}], "simulation_properties": PROPERTIES, "t_max": None}
+
+
+def test_bundle_round_trip():
+    assert unpack_bundle(pack_bundle(ENVELOPE)) == ENVELOPE
+
+
+def test_job_lifecycle_deduplicates_and_writes_the_cache(tmp_path):
+    broker = SweepBroker(cache_dir=str(tmp_path))
+    assert broker.submit({"a": job("a"), "b": job("b")}) == 2
+    assert broker.submit({"a": job("a")}) == 0
+
+    leased = broker.lease("w1", count=1)
+    assert list(leased) == ["a"]
+    assert broker.status()["leased"] == 1
+    broker.complete("w1", {"a": pack_bundle(ENVELOPE)})
+
+    assert broker.collect(["a", "b"]) == {"results": {"a": pack_bundle(ENVELOPE)}, "failed": {}}
+    assert json.loads((tmp_path / "a.json").read_text()) == {"V1.HEAD": [150.0, 2.0, 60.0, 4.0]}
+    # Finished jobs are not queued again, and a new broker picks them up from the cache
+    assert broker.submit({"a": job("a")}) == 0
+    assert SweepBroker(cache_dir=str(tmp_path)).submit({"a": job("a")}) == 0
+
+
+def test_failed_jobs_are_retried_then_given_up():
+    broker = SweepBroker(max_retries=1)
+    broker.submit({"a": job("a")})
+    broker.fail("w1", list(broker.lease("w1")), "ValueError: bad")
+    assert list(broker.lease("w2")) == ["a"]
+    broker.fail("w2", ["a"], "ValueError: bad")
+    assert broker.lease("w3") == {}
+    assert broker.collect(["a"]) == {"results": {}, "failed": {"a": "ValueError: bad"}}
+    # Submitting again starts over
+    assert broker.submit({"a": job("a")}) == 1
+
+
+def test_expired_lease_goes_back_to_the_queue():
+    broker = SweepBroker(lease_timeout=-1.0)
+    broker.submit({"a": job("a")})
+    assert list(broker.lease("w1")) == ["a"]
+    assert list(broker.lease("w2")) == ["a"]
+    assert broker.attempts["a"] == 1
+
+
+def test_runner_uses_broker_workers_over_http(tmp_path):
+    broker = SweepBroker(cache_dir=str(tmp_path / "broker"))
+    url = broker.serve(port=0)
+    try:
+        worker = SweepWorker(url, batch_size=4, poll_interval=0.05)
+        thread = threading.Thread(target=worker.run_forever, kwargs={"idle_exit": 2.0}, daemon=True)
+        thread.start()
+        runner = DistributedRunner(url, PROPERTIES, poll_interval=0.05, timeout=60.0)
+        envelope = runner.run([ELEMENTS])[0]
+        thread.join()
+    finally:
+        broker.shutdown()
+
+    local = ScenarioRunner(PROPERTIES).run([ELEMENTS])[0]
+    assert envelope["V1.HEAD"] == pytest.approx(local["V1.HEAD"])
+    assert runner.solver_runs == 1
+
+
+def test_broken_job_is_reported_as_failed(tmp_path):
+    broker = SweepBroker(max_retries=0)
+    url = broker.serve(port=0)
+    try:
+        broken = [dict(e) for e in ELEMENTS]
+        broken[1]["inlet_element"] = "missing"
+        runner = DistributedRunner(url, PROPERTIES, poll_interval=0.05, timeout=60.0)
+        worker = SweepWorker(url, poll_interval=0.05)
+        thread = threading.Thread(target=worker.run_forever, kwargs={"idle_exit": 1.0}, daemon=True)
+        thread.start()
+        with pytest.raises(ValueError, match="failed"):
+            runner.run([broken])
+        thread.join()
+    finally:
+        broker.shutdown()
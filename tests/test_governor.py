@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from governor import TurbineGovernors
+
+
+def turbine(name: str, table: list, mode: str = "Emergency", t_load_rej: float = 1.0, dt_ramp: float = 0.0) -> dict:
+    return {"name": name, "table_data": table, "governor_mode": mode, "t_load_rej": t_load_rej,
+            "dt_ramp": dt_ramp, "tg": 0.0}
+
+
+def test_scheduled_gate_interpolates_every_table_like_np_interp():
+    tables = [
+        [[0.0, 1.0], [2.0, 0.5], [5.0, 0.0]],
+        [[0.0, 80.0], [1.0, 80.0], [3.0, 20.0], [4.0, 10.0], [8.0, 0.0]],  # Percent, longer than the others
+        [[0.5, 0.9], [6.0, 0.1]],  # Starts after t = 0
+    ]
+    governors = TurbineGovernors([turbine(f"T{i}", table) for i, table in enumerate(tables)])
+
+    for t in np.linspace(-1.0, 10.0, 111):
+        gate = governors.scheduled_gate(t)
+        for i, table in enumerate(governors.tables):
+            assert gate[i] == pytest.approx(np.interp(t, table[:, 0], table[:, 1]), abs=1e-12)
+
+
+def test_scheduled_gate_without_table_ramps_closed_and_leaves_pid_units_alone():
+    governors = TurbineGovernors([
+        turbine("ramp", [[0.0, 0.0]] * 7, t_load_rej=1.0, dt_ramp=4.0),
+        turbine("instant", [[0.0, 0.0]] * 7, t_load_rej=1.0),
+        turbine("pid", [[0.0, 1.0], [5.0, 0.0]], mode="Partial"),
+    ])
+    governors.gate[:] = [1.0, 1.0, 0.7]
+
+    assert governors.scheduled_gate(0.5).tolist() == [1.0, 1.0, 0.7]
+    assert governors.scheduled_gate(3.0) == pytest.approx([0.5, 0.0, 0.7])
+    assert governors.scheduled_gate(9.0) == pytest.approx([0.0, 0.0, 0.7])
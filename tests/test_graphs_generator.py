@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+import graphs_generator
+from graphs_generator import load_result_history
+from run_database import RunDatabase
+
+PROJECT = {"elements": {"elements": [
+    {"class": "InletReservoir", "name": "R1", "level_h": 100.0, "pipe_z": 0.0},
+    {"class": "Pipe", "name": "P1", "outlet_element": "R1", "inlet_element": "V1", "length": 1000.0,
+     "diameter": 2.0, "celerity": 1000.0, "manning_n": 0.012},
+    {"class": "Valve", "name": "V1", "diameter": 2.0, "loss_coefficient": 2.0, "elevation_z": 0.0,
+     "custom_values": [["0", "1"], ["1", "0"]]},
+], "simulation_properties": {"simulation_time": 4.0, "time_step": 0.01, "dtout": 0.1, "gravity": 9.81}}}
+
+
+def test_history_is_recorded_once_then_reused(monkeypatch):
+    first = load_result_history("project.json", PROJECT)
+    assert "V1.HEAD" in first.channel_names
+    assert RunDatabase().runs()[0]["history_path"] == first.path
+
+    def no_solver(*args, **kwargs):
+        raise AssertionError("the recorded history was simulated again")
+
+    monkeypatch.setattr(graphs_generator, "run_project_transient", no_solver)
+    again = load_result_history("project.json", PROJECT)
+    assert again.path == first.path
+    assert np.asarray(again.channel("V1.HEAD")) == pytest.approx(np.asarray(first.channel("V1.HEAD")))
+
+
+def test_unsolvable_project_falls_back_with_a_warning():
+    messages = []
+    broken = {"elements": {"elements": [{"class": "Pipe", "name": "P1", "inlet_element": "missing"}],
+                           "simulation_properties": {}}}
+    assert load_result_history(None, broken, log=lambda message, level="info": messages.append(level)) is None
+    assert messages == ["warning"]
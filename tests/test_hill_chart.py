@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from hill_chart import HillChart, builtin_chart
+
+
+def planar_chart() -> HillChart:
+    n11 = np.array([0.0, 0.5, 1.5, 2.0])
+    gate = np.array([0.0, 0.4, 1.0])
+    speed, opening = np.meshgrid(n11, gate)
+    return HillChart(n11, gate, 2.0 * speed + 3.0 * opening, speed * opening, relative=True)
+
+
+def test_bilinear_lookup_is_exact_for_bilinear_surfaces_and_clamps_at_the_edges():
+    chart = planar_chart()
+    n11 = np.array([0.1, 0.75, 1.9, 1.5])
+    gate = np.array([0.2, 0.9, 0.0, 0.4])
+    flow, torque = chart.evaluate(n11, gate)
+    assert flow == pytest.approx(2.0 * n11 + 3.0 * gate)
+    assert torque == pytest.approx(n11 * gate)
+
+    flow, torque = chart.evaluate(np.array([-1.0, 5.0]), np.array([2.0, -0.5]))
+    assert flow == pytest.approx([3.0, 4.0])
+    assert torque == pytest.approx([0.0, 0.0])
+
+
+def test_saved_grid_loads_back_unchanged(tmp_path):
+    chart = builtin_chart("Francis 23")
+    path = str(tmp_path / "chart.npz")
+    chart.save(path, source_mtime=123.0)
+
+    loaded, source_mtime = HillChart.load(path)
+    assert source_mtime == 123.0
+    assert loaded.relative
+    for name in ("n11", "gate", "unit_flow", "unit_torque"):
+        assert np.array_equal(getattr(loaded, name), getattr(chart, name))
+
+
+def test_builtin_chart_passes_through_the_rated_point_and_runaway():
+    chart = builtin_chart("Kaplan 115")
+    flow, torque = chart.evaluate(np.array([1.0, 2.3]), np.array([1.0, 1.0]))
+    assert flow[0] == pytest.approx(1.0)
+    # Torque is quadratic in speed, so only the grid resolution is expected between grid points
+    assert torque == pytest.approx([1.0, 0.0], abs=1e-3)
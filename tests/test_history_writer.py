@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+
+import history_writer
+from history_writer import HistoryStore, HistoryWriter, default_history_path, select_channels
+from run_database import RunDatabase
+
+CHANNELS = ["R1.HEAD", "P1.Q", "T1.SPEED", "T1.GATE"]
+
+
+def test_select_channels_by_channel_or_element_name():
+    assert select_channels(CHANNELS, None) == [0, 1, 2, 3]
+    assert select_channels(CHANNELS, ["P1.Q", "T1"]) == [1, 2, 3]
+
+
+def test_store_keeps_every_recorded_row_across_chunks_and_envelopes_of_every_step(tmp_path):
+    path = str(tmp_path / "store")
+    writer = HistoryWriter(path, CHANNELS, [0, 2], chunk_rows=4)
+    rows = []
+    for step in range(23):
+        t = step * 0.01
+        values = np.array([t, -t, 10.0 * np.sin(t * 50.0), 1.0])
+        writer.update_envelope(t, values)
+        if step % 5 == 0:  # Decimated output
+            writer.record(t, values)
+            rows.append(values)
+    writer.close()
+
+    store = HistoryStore(path)
+    assert store.channel_names == ["R1.HEAD", "T1.SPEED"]
+    assert store.rows == 5
+    assert np.asarray(store.times) == pytest.approx([0.0, 0.05, 0.1, 0.15, 0.2])
+    assert np.asarray(store.channel("T1.SPEED")) == pytest.approx([row[2] for row in rows])
+
+    # Envelopes include the steps that were not written and the channels that were not selected
+    envelope = store.envelope()
+    assert envelope["P1.Q"][2] == pytest.approx(-0.22)
+    assert envelope["P1.Q"][3] == pytest.approx(0.22)
+    speeds = 10.0 * np.sin(np.arange(23) * 0.01 * 50.0)
+    assert envelope["T1.SPEED"][0] == pytest.approx(speeds.max())
+
+
+def test_pruning_keeps_the_newest_stores_and_clears_their_runs(tmp_path):
+    database = RunDatabase()
+    paths = []
+    for k in range(history_writer.HISTORY_RETENTION + 3):
+        path = default_history_path()
+        os.utime(path, (1000.0 + k, 1000.0 + k))
+        database.record([{"name": "R1"}], {}, {}, history_path=path)
+        paths.append(path)
+
+    assert sorted(os.listdir(history_writer.results_directory())) == sorted(
+        os.path.basename(p) for p in paths[-history_writer.HISTORY_RETENTION:])
+    recorded = [run["history_path"] for run in sorted(database.runs(limit=100), key=lambda run: run["id"])]
+    assert recorded[:3] == [None, None, None]
+    assert recorded[3:] == paths[3:]
+    database.close()
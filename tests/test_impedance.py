@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from impedance import ImpedanceAnalysis, frequency_grid, resonance_periods
+from moc_solver import Network
+
+LENGTH = 1200.0
+CELERITY = 1000.0
+
+
+def reservoir_pipe_turbine() -> Network:
+    elements = [
+        {"class": "InletReservoir", "name": "R1", "level_h": 100.0, "pipe_z": 0.0},
+        {"class": "Pipe", "name": "P1", "outlet_element": "R1", "inlet_element": "T1", "length": LENGTH,
+         "diameter": 2.0, "celerity": CELERITY, "manning_n": 0.012},
+        {"class": "Turbine", "name": "T1", "z_elev": 0.0, "qo": 10.0, "efficiency": 0.9},
+    ]
+    return Network(elements, {"simulation_time": 1.0, "time_step": 0.01, "gravity": 9.81})
+
+
+def test_pipe_closed_by_a_constant_flow_unit_resonates_at_odd_quarter_wave_periods():
+    analysis = ImpedanceAnalysis(reservoir_pipe_turbine())
+    periods = analysis.natural_periods(frequency_grid(100.0, 0.5, 20000), "T1")
+
+    fundamental = 4.0 * LENGTH / CELERITY
+    assert periods[0] == pytest.approx(fundamental, rel=1e-3)
+    assert periods[1] == pytest.approx(fundamental / 3.0, rel=1e-3)
+    assert periods[2] == pytest.approx(fundamental / 5.0, rel=1e-3)
+
+
+def test_resonance_periods_reads_local_maxima_longest_first():
+    omega = np.linspace(0.1, 10.0, 1000)
+    response = 1.0 / np.abs(omega - 2.0).clip(1e-3) + 1.0 / np.abs(omega - 5.0).clip(1e-3)
+    periods = resonance_periods(omega, response)
+    assert periods == pytest.approx([2.0 * np.pi / 2.0, 2.0 * np.pi / 5.0], rel=1e-2)
@@ -0,0 +1,133 @@
+import math
+
+import numpy as np
+import pytest
+
+from moc_solver import MOCSolver, Network, darcy_from_manning
+
+GRAVITY = 9.81
+LEVEL = 100.0
+LENGTH = 1000.0
+DIAMETER = 2.0
+CELERITY = 1000.0
+MANNING = 0.012
+
+
+def pipeline(end: dict, simulation_time: float = 20.0) -> tuple:
+    """Reservoir, one pipe and the given end element (valve or turbine named "E")."""
+    elements = [
+        {"class": "InletReservoir", "name": "R1", "level_h": LEVEL, "pipe_z": 0.0},
+        {"class": "Pipe", "name": "P1", "outlet_element": "R1", "inlet_element": "E", "length": LENGTH,
+         "diameter": DIAMETER, "celerity": CELERITY, "manning_n": MANNING},
+        dict(end, name="E"),
+    ]
+    return elements, {"simulation_time": simulation_time, "time_step": 0.01, "dtout": 0.1, "gravity": GRAVITY}
+
+
+def run(elements, properties, tmp_path):
+    return MOCSolver(Network(elements, properties)).run(history_path=str(tmp_path / "history"))
+
+
+def pipe_resistance() -> float:
+    area = math.pi * DIAMETER ** 2 / 4.0
+    friction = darcy_from_manning(MANNING, DIAMETER, GRAVITY)
+    return friction * LENGTH / (2.0 * GRAVITY * DIAMETER * area ** 2)
+
+
+def test_steady_state_matches_orifice_and_friction_balance(tmp_path):
+    loss = 2.0
+    elements, properties = pipeline({"class": "Valve", "diameter": DIAMETER, "loss_coefficient": loss,
+                                     "elevation_z": 0.0}, simulation_time=5.0)
+    result = run(elements, properties, tmp_path)
+
+    area = math.pi * DIAMETER ** 2 / 4.0
+    valve_cv = area * math.sqrt(2.0 * GRAVITY / loss)
+    expected = math.sqrt(LEVEL / (pipe_resistance() + 1.0 / valve_cv ** 2))
+    flow = result.channel("P1.Q")
+    assert flow[0] == pytest.approx(expected, rel=1e-6)
+    assert result.channel("E.Q")[0] == pytest.approx(expected, rel=1e-6)
+    # Nothing changes, so the steady state must hold for the whole run
+    assert np.ptp(flow) < 1e-6 * expected
+    assert np.ptp(result.channel("E.HEAD")) < 1e-6 * LEVEL
+
+
+def test_turbine_steady_state_sets_rated_power(tmp_path):
+    elements, properties = pipeline({"class": "Turbine", "z_elev": 0.0, "qo": 10.0, "efficiency": 0.9},
+                                    simulation_time=2.0)
+    result = run(elements, properties, tmp_path)
+
+    net_head = LEVEL - pipe_resistance() * 10.0 ** 2
+    assert result.channel("E.HEAD")[0] == pytest.approx(net_head, rel=1e-6)
+    assert result.channel("P1.Q")[0] == pytest.approx(10.0, rel=1e-6)
+    assert result.channel("E.POWER")[0] == pytest.approx(1000.0 * GRAVITY * 10.0 * net_head * 0.9, rel=1e-6)
+
+
+def test_load_rejection_raises_speed_and_pressure_then_closes(tmp_path):
+    elements, properties = pipeline({"class": "Turbine", "z_elev": 0.0, "qo": 10.0, "efficiency": 0.9,
+                                     "no": 500, "jh": 2e5, "t_load_rej": 1.0, "dt_ramp": 0.0,
+                                     "governor_mode": "Emergency", "table_data": [[0, 1], [1, 1], [6, 0]]})
+    result = run(elements, properties, tmp_path)
+    envelope = result.envelope()
+
+    speed = result.channel("E.SPEED")
+    assert speed[0] == pytest.approx(500.0)
+    # The unit overspeeds until the gate has closed far enough, then never exceeds that peak
+    max_speed, max_time = envelope["E.SPEED"][:2]
+    assert 500.0 < max_speed < 1.5 * 500.0
+    assert 1.0 < max_time <= 6.0 + 0.01
+
+    assert result.channel("E.GATE")[-1] == pytest.approx(0.0)
+    assert abs(result.channel("E.Q")[-1]) < 1e-6
+
+    # Closing the gate raises the head at the turbine, but not beyond the Joukowsky surge
+    steady_head = result.channel("E.HEAD")[0]
+    velocity = 10.0 / (math.pi * DIAMETER ** 2 / 4.0)
+    max_head = envelope["E.HEAD"][0]
+    assert max_head > steady_head + 10.0
+    assert max_head < steady_head + CELERITY * velocity / GRAVITY
+
+
+def test_sample_matches_channel_names_without_calling_them_first():
+    elements, properties = pipeline({"class": "Valve", "diameter": DIAMETER, "loss_coefficient": 2.0,
+                                     "elevation_z": 0.0}, simulation_time=1.0)
+    solver = MOCSolver(Network(elements, properties))
+    solver.steady_state()
+    values = solver.sample()
+    assert len(values) == len(solver.channel_names())
+
+
+@pytest.mark.parametrize("model", ["DVCM", "DGCM"])
+def test_column_separation_holds_the_head_at_vapour_pressure(tmp_path, model):
+    # Closing the valve in 0.1 s sends a negative wave far larger than the static head back to it
+    end = {"class": "Valve", "diameter": DIAMETER, "loss_coefficient": 2.0, "elevation_z": 0.0,
+           "custom_values": [[0.0, 1.0], [0.5, 1.0], [0.6, 0.0]]}
+    elements, properties = pipeline(end, simulation_time=6.0)
+    vapour_head = (2340.0 - 101325.0) / (1000.0 * GRAVITY)
+
+    elastic = run(elements, properties, tmp_path / "elastic").envelope()
+    assert elastic["E.HEAD"][2] < vapour_head - 100.0
+
+    properties["cavitation_model"] = model
+    separated = run(elements, properties, tmp_path / model).envelope()
+    assert separated["E.HEAD"][2] >= vapour_head - 1e-6
+    assert max(values[0] for channel, values in separated.items() if ".CAVITY" in channel) > 0.0
+
+
+def test_restart_from_checkpoint_continues_the_uninterrupted_run(tmp_path):
+    elements, properties = pipeline({"class": "Turbine", "z_elev": 0.0, "qo": 10.0, "efficiency": 0.9,
+                                     "no": 500, "jh": 2e5, "t_load_rej": 1.0, "dt_ramp": 0.0,
+                                     "governor_mode": "Emergency", "table_data": [[0, 1], [1, 1], [6, 0]]},
+                                    simulation_time=8.0)
+    checkpoint = str(tmp_path / "checkpoint.npy")
+    full = MOCSolver(Network(elements, properties)).run(history_path=str(tmp_path / "full"),
+                                                       checkpoint_path=checkpoint, checkpoint_times=[3.0])
+    restarted = MOCSolver(Network(elements, properties)).run(history_path=str(tmp_path / "restarted"),
+                                                            restart_path=checkpoint, restart_time=3.0)
+
+    full_times = np.asarray(full.times)
+    times = np.asarray(restarted.times)
+    assert times[0] == pytest.approx(3.0, abs=1e-9) and times[-1] == pytest.approx(full_times[-1])
+    rows = np.searchsorted(full_times, times - 1e-9)
+    for channel in ("E.HEAD", "E.SPEED", "E.GATE", "P1.Q"):
+        assert np.asarray(restarted.channel(channel)) == pytest.approx(np.asarray(full.channel(channel))[rows],
+                                                                       rel=1e-9, abs=1e-9)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from monte_carlo import MonteCarloStudy, P2Quantile, latin_hypercube
+
+PROJECT = {"elements": {"elements": [
+    {"class": "InletReservoir", "name": "R1", "level_h": 100.0, "pipe_z": 0.0},
+    {"class": "Pipe", "name": "P1", "outlet_element": "R1", "inlet_element": "V1", "length": 1000.0,
+     "diameter": 2.0, "celerity": "1000", "manning_n": "0.012"},
+    {"class": "Valve", "name": "V1", "diameter": 2.0, "loss_coefficient": 2.0, "elevation_z": 0.0,
+     "custom_values": [["0", "1"], ["1", "0"]]},
+], "simulation_properties": {"simulation_time": 4.0, "time_step": 0.01, "dtout": 0.1, "gravity": 9.81}}}
+
+
+@pytest.mark.parametrize("p", [0.05, 0.5, 0.95])
+def test_p2_quantile_tracks_the_exact_quantile(p):
+    rng = np.random.default_rng(1)
+    data = np.column_stack([rng.normal(50.0, 5.0, 5000), rng.exponential(2.0, 5000)])
+    sketch = P2Quantile(p, channels=2)
+    for row in data:
+        sketch.add(row)
+    exact = np.quantile(data, p, axis=0)
+    spread = np.quantile(data, 0.99, axis=0) - np.quantile(data, 0.01, axis=0)
+    assert np.all(np.abs(sketch.value() - exact) < 0.02 * spread)
+
+
+def test_p2_quantile_is_exact_before_five_samples():
+    sketch = P2Quantile(0.5, channels=1)
+    for x in (3.0, 1.0, 2.0):
+        sketch.add(np.array([x]))
+    assert sketch.value().tolist() == [2.0]
+
+
+def test_latin_hypercube_puts_one_sample_in_every_stratum():
+    samples = latin_hypercube(40, 3, np.random.default_rng(0))
+    assert samples.shape == (40, 3)
+    for column in samples.T:
+        assert sorted(np.floor(column * 40).astype(int)) == list(range(40))
+
+
+def test_design_factors_stay_within_the_spreads():
+    study = MonteCarloStudy(PROJECT, samples=33, celerity_spread=0.1, friction_spread=0.3, batch_size=8)
+    design = study.design()
+    assert design.shape == (33, 1, 2)
+    assert np.all(np.abs(design[..., 0] - 1.0) <= 0.1) and np.all(np.abs(design[..., 1] - 1.0) <= 0.3)
+    # One sample per stratum of each factor
+    assert sorted(np.floor((design[:, 0, 0] - 0.9) / 0.2 * 33).astype(int)) == list(range(33))
+
+    variant = study.variant(np.array([[1.1, 0.5]]))[1]
+    assert float(variant["celerity"]) == pytest.approx(1100.0)
+    assert float(variant["manning_n"]) == pytest.approx(0.006)
+
+
+def test_bands_are_ordered_by_quantile():
+    bands = MonteCarloStudy(PROJECT, samples=8, batch_size=4).run()
+    head = bands["V1.HEAD"]
+    assert head["max"][0.05] <= head["max"][0.5] <= head["max"][0.95]
+    assert head["min"][0.05] <= head["min"][0.5] <= head["min"][0.95]
+    assert head["max"][0.5] > 100.0
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+pytest.importorskip("psutil")
+
+from performance_monitor import HISTORY_SAMPLES, SystemSampler, sparkline_points
+
+
+def test_sparkline_is_right_aligned_and_clamped():
+    assert sparkline_points([], 100, 20) == [0, 20, 100, 20]
+    assert sparkline_points([5.0], 100, 20) == [100.0, 18.0, 100.0, 18.0]
+
+    points = sparkline_points([0.0, 50.0, 200.0], 119, 20, low=0.0, high=100.0)
+    xs, ys = points[0::2], points[1::2]
+    assert xs == pytest.approx([117.0, 118.0, 119.0])
+    assert ys == pytest.approx([18.0, 10.0, 2.0])
+
+
+def test_series_are_bounded_and_snapshots_are_copies():
+    sampler = SystemSampler(interval=60.0)
+    try:
+        for k in range(HISTORY_SAMPLES + 10):
+            sampler.record_latency(float(k))
+        sampler.sample()
+        series, children = sampler.snapshot()
+        assert len(series["latency"]) == HISTORY_SAMPLES and series["latency"][-1] == HISTORY_SAMPLES + 9.0
+        assert len(series["cpu"]) == 1 and series["app_memory"][0] > 0.0
+        series["latency"].clear()
+        assert len(sampler.snapshot()[0]["latency"]) == HISTORY_SAMPLES
+    finally:
+        sampler.stop()
+
+
+def test_sampling_errors_are_reported_and_sampling_goes_on(monkeypatch):
+    errors = []
+    reported = threading.Event()
+
+    def on_error(message):
+        errors.append(message)
+        if len(errors) == 2:
+            reported.set()
+
+    def broken():
+        raise RuntimeError("no /proc")
+
+    sampler = SystemSampler(interval=0.01, on_error=on_error)
+    monkeypatch.setattr(sampler, "sample", broken)
+    try:
+        assert reported.wait(5.0)
+    finally:
+        sampler.stop()
+    sampler.thread.join(5.0)
+    assert errors[0] == "Performance sampling failed: RuntimeError: no /proc"
+    assert not sampler.thread.is_alive()
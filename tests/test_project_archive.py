@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from project_archive import ProjectArchive, convert, pack_project, read_project, write_project
+from project_model import Project
+
+DOCUMENT = {"elements": {"elements": [
+    {"class": "InletReservoir", "name": "R1", "x": 10, "y": 20, "level_h": 100.0, "pipe_z": ""},
+    {"class": "Pipe", "name": "P1", "x": 50, "y": 20, "length": "01", "diameter": 2.5, "nodes_n": 12,
+     "inlet_element": "V1", "outlet_element": "R1"},
+    {"class": "Valve", "name": "V1", "x": 90.5, "y": 20, "custom_values": [["0", "1"], ["5", "0"]]},
+    {"class": "Pipe", "name": "P2", "x": 50, "y": 60, "length": 200.0, "diameter": None, "colour": "blue"},
+    {"name": "note", "text": "no class"},
+    {"class": "Pipe", "name": "P3", "x": 1, "y": 2, "length": True, "diameter": {"a": [1, 2]}},
+], "simulation_properties": {"time_step": "0.01", "simulation_time": 20}}, "version": "2.1"}
+
+
+def test_round_trip_is_exact(tmp_path):
+    path = str(tmp_path / "project.apb")
+    write_project(path, DOCUMENT)
+    document = read_project(path)
+    assert document == DOCUMENT
+    # Element order and key order survive, types included
+    assert json.dumps(document) == json.dumps(DOCUMENT)
+
+
+def test_sections_are_read_on_demand(tmp_path):
+    path = str(tmp_path / "project.apb")
+    write_project(path, DOCUMENT)
+    archive = ProjectArchive(path)
+    assert len(archive) == 6
+    assert archive.class_names() == ["InletReservoir", "Pipe", "Valve", None]
+    assert archive.names("Pipe") == ["P1", "P2", "P3"] and archive.names("Turbine") == []
+    assert archive.simulation_properties() == {"time_step": "0.01", "simulation_time": 20}
+    assert archive.decoded == {}
+
+    assert archive.element("V1") == DOCUMENT["elements"]["elements"][2]
+    assert list(archive.decoded) == ["Valve"]
+    assert archive.element("note") == {"name": "note", "text": "no class"}
+    assert archive.elements(None) == DOCUMENT["elements"]["elements"]
+    assert archive.elements("Pipe") == [e for e in DOCUMENT["elements"]["elements"] if e.get("class") == "Pipe"]
+
+
+def test_bare_element_lists_and_bad_input(tmp_path):
+    bare = {"elements": [{"class": "Pipe", "name": "P1", "length": 1.0}], "simulation_properties": {"dt": 1}}
+    path = str(tmp_path / "bare.apb")
+    write_project(path, bare)
+    assert read_project(path) == bare
+    assert ProjectArchive(path).simulation_properties() == {"dt": 1}
+
+    with pytest.raises(ValueError):
+        pack_project({"elements": [1, 2]})
+    other = tmp_path / "other.apb"
+    other.write_bytes(b"NOTAPROJ" + bytes(8))
+    with pytest.raises(ValueError):
+        ProjectArchive(str(other))
+
+
+def test_conversion_and_the_project_model_read_binary_files(tmp_path):
+    source = tmp_path / "project.json"
+    source.write_text(json.dumps(DOCUMENT))
+    convert(str(source), str(tmp_path / "project.apb"))
+    convert(str(tmp_path / "project.apb"), str(tmp_path / "back.json"))
+    assert json.loads((tmp_path / "back.json").read_text()) == DOCUMENT
+
+    project = Project.load(str(tmp_path / "project.apb"))
+    assert project["P1"].length == "01"
+    assert project.warnings == ["Skipping element: Unknown element class None for 'note'."]
+    project.save(str(tmp_path / "saved.apb"))
+    assert Project.load(str(tmp_path / "saved.apb")).to_data() == project.to_data()
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from project_model import PipeRecord, Project, SurgeTankRecord, parse_number, record_from_data
+
+DATA = {"elements": {"elements": [
+    {"class": "InletReservoir", "name": "R1", "x": 10, "y": 20, "level_h": "0100", "pipe_z": ""},
+    {"class": "Pipe", "name": "P1", "x": 50, "y": 20, "diameter": "01", "length": 1000.0, "celerity": "1e3",
+     "manning_n": "n/a", "inlet_element": "ST", "outlet_element": "R1", "colour": "blue"},
+    {"class": "SurgeTank", "name": "ST", "D_ST": "12", "C_W_L": "95", "stank_a": "113"},
+    {"class": "SurgeTank", "name": "ST", "stank_a": "50"},
+    {"class": "Gate", "name": "G1"},
+], "simulation_properties": {"time_step": "0.01"}}}
+
+
+def test_parse_number():
+    assert parse_number("01") == 1.0
+    assert parse_number("") is None and parse_number(None) is None
+    assert parse_number("n/a") == "n/a"
+    assert parse_number(True) == 1.0
+
+
+def test_round_trip_keeps_values_as_entered(tmp_path):
+    project = Project.from_data(DATA)
+    saved = project.to_data()["elements"]["elements"]
+    assert saved[0] == DATA["elements"]["elements"][0]
+    pipe = saved[1]
+    assert (pipe["diameter"], pipe["celerity"], pipe["manning_n"], pipe["colour"]) == ("01", "1e3", "n/a", "blue")
+    # Fields the file did not have are not added
+    assert "dt_max" not in pipe and "nodes_n" not in pipe
+
+    path = tmp_path / "project.json"
+    project.save(str(path))
+    assert Project.load(str(path)).to_data() == project.to_data()
+    assert json.loads(path.read_text())["elements"]["simulation_properties"] == {"time_step": "0.01"}
+
+
+def test_numbers_are_parsed_where_used():
+    pipe = Project.from_data(DATA)["P1"]
+    assert pipe.diameter == "01" and pipe.number("diameter") == 1.0
+    assert pipe.number("celerity") == 1000.0
+    assert pipe.number("dt_max") is None
+
+
+def test_aliases_duplicates_and_unknown_classes():
+    project = Project.from_data(DATA)
+    tank = project["ST"]
+    assert isinstance(tank, SurgeTankRecord)
+    assert (tank.Diameter_surge_tank, tank.Current_Water_level) == ("12", "95")
+    assert project["ST_2"].stank_a == "50"
+    assert [r.name for r in project] == ["R1", "P1", "ST", "ST_2"]
+    assert project.warnings == ["Duplicate element name ST, renamed to ST_2.",
+                                "Skipping element: Unknown element class 'Gate' for 'G1'."]
+    with pytest.raises(ValueError):
+        record_from_data({"class": "Gate", "name": "G1"})
+
+
+def test_renaming_follows_the_pipe_ends():
+    project = Project.from_data(DATA)
+    assert project.downstream("R1") == ["ST"] and project.upstream("ST") == ["R1"]
+    project.update("ST", name="Tank", stank_a="60")
+    assert project["P1"].inlet_element == "Tank"
+    assert project.downstream("R1") == ["Tank"] and project.upstream("Tank") == ["R1"]
+    assert project["Tank"].stank_a == "60"
+    with pytest.raises(ValueError):
+        project.update("Tank", name="R1")
+
+    project.add(PipeRecord("P2", outlet_element="Tank", inlet_element="R1"))
+    assert project.downstream("Tank") == ["R1"]
+    project.remove("P2")
+    assert project.downstream("Tank") == [] and len(project.of_class("Pipe")) == 1
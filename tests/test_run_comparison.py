@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from history_writer import HistoryStore, HistoryWriter
+from run_comparison import RunComparison, interpolate_channel
+from run_database import RunDatabase
+
+CHANNELS = ["N1.HEAD", "P1.Q"]
+
+
+def store(path, start: float, end: float, dt: float, offset: float = 0.0) -> HistoryStore:
+    """History of HEAD = 100 + t + offset and Q = 2 t, sampled every dt."""
+    writer = HistoryWriter(str(path), CHANNELS, [0, 1], chunk_rows=7)
+    for t in np.arange(start, end + dt / 2, dt):
+        values = np.array([100.0 + t + offset, 2.0 * t])
+        writer.update_envelope(t, values)
+        writer.record(t, values)
+    writer.close()
+    return HistoryStore(str(path))
+
+
+def test_interpolation_is_chunked_without_changing_the_result(tmp_path, monkeypatch):
+    history = store(tmp_path / "a", 0.0, 10.0, 0.1)
+    grid = np.linspace(0.0, 10.0, 333)
+    monkeypatch.setattr("run_comparison.CHUNK_POINTS", 10)
+    assert interpolate_channel(history, "P1.Q", grid) == pytest.approx(2.0 * grid)
+
+
+def test_runs_are_aligned_over_their_common_span(tmp_path):
+    comparison = RunComparison({"a": store(tmp_path / "a", 0.0, 10.0, 0.1),
+                                "b": store(tmp_path / "b", 2.0, 12.0, 0.25, offset=5.0)})
+    grid = comparison.time_grid()
+    assert (grid[0], grid[-1]) == pytest.approx((2.0, 10.0))
+    assert len(grid) == 81  # The finest step, 0.1 s
+    assert len(comparison.time_grid(max_points=20)) == 20
+    assert comparison.time_grid(start=3.0, end=4.0)[[0, -1]] == pytest.approx([3.0, 4.0])
+
+    differences = comparison.differences("N1.HEAD", grid)
+    assert differences["b"] == pytest.approx(np.full(len(grid), 5.0))
+    deltas = comparison.envelope_deltas()["b"]
+    assert deltas["N1.HEAD"] == pytest.approx((7.0, 7.0))
+
+    out = comparison.aligned("P1.Q", grid, out_path=str(tmp_path / "aligned.npy"))
+    assert np.load(tmp_path / "aligned.npy") == pytest.approx(np.vstack([2.0 * grid, 2.0 * grid]))
+    assert out.shape == (2, 81)
+
+
+def test_disjoint_runs_have_no_common_grid(tmp_path):
+    comparison = RunComparison({"a": store(tmp_path / "a", 0.0, 1.0, 0.1),
+                                "b": store(tmp_path / "b", 2.0, 3.0, 0.1)})
+    with pytest.raises(ValueError):
+        comparison.time_grid()
+
+
+def test_runs_are_loaded_from_the_database(tmp_path):
+    database = RunDatabase()
+    first = database.record([], {}, {}, history_path=str(store(tmp_path / "a", 0.0, 1.0, 0.1).path))
+    second = database.record([], {}, {}, history_path=str(store(tmp_path / "b", 0.0, 1.0, 0.1).path))
+    pruned = database.record([], {}, {}, history_path=str(tmp_path / "gone"))
+
+    comparison = RunComparison.from_database([second, first], database)
+    assert comparison.labels == [f"run {second}", f"run {first}"]
+    assert comparison.channels() == CHANNELS
+    with pytest.raises(ValueError, match="no longer available"):
+        RunComparison.from_database([first, pruned], database)
+    with pytest.raises(ValueError):
+        RunComparison.from_database([first], database)
+    database.close()
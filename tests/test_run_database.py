@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from run_database import RunDatabase, content_hash, parse_filter
+
+PROPERTIES = {"simulation_time": "20", "time_step": "0.01"}
+
+
+def elements(stank_a: float) -> list:
+    return [{"class": "SurgeTank", "name": "ST", "stank_a": str(stank_a), "x": 5, "y": 5},
+            {"class": "Pipe", "name": "P1", "length": "1000", "type": "steel", "custom_values": [[0, 1]]}]
+
+
+def test_parse_filter():
+    assert parse_filter("stank_a<60") == (None, "stank_a", "<", 60.0)
+    assert parse_filter(" ST.stank_a >= 1e2 ") == ("ST", "stank_a", ">=", 100.0)
+    with pytest.raises(ValueError):
+        parse_filter("stank_a ~ 60")
+
+
+def test_record_stores_numeric_parameters_and_envelopes(tmp_path):
+    database = RunDatabase()
+    history = tmp_path / "history"
+    history.mkdir()
+    run_id = database.record(elements(50.0), PROPERTIES, {"ST.ELEV": (112.0, 3.0, 95.0, 9.0)},
+                             project_path="project.json", inp_text="C deck", wall_time=1.5,
+                             history_path=str(history), label="sweep")
+
+    run = database.get_runs([run_id, 999])
+    assert list(run) == [run_id]
+    run = run[run_id]
+    assert run["project_path"] == os.path.abspath("project.json")
+    assert run["inp_hash"] == content_hash("C deck")
+    assert (run["t_max"], run["dt"], run["wall_time"], run["label"]) == (20.0, 0.01, 1.5, "sweep")
+    assert database.envelope(run_id) == {"ST.ELEV": (112.0, 3.0, 95.0, 9.0)}
+
+    parameters = database.connection.execute(
+        "SELECT element, field, value, text FROM parameters WHERE run_id = ? ORDER BY element, field",
+        (run_id,)).fetchall()
+    # Positions, names and tables are not parameters; text fields are kept as text
+    assert parameters == [("P1", "length", 1000.0, None), ("P1", "type", None, "steel"),
+                          ("ST", "stank_a", 50.0, None)]
+    assert database.latest_history({"elements": {"elements": elements(50.0),
+                                                 "simulation_properties": PROPERTIES}}) == str(history)
+    assert database.latest_history({"elements": {"elements": elements(60.0),
+                                                 "simulation_properties": PROPERTIES}}) is None
+    database.close()
+
+
+def test_query_filters_on_parameters_and_orders_by_extreme():
+    database = RunDatabase()
+    ids = {a: database.record(elements(a), PROPERTIES, {"ST.ELEV": (100.0 + 1000.0 / a, 1.0, 100.0 - a / 10.0, 2.0)})
+           for a in (20.0, 40.0, 80.0)}
+
+    rows = database.query("ST.ELEV", ["stank_a<60"])
+    assert [row["run_id"] for row in rows] == [ids[20.0], ids[40.0]]
+    assert rows[0]["value"] == pytest.approx(150.0)
+    assert [row["run_id"] for row in database.query("ST.ELEV", ["ST.stank_a>=40"], kind="min")] == [ids[80.0],
+                                                                                                    ids[40.0]]
+    assert database.query("ST.ELEV", ["P1.stank_a<60"]) == []
+    with pytest.raises(ValueError):
+        database.query("ST.ELEV", kind="mean")
+    database.close()
+
+
+def test_forget_histories_keeps_envelopes(tmp_path):
+    database = RunDatabase()
+    kept, pruned = tmp_path / "kept", tmp_path / "pruned"
+    run_ids = [database.record(elements(50.0), PROPERTIES, {"ST.ELEV": (1.0, 0.0, 0.0, 0.0)}, history_path=str(p))
+               for p in (kept, pruned)]
+    database.forget_histories([str(pruned)])
+    runs = database.get_runs(run_ids)
+    assert runs[run_ids[0]]["history_path"] == str(kept)
+    assert runs[run_ids[1]]["history_path"] is None
+    assert database.envelope(run_ids[1]) == {"ST.ELEV": (1.0, 0.0, 0.0, 0.0)}
+    database.close()
+
+
+def test_project_summaries_report_the_peak_head_of_the_latest_run():
+    database = RunDatabase()
+    database.record(elements(50.0), PROPERTIES, {"ST.HEAD": (120.0, 1.0, 90.0, 2.0)}, project_path="a.json")
+    latest = database.record(elements(50.0), PROPERTIES, {"ST.HEAD": (130.0, 1.0, 90.0, 2.0),
+                                                          "P1.HEAD": (125.0, 1.0, 80.0, 2.0)}, project_path="a.json")
+    summaries = database.project_summaries()
+    assert len(summaries) == 1
+    assert summaries[0]["runs"] == 2 and summaries[0]["run_id"] == latest
+    assert (summaries[0]["peak_channel"], summaries[0]["peak_head"]) == ("ST.HEAD", 130.0)
+    database.close()
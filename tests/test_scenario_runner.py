@@ -0,0 +1,58 @@
+import copy
+
+import pytest
+
+from scenario_runner import ScenarioRunner, scenario_key
+
+ELEMENTS = [
+    {"class": "InletReservoir", "name": "R1", "level_h": 100.0, "pipe_z": 0.0, "x": 10, "y": 10},
+    {"class": "Pipe", "name": "P1", "outlet_element": "R1", "inlet_element": "V1", "length": 1000.0,
+     "diameter": 2.0, "celerity": 1000.0, "manning_n": 0.012},
+    {"class": "Valve", "name": "V1", "diameter": 2.0, "loss_coefficient": 2.0, "elevation_z": 0.0,
+     "custom_values": [["0", "1"], ["1", "0"]]},
+]
+PROPERTIES = {"simulation_time": 4.0, "time_step": 0.01, "dtout": 0.1, "gravity": 9.81}
+
+
+def variant(celerity: float) -> list:
+    elements = copy.deepcopy(ELEMENTS)
+    elements[1]["celerity"] = celerity
+    return elements
+
+
+def test_scenario_key_ignores_canvas_positions_only():
+    moved = variant(1000.0)
+    moved[0]["x"] = 400
+    assert scenario_key(moved, PROPERTIES) == scenario_key(ELEMENTS, PROPERTIES)
+    assert scenario_key(variant(900.0), PROPERTIES) != scenario_key(ELEMENTS, PROPERTIES)
+    assert scenario_key(ELEMENTS, PROPERTIES, t_max=2.0) != scenario_key(ELEMENTS, PROPERTIES)
+
+
+def test_duplicates_run_once_and_a_second_runner_reads_the_cache(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    runner = ScenarioRunner(PROPERTIES, cache_dir=cache_dir)
+    first = runner.run([variant(1000.0), variant(800.0), variant(1000.0)])
+    assert runner.solver_runs == 2
+    assert first[0] == first[2]
+    # A stiffer conduit gives the larger Joukowsky surge
+    assert first[0]["V1.HEAD"][0] > first[1]["V1.HEAD"][0]
+
+    again = ScenarioRunner(PROPERTIES, cache_dir=cache_dir)
+    second = again.run([variant(800.0), variant(1000.0)])
+    assert again.solver_runs == 0
+    assert second[0]["V1.HEAD"] == pytest.approx(first[1]["V1.HEAD"])
+    assert second[1]["V1.HEAD"] == pytest.approx(first[0]["V1.HEAD"])
+
+
+def test_corrupt_cache_entry_is_simulated_again(tmp_path):
+    cache_dir = tmp_path / "cache"
+    runner = ScenarioRunner(PROPERTIES, cache_dir=str(cache_dir))
+    expected = runner.run([ELEMENTS])[0]
+    entry = cache_dir / f"{scenario_key(ELEMENTS, PROPERTIES)}.json"
+    entry.write_text(entry.read_text()[:20])
+
+    again = ScenarioRunner(PROPERTIES, cache_dir=str(cache_dir))
+    assert again.run([ELEMENTS])[0]["V1.HEAD"] == pytest.approx(expected["V1.HEAD"])
+    assert again.solver_runs == 1
+    assert ScenarioRunner(PROPERTIES, cache_dir=str(cache_dir)).run([ELEMENTS])[0]["V1.HEAD"] == \
+        pytest.approx(expected["V1.HEAD"])
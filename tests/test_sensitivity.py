@@ -0,0 +1,65 @@
+import pytest
+
+from sensitivity import SensitivityAnalysis, default_parameters, parse_output
+
+PROJECT = {"elements": {"elements": [
+    {"class": "Pipe", "name": "P1", "length": "1000", "diameter": "2", "celerity": "0", "manning_n": "0.012"},
+    {"class": "SurgeTank", "name": "ST1", "stank_a": "50"},
+], "simulation_properties": {"time_step": 0.01}}}
+
+
+class AnalyticRunner:
+    """Stands in for ScenarioRunner: ST1.ELEV peaks at length + 2 * diameter, in units of the nominal values."""
+
+    def __init__(self):
+        self.scenarios = 0
+
+    def run(self, element_sets):
+        self.scenarios += len(element_sets)
+        envelopes = []
+        for elements in element_sets:
+            pipe = elements[0]
+            value = float(pipe["length"]) / 1000.0 + 2.0 * float(pipe["diameter"]) / 2.0
+            envelopes.append({"ST1.ELEV": (value, 1.0, -value, 2.0)})
+        return envelopes
+
+
+def analysis(**kwargs) -> SensitivityAnalysis:
+    parameters = [("P1", "length"), ("P1", "diameter"), ("P1", "manning_n")]
+    return SensitivityAnalysis(PROJECT, ["ST1.ELEV:max"], parameters, runner=AnalyticRunner(), **kwargs)
+
+
+def test_default_parameters_skip_zero_fields_and_outputs_are_parsed():
+    elements = PROJECT["elements"]["elements"]
+    assert default_parameters(elements) == [("P1", "diameter"), ("P1", "length"), ("P1", "manning_n"),
+                                            ("ST1", "stank_a")]
+    assert parse_output("ST1.ELEV:min") == ("ST1.ELEV", 2)
+    with pytest.raises(ValueError):
+        parse_output("ST1.ELEV")
+
+
+def test_one_at_a_time_elasticities_of_a_linear_output():
+    ranking = analysis().one_at_a_time()["ST1.ELEV:max"]
+    assert [row["field"] for row in ranking] == ["diameter", "length", "manning_n"]
+    # f = x_length + 2 x_diameter at nominal 3: elasticities 2/3, 1/3 and 0
+    assert [row["elasticity"] for row in ranking] == pytest.approx([2 / 3, 1 / 3, 0.0], abs=1e-6)
+
+
+def test_sobol_indices_of_a_linear_output():
+    sensitivity = analysis(seed=2)
+    ranking = sensitivity.sobol(samples=512)["ST1.ELEV:max"]
+    assert sensitivity.runner.scenarios == 512 * 5
+    indices = {row["field"]: row for row in ranking}
+    # Equal factor variances, coefficients 1 and 2: S = 1/5 and 4/5, no interactions
+    assert indices["length"]["first"] == pytest.approx(0.2, abs=0.05)
+    assert indices["diameter"]["first"] == pytest.approx(0.8, abs=0.05)
+    assert indices["length"]["total"] == pytest.approx(0.2, abs=0.05)
+    assert indices["diameter"]["total"] == pytest.approx(0.8, abs=0.05)
+    assert indices["manning_n"]["first"] == pytest.approx(0.0, abs=1e-12)
+    assert indices["manning_n"]["total"] == pytest.approx(0.0, abs=1e-12)
+    assert [row["field"] for row in ranking][:2] == ["diameter", "length"]
+
+
+def test_unknown_element_is_rejected():
+    with pytest.raises(ValueError):
+        SensitivityAnalysis(PROJECT, ["ST1.ELEV:max"], [("P9", "length")], runner=AnalyticRunner())
@@ -0,0 +1,62 @@
+import numpy as np
+
+from spatial_index import SpatialIndex
+
+
+def brute_rect(boxes: dict, x0, y0, x1, y1) -> set:
+    return {k for k, b in boxes.items() if b[0] <= x1 and b[2] >= x0 and b[1] <= y1 and b[3] >= y0}
+
+
+def test_point_query_returns_the_topmost_item_first():
+    index = SpatialIndex(cell_size=50)
+    index.insert("pipe", (0, 0, 300, 20))
+    index.insert("valve", (100, 0, 140, 40))
+    assert index.query_point(120, 10) == ["valve", "pipe"]
+    assert index.query_point(250, 10) == ["pipe"]
+    assert index.query_point(250, 30) == []
+
+    # Moving an item re-indexes it and brings it to the top
+    index.insert("pipe", (100, 0, 140, 40))
+    assert index.query_point(120, 10) == ["pipe", "valve"]
+    assert index.query_point(250, 10) == []
+
+
+def test_boxes_are_normalised_and_negative_coordinates_work():
+    index = SpatialIndex(cell_size=64)
+    index.insert("a", (10, 10, -100, -100))
+    assert index.boxes["a"] == (-100, -100, 10, 10)
+    assert index.query_point(-99, -1) == ["a"]
+    assert index.query_rect(5, 5, -5, -5) == {"a"}
+
+
+def test_rect_queries_match_a_full_scan():
+    rng = np.random.default_rng(4)
+    index = SpatialIndex(cell_size=100)
+    boxes = {}
+    for k in range(400):
+        x, y = rng.uniform(-2000, 2000, 2)
+        box = (x, y, x + rng.uniform(0, 300), y + rng.uniform(0, 300))
+        index.insert(k, box)
+        boxes[k] = box
+    for k in range(0, 400, 3):
+        index.remove(k)
+        del boxes[k]
+    assert len(index) == len(boxes)
+
+    # Small viewports walk their own cells, huge ones the occupied cells
+    for _ in range(50):
+        x0, y0 = rng.uniform(-2500, 2500, 2)
+        width = rng.choice([50.0, 800.0, 20000.0])
+        assert index.query_rect(x0, y0, x0 + width, y0 + width) == brute_rect(boxes, x0, y0, x0 + width, y0 + width)
+
+
+def test_remove_drops_empty_cells_and_clear_empties_the_index():
+    index = SpatialIndex(cell_size=10)
+    index.insert("a", (0, 0, 35, 5))
+    index.insert("b", (0, 0, 5, 5))
+    index.remove("a")
+    index.remove("missing")
+    assert list(index.cells) == [(0, 0)]
+    assert "a" not in index and "b" in index
+    index.clear()
+    assert len(index) == 0 and index.query_rect(-100, -100, 100, 100) == set()
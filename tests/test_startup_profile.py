@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(code: str) -> str:
+    """Output of a fresh interpreter, so import timing and sys.modules start clean."""
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                          check=True).stdout
+
+
+def test_report_lists_phases_and_imports_with_their_self_time():
+    output = run_python(
+        "import builtins, startup_profile\n"
+        "startup_profile.mark('ignored')\n"
+        "startup_profile.install()\n"
+        "import fractions\n"
+        "startup_profile.mark('imported')\n"
+        "print(startup_profile.report())\n"
+        "print(builtins.__import__ is startup_profile._original_import)\n")
+    lines = output.splitlines()
+    assert lines[0] == "Startup profile"
+    assert lines[2].endswith("  imported") and "ignored" not in output
+    fractions = next(line.split() for line in lines if line.split()[0] == "fractions")
+    total, own = float(fractions[1]), float(fractions[2])
+    assert 0.0 <= own <= total
+    # The report ends the profiling
+    assert lines[-1] == "True"
+
+
+def test_run_database_keeps_numpy_off_the_startup_path():
+    assert run_python("import sys, run_database\nprint('numpy' in sys.modules)").strip() == "False"
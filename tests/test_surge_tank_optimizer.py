@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import surge_tank_optimizer
+from surge_tank_optimizer import SurgeTankOptimizer, pareto_front
+
+PROJECT = {"elements": {"elements": [
+    {"class": "InletReservoir", "name": "R1", "level_h": 100.0},
+    {"class": "SurgeTank", "name": "ST1", "stank_a": 50.0},
+], "simulation_properties": {"time_step": 0.01}}}
+
+
+def test_pareto_front_keeps_only_non_dominated_rows():
+    objectives = np.array([[1.0, 5.0], [2.0, 2.0], [3.0, 3.0], [4.0, 1.0], [2.0, 2.0], [5.0, 5.0]])
+    assert pareto_front(objectives).tolist() == [0, 1, 3, 4]
+
+
+def test_cached_designs_are_reused_only_for_the_same_scenario(tmp_path, monkeypatch):
+    cache_path = str(tmp_path / "designs.json")
+    first = SurgeTankOptimizer(PROJECT, "ST1", el_top=120.0, el_bottom=80.0, cache_path=cache_path)
+    design = (100.0, 5.0, 1.0, 1.0)
+    first.cache[first._key(design)] = (110.0, 90.0)
+    first._save_cache()
+
+    def no_solver(*args, **kwargs):
+        raise AssertionError("a cached design was simulated again")
+
+    monkeypatch.setattr(surge_tank_optimizer, "ProcessPoolExecutor", no_solver)
+    again = SurgeTankOptimizer(PROJECT, "ST1", el_top=120.0, el_bottom=80.0, cache_path=cache_path)
+    assert again.evaluate(np.array([design])) == {design: (110.0, 90.0)}
+    assert again.pareto_set() == [dict(zip(surge_tank_optimizer.DESIGN_FIELDS, design), level_max=110.0,
+                                       level_min=90.0)]
+
+    # Another simulation length is another scenario
+    longer = SurgeTankOptimizer(PROJECT, "ST1", el_top=120.0, el_bottom=80.0, t_max=60.0, cache_path=cache_path)
+    assert longer.cache == {}
+
+
+def test_unknown_tank_is_rejected():
+    with pytest.raises(ValueError):
+        SurgeTankOptimizer(PROJECT, "ST9", el_top=120.0, el_bottom=80.0)
@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pytest
+
+from valve_closure_optimizer import ValveClosureOptimizer
+
+ELEMENTS = [
+    {"class": "InletReservoir", "name": "R1", "level_h": 100.0, "pipe_z": 0.0},
+    {"class": "Pipe", "name": "P1", "outlet_element": "R1", "inlet_element": "V1", "length": 1000.0,
+     "diameter": 2.0, "celerity": 1000.0, "manning_n": 0.012},
+    {"class": "Valve", "name": "V1", "diameter": 2.0, "loss_coefficient": 2.0, "elevation_z": 0.0,
+     "custom_values": [["0", "0.8"], ["10", "0.8"]]},
+]
+PROJECT = {"elements": {"elements": ELEMENTS, "simulation_properties": {
+    "simulation_time": 8.0, "time_step": 0.01, "dtout": 0.1, "gravity": 9.81}}}
+
+
+def test_schedule_starts_from_the_current_opening_and_ends_closed():
+    optimizer = ValveClosureOptimizer(PROJECT, "V1", closure_time=4.0, start_time=1.0)
+    assert optimizer.initial_opening == pytest.approx(0.8)
+    rows = optimizer.schedule(np.array([0.25, 0.5]), np.array([0.6, 0.2]), 4.0)
+    assert rows == [(0.0, 0.8), (1.0, 0.8), (2.0, 0.6), (3.0, 0.2), (5.0, 0.0)]
+
+
+def test_random_and_perturbed_laws_stay_monotone_and_in_bounds():
+    optimizer = ValveClosureOptimizer(PROJECT, "V1", closure_time=(2.0, 6.0), seed=3)
+    for _ in range(20):
+        for fractions, openings, closure_time in (optimizer.random_law(),
+                                                  optimizer.perturb(optimizer.random_law(), 0.5)):
+            assert np.all(np.diff(fractions) >= 0.0) and np.all((fractions >= 0.0) & (fractions <= 1.0))
+            assert np.all(np.diff(openings) <= 0.0) and np.all((openings >= 0.0) & (openings <= 0.8))
+            assert 2.0 <= closure_time <= 6.0
+
+
+def test_slower_closure_gives_the_lower_peak_and_is_written_back(tmp_path):
+    optimizer = ValveClosureOptimizer(PROJECT, "V1", closure_time=(0.5, 6.0))
+    # Inside 2L/a = 2 s the closure is sudden, so it must surge more than a closure over 6 s
+    fast = (np.array([0.5]), np.array([0.4]), 0.5)
+    slow = (np.array([0.5]), np.array([0.4]), 6.0)
+    peaks = optimizer.evaluate([fast, slow])
+    assert peaks[1] < peaks[0]
+    assert optimizer.best()["closure_time"] == 6.0
+
+    path = tmp_path / "project.json"
+    path.write_text(json.dumps(PROJECT))
+    optimizer.write_back(str(path))
+    valve = json.loads(path.read_text())["elements"]["elements"][2]
+    assert valve["custom_values"] == [["0", "0.8"], ["3", "0.4"], ["6", "0"]]
+    assert json.loads(path.read_text())["elements"]["elements"][0] == ELEMENTS[0]
+
+
+def test_unknown_valve_and_non_positive_closure_time_are_rejected():
+    with pytest.raises(ValueError):
+        ValveClosureOptimizer(PROJECT, "V9", closure_time=4.0)
+    with pytest.raises(ValueError):
+        ValveClosureOptimizer(PROJECT, "V1", closure_time=(0.0, 4.0))
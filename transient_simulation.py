@@ -1,14 +1,23 @@
 import json
 import os
+import queue
+import sqlite3
+import threading
+import time
 import webbrowser
 from tkinter import messagebox
 from conclusions import generate_conclusions, generate_final_conclusion
 # Add this import at the top of the file, along with other imports
-from Word_tasks import run_simulation_from_file
+from Word_tasks import prepare_whamo_detailed_input, run_simulation_from_file
 from cfd_gradient_visualization import process_cfd_gradient
+from moc_solver import run_project_transient
+from run_database import RunDatabase
 
 from tkinter import Toplevel, Label, ttk
 
+# Period of the check for the finished solver run [ms]
+REPORT_POLL_MS = 100
+
 def show_validation_window(validation_results):
     """Display a validation window with a table of issues."""
     validation_window = Toplevel()
@@ -140,8 +149,19 @@ def validate_elements(elements):
     return validation_results
 
 
-def run_simulation_and_generate_html(root, current_file_name):
-    """Runs the simulation based on the file contents and generates an HTML file with results."""
+def run_simulation_and_generate_html(root, current_file_name, log=None):
+    """
+    Runs the simulation based on the file contents and generates an HTML file with results.
+
+    The native transient solve runs on a worker thread; the report is written
+    on the Tk thread once it has finished.
+
+    Args:
+        root: Tk root, used to poll the worker
+        current_file_name: Project file to simulate
+        log: Console log function such as Console.log, print by default
+    """
+    log = log or (lambda message, level="info": print(message))
     if not current_file_name:
         messagebox.showerror("Error", "No file is currently open!")
         return
@@ -150,24 +170,71 @@ def run_simulation_and_generate_html(root, current_file_name):
         # Read the JSON file
         with open(current_file_name, 'r') as file:
             file_content = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        messagebox.showerror("Error", f"Failed to read the file: {e}")
+        return
+
+    elements = file_content.get("elements", {}).get("elements", [])
+    simulation_props = file_content.get("elements", {}).get("simulation_properties", {})
+    gravity = simulation_props.get("gravity", 9.81)
 
-        elements = file_content.get("elements", {}).get("elements", [])
-        simulation_props = file_content.get("elements", {}).get("simulation_properties", {})
+    # Validate element parameters
+    validation_results = validate_elements(elements)
+    if validation_results:
+        show_validation_window(validation_results)
+        return  # Stop further execution until issues are resolved
 
-        # Extract simulation properties
-        sim_time = simulation_props.get("simulation_time", 10.0)
-        time_step = simulation_props.get("time_step", 0.01)
-        gravity = simulation_props.get("gravity", 9.81)
-        fluid_density = simulation_props.get("fluid_density", 1000.0)
+    log("Running the transient solver...", level="info")
+    finished = queue.Queue()
+    threading.Thread(target=lambda: finished.put(solve_and_record(file_content, current_file_name, log)),
+                     name="transient-report", daemon=True).start()
 
+    def poll():
+        try:
+            transient = finished.get_nowait()
+        except queue.Empty:
+            root.after(REPORT_POLL_MS, poll)
+            return
+        write_report(current_file_name, elements, gravity, transient, log)
 
-        # Validate element parameters
-        validation_results = validate_elements(elements)
-        if validation_results:
-            show_validation_window(validation_results)
-            return  # Stop further execution until issues are resolved
+    root.after(REPORT_POLL_MS, poll)
 
 
+def solve_and_record(file_content, current_file_name, log):
+    """
+    Native transient run and its run-database record, called on a worker thread
+
+    Returns:
+        SimulationResult, or None when the project cannot be simulated natively
+    """
+    try:
+        started = time.perf_counter()
+        transient = run_project_transient(file_content)
+        wall_time = time.perf_counter() - started
+    except Exception as e:  # Any solver failure falls back to the estimated report
+        log(f"Native transient solver skipped: {e}", level="warning")
+        return None
+    for warning in transient.warnings:
+        log(warning, level="warning")
+    try:
+        inp_text = prepare_whamo_detailed_input(current_file_name)
+    except Exception as e:
+        log(f"INP deck not generated for the run record: {e}", level="warning")
+        inp_text = None
+    try:
+        database = RunDatabase()
+        database.record_result(file_content, transient, current_file_name, inp_text, wall_time)
+        database.close()
+    except sqlite3.Error as e:
+        log(f"Run not recorded in the run database: {e}", level="warning")
+    log(f"Transient solver finished in {wall_time:.1f} s.", level="success")
+    return transient
+
+
+def write_report(current_file_name, elements, gravity, transient, log):
+    """Write the HTML report of a project, with the native results when there are any, and open it."""
+    try:
+        envelope = transient.envelope() if transient else {}
 
         # Build connections for pipes and compute results for each element
         results = []
@@ -257,8 +324,16 @@ def run_simulation_and_generate_html(root, current_file_name):
                 efficiency = float(element.get("efficiency", 0.9)) if element.get("efficiency") else None
                 delta_p = float(element.get("delta_p", 0)) if element.get("delta_p") else 0
                 load_rejection = delta_p / 100 if delta_p else 0
-                energy_output = ho * qo * efficiency * load_rejection
-                flow_conclusion = f"Turbine output is {energy_output:.2f} kW with efficiency {efficiency}."
+                if transient and {f"{element_name}.POWER", f"{element_name}.SPEED"} <= set(transient.index):
+                    # Governor-driven results from the native solver
+                    speed = transient.channel(f"{element_name}.SPEED")
+                    energy_output = transient.channel(f"{element_name}.POWER")[0] / 1000.0
+                    speed_rise = (envelope[f"{element_name}.SPEED"][0] / speed[0] - 1.0) * 100 if speed[0] > 0 else 0.0
+                    flow_conclusion = (f"Turbine output is {energy_output:.2f} kW with efficiency {efficiency}, "
+                                       f"maximum speed rise {speed_rise:.1f}%.")
+                else:
+                    energy_output = ho * qo * efficiency * load_rejection
+                    flow_conclusion = f"Turbine output is {energy_output:.2f} kW with efficiency {efficiency}."
 
             # Pipe
             elif element_class == "Pipe":
@@ -473,5 +548,6 @@ def run_simulation_and_generate_html(root, current_file_name):
 
         # process_cfd_gradient(current_file_name)
 
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        messagebox.showerror("Error", f"Failed to read the file: {e}")
\ No newline at end of file
+    except Exception as e:  # Report errors must not escape into the Tk event loop
+        log(f"Simulation report failed: {e}", level="error")
+        messagebox.showerror("Error", f"Simulation report failed: {e}")
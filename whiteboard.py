@@ -1,11 +1,22 @@
 import tkinter as tk
-from tkinter import simpledialog, messagebox
+from collections import deque
+from tkinter import simpledialog, messagebox, ttk
 from element import InletReservoir, OutletReservoir, Valve, Manifold, SurgeTank, Turbine, Pipe
 from file_manager import FileManager  # Assuming this manages file open/save
 import os
 import json  # Add this import statement
 import tkinter.filedialog as filedialog
 from PIL import Image, ImageTk 
+from icon_cache import get_icon
+from project_model import Project
+from command_log import CommandLog, AddCommand, DeleteCommand, MoveCommand, EditCommand, data_changes
+from spatial_index import SpatialIndex
+from autosave import atomic_write_json
+
+# Elements this far outside the visible canvas [px] stay drawn, so small pans do not pop them in
+CULL_MARGIN = 200
+# Elements drawn per idle callback while a project loads
+LOAD_BATCH = 50
 
 
 class Whiteboard(tk.Frame):
@@ -38,9 +49,12 @@ class Whiteboard(tk.Frame):
         
         if self.selected_element:  # If an element is selected, scale it individually
             self.selected_element.scale(scale_factor)
+            self.index_element(self.selected_element)
         else:  # If no element is selected, scale all elements
             for element in self.elements:
                 element.scale(scale_factor)
+                self.index_element(element)
+            self.cull()
 
 
 
@@ -66,10 +80,8 @@ class Whiteboard(tk.Frame):
             new_width = max(min_size, min(new_width, max_size))
             new_height = max(min_size, min(new_height, max_size))
 
-            # Resize the icon image proportionally
-            img = Image.open(self.icon_path)
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            self.icon = ImageTk.PhotoImage(img)
+            # Resize the icon image proportionally, through the shared icon cache
+            self.icon = get_icon(self.icon_path, new_width, new_height)
             self.canvas.itemconfig(self.icon_item, image=self.icon)
 
             # Keep the icon's center position fixed, without moving it
@@ -173,11 +185,204 @@ class Whiteboard(tk.Frame):
         self.is_file_open = False
         self.elements = []
         self.selected_element = None
+        self.selected_elements = []  # Elements picked with rubber-band selection
+        self.index = SpatialIndex()  # Icon bounding boxes, for hit-testing and culling
+        self.project = Project()  # Headless model of the loaded project
+        self.command_log = CommandLog()  # Undo/redo history of user actions
+        self.visible_elements = set()
+        self.band_start = None
+        self.band_rect = None
+        self.pending_elements = deque()  # Loaded elements in view waiting to be drawn
+        self.pending_set = set()
+        self.loading = False
+        self.load_progress = None
         self.status_label = tk.Label(self, text="No file open", bg="lightgrey", anchor="w")
         self.status_label.pack(fill=tk.X)
         self.create_context_menu()
         self.canvas.bind("<Button-3>", self.show_context_menu)  # Right-click for context menu
         self.canvas.bind("<Button-1>", self.on_click)  # Left-click for element selection
+        self.canvas.bind("<B1-Motion>", self.on_band_motion)  # Rubber-band selection from empty space
+        self.canvas.bind("<ButtonRelease-1>", self.on_band_release)
+        self.canvas.bind("<Configure>", self.cull, add="+")  # Hide elements outside the resized view
+        self.winfo_toplevel().bind("<Control-z>", lambda event: self.undo())
+        self.winfo_toplevel().bind("<Control-y>", lambda event: self.redo())
+
+    def register_element(self, element):
+        """Add a created element to the whiteboard and its spatial index."""
+        self.elements.append(element)
+        self.index_element(element)
+
+    def index_element(self, element):
+        """Store the icon bounding box of an element in the spatial index."""
+        # From position and zoom: Tk has no bbox for hidden (culled) or undrawn items
+        self.index.insert(element, element.model_bounds())
+        if element.icon_item and not element.culled:
+            self.visible_elements.add(element)
+
+    def set_labels_visible(self, visible):
+        """Show or hide the labels of all elements; culling keeps the choice."""
+        for element in self.elements:
+            element.show_item("label", visible)
+
+    def record_move(self, element, start, end):
+        """Record a drag step of an element; the steps of one drag merge into one command."""
+        self.command_log.record(MoveCommand(self, element, start, end))
+
+    def record_edit(self, element, before):
+        """Record the property changes of an element against its data before the edit."""
+        changes = data_changes(before, element.to_data())
+        if changes:
+            self.command_log.record(EditCommand(self, element, changes))
+
+    def undo(self):
+        """Undo the most recent whiteboard action."""
+        command = self.command_log.undo()
+        self.status_label.config(text=f"Undo: {command.label}" if command else "Nothing to undo")
+
+    def redo(self):
+        """Redo the most recently undone whiteboard action."""
+        command = self.command_log.redo()
+        self.status_label.config(text=f"Redo: {command.label}" if command else "Nothing to redo")
+
+    def remove_element(self, element):
+        """Take an element off the canvas and out of the whiteboard, without recording it."""
+        for item in (element.icon_item, element.label_id, element.inlet_button_window,
+                     element.outlet_button_window, element.rect_item, element.highlight_rect):
+            if item:
+                self.canvas.delete(item)
+        element.icon_item = element.label_id = element.rect_item = element.highlight_rect = None
+        element.inlet_button_window = element.outlet_button_window = None
+
+        if element in self.elements:
+            self.elements.remove(element)
+        self.index.remove(element)
+        self.visible_elements.discard(element)
+        if element in self.selected_elements:
+            self.selected_elements.remove(element)
+        if self.selected_element is element:
+            self.selected_element = None
+
+    def restore_element(self, element):
+        """Put a removed element back on the canvas."""
+        self.deleted_elements.discard(element.name)
+        element.create()
+        self.register_element(element)
+
+    def move_element(self, element, x, y):
+        """Move an element to a position and refresh its index entry."""
+        element.move_to(x, y)
+        self.index_element(element)
+
+    def update_element(self, element, values):
+        """Set fields of an element, given as in its to_data dict."""
+        data = element.to_data()
+        data.update(values)
+        element.load_from_data(data)
+        # load_from_data only sets the fields; the canvas label still shows the old name
+        element.label = element.name
+        if element.label_id:
+            self.canvas.itemconfig(element.label_id, text=element.label)
+
+    def element_at(self, event):
+        """Topmost element whose icon is under the mouse, or None."""
+        hits = self.index.query_point(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        return hits[0] if hits else None
+
+    def cull(self, event=None):
+        """Hide the elements outside the visible part of the canvas and show those inside."""
+        x0, y0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        # Before the canvas is mapped its size is only the requested one
+        x1 = x0 + max(self.canvas.winfo_width(), int(self.canvas.cget("width")))
+        y1 = y0 + max(self.canvas.winfo_height(), int(self.canvas.cget("height")))
+        visible = self.index.query_rect(x0 - CULL_MARGIN, y0 - CULL_MARGIN, x1 + CULL_MARGIN, y1 + CULL_MARGIN)
+        for element in self.visible_elements - visible:
+            element.set_visible(False)
+        for element in visible - self.visible_elements:
+            element.set_visible(True)
+        self.visible_elements = visible
+
+        # Elements loaded but never drawn are drawn once they come into view
+        self.realise_elements([e for e in visible if not e.icon_item])
+
+    def realise_elements(self, elements):
+        """Queue loaded elements for drawing in idle-time batches."""
+        for element in elements:
+            if not element.icon_item and element not in self.pending_set:
+                self.pending_elements.append(element)
+                self.pending_set.add(element)
+        if self.pending_elements and not self.loading:
+            self.loading = True
+            self.show_load_progress()
+            self.after_idle(self.realise_batch)
+
+    def realise_batch(self):
+        """Draw the next batch of queued elements, then yield to the event loop."""
+        for _ in range(min(LOAD_BATCH, len(self.pending_elements))):
+            element = self.pending_elements.popleft()
+            self.pending_set.discard(element)
+            if element.icon_item or element not in self.index:
+                continue  # Already drawn, or deleted while queued
+            try:
+                element.create()
+            except (tk.TclError, OSError) as e:
+                print(f"Error drawing element {element.name}: {e}")
+                continue
+            self.index_element(element)
+
+        if self.pending_elements:
+            self.show_load_progress()
+            self.after_idle(self.realise_batch)
+        else:
+            self.loading = False
+            self.hide_load_progress()
+
+    def show_load_progress(self):
+        """Show how many queued elements are left to draw."""
+        if self.load_progress is None:
+            self.load_progress = ttk.Progressbar(self, mode="determinate")
+            self.load_progress.pack(fill=tk.X)
+            self.load_progress_total = len(self.pending_elements)
+            self.load_status_text = self.status_label.cget("text")
+        self.load_progress_total = max(self.load_progress_total, len(self.pending_elements))
+        done = self.load_progress_total - len(self.pending_elements)
+        self.load_progress["maximum"] = self.load_progress_total
+        self.load_progress["value"] = done
+        self.status_label.config(text=f"Loading elements {done}/{self.load_progress_total}...")
+
+    def hide_load_progress(self):
+        """Remove the loading indicator."""
+        if self.load_progress is not None:
+            self.load_progress.destroy()
+            self.load_progress = None
+            self.status_label.config(text=self.load_status_text)
+
+    def clear_band_selection(self):
+        """Remove the highlight of the rubber-band selection."""
+        for element in self.selected_elements:
+            element.remove_highlight()
+        self.selected_elements = []
+
+    def on_band_motion(self, event):
+        """Draw the rubber band while dragging from empty space."""
+        if self.band_start is None:
+            return
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        if self.band_rect is None:
+            self.band_rect = self.canvas.create_rectangle(*self.band_start, x, y, outline="blue", dash=(4, 2))
+        else:
+            self.canvas.coords(self.band_rect, *self.band_start, x, y)
+
+    def on_band_release(self, event):
+        """Select the elements inside the rubber band."""
+        if self.band_rect is not None:
+            x0, y0, x1, y1 = self.canvas.coords(self.band_rect)
+            self.canvas.delete(self.band_rect)
+            self.band_rect = None
+            self.clear_band_selection()
+            self.selected_elements = list(self.index.query_rect(x0, y0, x1, y1))
+            for element in self.selected_elements:
+                element.apply_highlight()
+        self.band_start = None
 
     def set_background_image(self, image_path):
         """Sets the background image on the canvas."""
@@ -223,18 +428,13 @@ class Whiteboard(tk.Frame):
             messagebox.showwarning("Action Denied", "Please open or create a file first.")
             return
 
-        # Find the closest item on the canvas where the right-click occurred
-        item = self.canvas.find_closest(event.x, event.y)
-
-        # Check if the clicked item corresponds to any element
-        if item:
-            for element in self.elements:
-                if element.icon_item == item[0]:
-                    if self.selected_element:
-                        self.selected_element.remove_highlight()  # Remove highlight from the previous selection
-                    self.selected_element = element  # Set the clicked element as the selected element
-                    element.apply_highlight()  # Apply highlight to the selected element
-                    break
+        # Find the element under the right-click
+        element = self.element_at(event)
+        if element:
+            if self.selected_element:
+                self.selected_element.remove_highlight()  # Remove highlight from the previous selection
+            self.selected_element = element  # Set the clicked element as the selected element
+            element.apply_highlight()  # Apply highlight to the selected element
 
         # Show the context menu at the position where the right-click occurred
         self.context_menu.post(event.x_root, event.y_root)
@@ -245,12 +445,9 @@ class Whiteboard(tk.Frame):
             messagebox.showwarning("Action Denied", "Please open or create a file first.")
             return
 
-        # Handle Pipe creation separately to avoid duplicating ports/labels
+        # Pipes are numbered by position and skip the deleted-name reuse below
         if element_class == Pipe:
-            new_pipe = element_class(self.canvas, f"Pipe_{len(self.elements) + 1}")
-            # Create only the pipe without re-creating ports and labels
-            self.elements.append(new_pipe)
-            return new_pipe  # Don't call create here for Pipe
+            return self.create_element(element_class, f"Pipe_{len(self.elements) + 1}")
 
         # Handle normal element creation for all other types (Inlet, Outlet, etc.)
         # Initialize the counter for the element type if it's not already
@@ -278,10 +475,14 @@ class Whiteboard(tk.Frame):
             self.element_counts[element_class.__name__] += 1
             name = f"{element_class.__name__}_{self.element_counts[element_class.__name__]}"
 
-        # Create and add the new element to the canvas
+        return self.create_element(element_class, name)
+
+    def create_element(self, element_class, name):
+        """Create a new element on the canvas, register it and record it for undo."""
         element = element_class(self.canvas, name)
         element.create()
-        self.elements.append(element)
+        self.register_element(element)
+        self.command_log.record(AddCommand(self, element))
         return element
 
 
@@ -295,9 +496,8 @@ class Whiteboard(tk.Frame):
             messagebox.showwarning("Action Denied", "Please open or create a file first.")
             return
         
-        # Create a new Pipe without duplicating the ports and labels
-        new_pipe = self.add_element(Pipe)  # Use the modified add_element method for Pipe
-        new_pipe.create()  # Only create the pipe without inlet/outlet buttons
+        # add_element creates, indexes and records the pipe once
+        self.add_element(Pipe)
 
     def add_outlet_reservoir(self):
         self.add_element(OutletReservoir)
@@ -319,27 +519,22 @@ class Whiteboard(tk.Frame):
         if not self.is_file_open:
             return
 
-        item = self.canvas.find_closest(event.x, event.y)
-        clicked_on_element = False
-
-        # Check if the clicked item corresponds to any element
-        for element in self.elements:
-            if element.icon_item == item[0]:  # Match the icon item
-                clicked_on_element = True
-
-                # Unhighlight the previously selected element
-                if self.selected_element and self.selected_element != element:
-                    self.selected_element.remove_highlight()
-
-                # Highlight the new element
-                self.selected_element = element
-                element.apply_highlight()
-                break
+        self.clear_band_selection()
+        element = self.element_at(event)
+        if element:
+            # Unhighlight the previously selected element
+            if self.selected_element and self.selected_element != element:
+                self.selected_element.remove_highlight()
 
-        # If clicked outside any element, unhighlight the currently selected element
-        if not clicked_on_element and self.selected_element:
-            self.selected_element.remove_highlight()
-            self.selected_element = None
+            # Highlight the new element
+            self.selected_element = element
+            element.apply_highlight()
+        else:
+            # Clicked outside any element: unhighlight and start a rubber band
+            if self.selected_element:
+                self.selected_element.remove_highlight()
+                self.selected_element = None
+            self.band_start = (self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
 
 
     def duplicate_element(self):
@@ -365,7 +560,8 @@ class Whiteboard(tk.Frame):
             duplicate.create()
 
             # Add the duplicate to the elements list
-            self.elements.append(duplicate)
+            self.register_element(duplicate)
+            self.command_log.record(AddCommand(self, duplicate, "Duplicate"))
 
             # Optionally, set the duplicate as the currently selected element
             self.selected_element = duplicate
@@ -382,28 +578,22 @@ class Whiteboard(tk.Frame):
                 self.deleted_elements.add(element_name)
 
             # Proceed with the actual deletion
-            items_to_delete = [
-                self.selected_element.icon_item,
-                self.selected_element.label_id,
-                self.selected_element.inlet_button_window,
-                self.selected_element.outlet_button_window,
-                self.selected_element.rect_item,
-                self.selected_element.highlight_rect,
-            ]
-            for item in items_to_delete:
-                if item:
-                    self.canvas.delete(item)
-
-            self.elements.remove(self.selected_element)
-            self.selected_element = None
+            self.command_log.record(DeleteCommand(self, self.selected_element))
+            self.remove_element(self.selected_element)
 
 
     def clear(self):
         """Clears all elements from the whiteboard."""
         for element in self.elements[:]:
-            self.selected_element = element
-            self.delete_element()
+            self.deleted_elements.add(element.name)
+            self.remove_element(element)
         self.elements.clear()
+        self.command_log.clear()
+        self.index.clear()
+        self.pending_elements.clear()
+        self.pending_set.clear()
+        self.visible_elements.clear()
+        self.selected_elements = []
         self.selected_element = None
 
 
@@ -431,6 +621,8 @@ class Whiteboard(tk.Frame):
 
             # Load elements into the canvas
             self.whiteboard.load_elements(elements_data['elements'])
+            for warning in self.whiteboard.project.warnings:
+                self.console.log(warning, level="warning")
 
             # Update file state
             self.current_file_name = file_path
@@ -513,19 +705,34 @@ class Whiteboard(tk.Frame):
                     print("Error: The file content is not valid JSON.")
                     return
 
-        if isinstance(elements_data, dict) and "elements" in elements_data:
-            elements_data = elements_data["elements"]
+        # Parse into the headless model first, which normalises keys; values are kept as saved
+        try:
+            self.project = Project.from_data(elements_data)
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"Error loading elements: {e}")
+            return
 
-        for element_data in elements_data:
+        # Build the element views next; they are indexed at their saved position but not drawn
+        for record in self.project:
             try:
-                element_class = globals()[element_data["class"]]
-                element = element_class(self.canvas, element_data["name"])
-                element.load_from_data(element_data)
-                element.create()
-                self.elements.append(element)
-
-            except Exception as e:
+                element_class = globals()[record.CLASS]
+                element = element_class(self.canvas, record.name)
+                element.load_from_data(record.to_data())
+            except (KeyError, TypeError, ValueError) as e:
                 print(f"Error loading element: {e}")
+                continue
+            self.elements.append(element)
+            self.index.insert(element, element.model_bounds())
+
+        # Draw the elements in view in idle-time batches, the others when they come into view
+        self.cull()
+        self.command_log.clear()
+
+    def project_model(self, simulation_properties=None) -> Project:
+        """Headless copy of the elements on the canvas, see project_model.Project."""
+        self.project = Project.from_data({"elements": [element.to_data() for element in self.elements],
+                                          "simulation_properties": simulation_properties or {}})
+        return self.project
 
     def save_elements(self, file_path, elements_data):
         """Save elements to a serialized file (e.g., JSON format)."""
@@ -533,8 +740,8 @@ class Whiteboard(tk.Frame):
             # Ensure the data is in the correct format
             data_to_save = {"elements": elements_data}  # Wrap the data in the 'elements' key
             
-            with open(file_path, 'w') as file:
-                json.dump(data_to_save, file, indent=4)  # Save the elements data in the correct format
+            # Written to a temporary file and renamed, so a crash cannot leave a partial project
+            atomic_write_json(file_path, data_to_save)
             
             print(f"Data successfully saved to {file_path}")
         except TypeError: